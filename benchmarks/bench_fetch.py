@@ -0,0 +1,71 @@
+"""
+Load-test the fetch path against the local API stub, with no network or quota.
+
+    python -m benchmarks.bench_fetch --channels 1000 --videos-per-channel 100 --latency 0.02 --workers 1,8,32
+
+Every run starts from an empty data directory, so each one is a full first-time fetch.
+"""
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.youtube_api_stub import start_stub_server, stub_channel_ids
+from utils import api_client
+from utils.pipeline import run_streaming_ingest
+
+
+def run(label, fetch):
+    """Run fetch in a fresh working directory and print how long it took."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            os.makedirs('data')
+            start = time.perf_counter()
+            count = fetch()
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+    print(f"{label:<45} {count:>9,} videos {elapsed:>9.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the YouTube fetch path against the local stub")
+    parser.add_argument('--channels', type=int, default=200)
+    parser.add_argument('--videos-per-channel', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds of latency per stub response")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--workers', default='1,4,16', help="Comma separated max_workers values to compare")
+    parser.add_argument('--engines', default='search,uploads', help="Comma separated fetch engines to compare")
+    options = parser.parse_args()
+
+    server, base_url = start_stub_server([
+        '--port', '0',
+        '--channels', str(options.channels),
+        '--videos-per-channel', str(options.videos_per_channel),
+        '--latency', str(options.latency),
+        '--error-rate', str(options.error_rate),
+        '--rate-limit-rate', str(options.rate_limit_rate),
+        '--retry-after', '0',
+    ])
+    api_client.API_BASE_URL = base_url
+    channel_ids = stub_channel_ids(options.channels)
+    print(f"Stub at {base_url}: {options.channels} channels x {options.videos_per_channel} videos, "
+          f"{options.latency * 1000:.0f}ms latency")
+
+    try:
+        for engine in options.engines.split(','):
+            for workers in (int(value) for value in options.workers.split(',')):
+                run(f"fetch engine={engine} workers={workers}",
+                    lambda: len(api_client.fetch_top_youtubers_videos(channel_ids, max_workers=workers, engine=engine)))
+
+            workers = max(int(value) for value in options.workers.split(','))
+            run(f"streaming ingest engine={engine} workers={workers}",
+                lambda: run_streaming_ingest(channel_ids, 'data/videos.sqlite', max_workers=workers, engine=engine))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
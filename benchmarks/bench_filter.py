@@ -0,0 +1,93 @@
+"""
+Benchmark the channel and date filter of the dashboards on a synthetic dataset: the old .dt.date
+comparisons, a boolean mask over every row, and filter_videos on the sorted dataset.
+
+    python -m benchmarks.bench_filter --rows 5000000 --channels 300
+
+Every selection is a few channels over a random date range, run through all three versions,
+which are checked to select the same videos.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from utils.dataset import SORT_COLUMNS, channel_offsets, compact_frame, filter_videos, _sorted_selection
+
+
+def make_dataset(rows, channels, rng):
+    """Videos of channels publishing over 10 years, compacted and sorted like load_dataset."""
+    published_at = pd.Timestamp('2015-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 10 * 365 * 86400, rows), unit='s')
+    df = pd.DataFrame({
+        'video_id': np.arange(rows),
+        'channel_title': rng.choice([f"Channel {i}" for i in range(channels)], rows),
+        'published_at': published_at.astype('datetime64[us, UTC]'),
+        'views': rng.integers(0, 1_000_000, rows),
+        'duration_seconds': rng.integers(1, 3600, rows),
+    })
+    df = compact_frame(df).sort_values(list(SORT_COLUMNS), kind='stable', na_position='first', ignore_index=True)
+    df.attrs['sorted_by'] = SORT_COLUMNS
+    return df
+
+
+def legacy_filter(df, channel_titles, start_date, end_date):
+    """What show_analytics ran on every rerun: isin plus .dt.date comparisons."""
+    filtered_df = df[df['channel_title'].isin(channel_titles)]
+    return filtered_df[
+        (filtered_df['published_at'].dt.date >= start_date) &
+        (filtered_df['published_at'].dt.date <= end_date)
+    ]
+
+
+def mask_filter(df, channel_titles, start, end):
+    return df[df['channel_title'].isin(channel_titles) & (df['published_at'] >= start) & (df['published_at'] < end)]
+
+
+def timed(run, repeat):
+    """Median seconds of repeat runs, and the last result."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - started)
+    return result, float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark filtering the dataset by channel and date")
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--channels', type=int, default=300)
+    parser.add_argument('--selections', type=int, default=20)
+    options = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = make_dataset(options.rows, options.channels, rng)
+    channels = list(df['channel_title'].cat.categories)
+    print(f"{len(df):,} videos of {len(channels)} channels")
+
+    timings = {'.dt.date comparisons': [], 'boolean mask': [], 'binary search (locate)': [], 'binary search (filter)': []}
+    for _ in range(options.selections):
+        channel_titles = list(rng.choice(channels, 5, replace=False))
+        start_date = (pd.Timestamp('2015-01-01') + pd.Timedelta(days=int(rng.integers(0, 3000)))).date()
+        end_date = start_date + pd.Timedelta(days=int(rng.integers(30, 730)))
+        start = pd.Timestamp(start_date).tz_localize('UTC')
+        end = pd.Timestamp(end_date).tz_localize('UTC') + pd.Timedelta(days=1)
+
+        expected, seconds = timed(lambda: legacy_filter(df, channel_titles, start_date, end_date), 1)
+        timings['.dt.date comparisons'].append(seconds)
+        masked, seconds = timed(lambda: mask_filter(df, channel_titles, start, end), 3)
+        timings['boolean mask'].append(seconds)
+        _, seconds = timed(lambda: _sorted_selection(df, channel_titles, start, end), 20)
+        timings['binary search (locate)'].append(seconds)
+        filtered, seconds = timed(lambda: filter_videos(df, channel_titles, start, end), 20)
+        timings['binary search (filter)'].append(seconds)
+
+        assert expected.index.equals(masked.index) and expected.index.equals(filtered.index)
+
+    print(f"Median over {options.selections} selections of 5 channels (about {len(filtered):,} videos each):")
+    for name, seconds in timings.items():
+        print(f"  {name:24} {np.median(seconds) * 1000:9.3f} ms")
+    print(f"({len(channel_offsets(df)) - 1} channel offsets)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Report the memory used per column by the dashboard's video frame, the full table as it used to be
+loaded (every column, strings as Python objects, counters as float64 like in the CSV) against
+the compact frame load_dataset keeps.
+
+    python -m benchmarks.bench_memory --store data/videos.sqlite --repeat 100
+
+--repeat stacks copies of the stored videos (with new ids) to see the footprint at scale.
+"""
+import argparse
+import pandas as pd
+from utils.dataset import DATASET_COLUMNS, compact_frame, memory_report
+from utils.store import load_videos
+from config.settings import STORE_PATH
+
+
+def legacy_frame(df):
+    """The frame as read_csv built it from the CSV's columns: Python string objects and float64 counters."""
+    df = df.drop(columns=['stats_refreshed_at'])
+    for column in df.columns:
+        if column in ('views', 'likes'):
+            df[column] = df[column].astype('float64')
+        elif column != 'duration_seconds' and column != 'published_at':
+            df[column] = df[column].astype(object)
+    df['published_at'] = df['published_at'].dt.strftime('%Y-%m-%d %H:%M:%S+00:00').astype(object)
+    return df
+
+
+def repeat(df, times):
+    """Stack copies of the videos, each with its own ids."""
+    copies = []
+    for i in range(times):
+        copy = df.copy()
+        copy['video_id'] = copy['video_id'] + f"-{i}"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the memory used by the video frame")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--repeat', type=int, default=1)
+    options = parser.parse_args()
+
+    stored = repeat(load_videos(options.store), options.repeat)
+    legacy = legacy_frame(stored)
+    compact = compact_frame(stored[DATASET_COLUMNS].dropna(subset=['published_at']).reset_index(drop=True))
+
+    legacy_report, compact_report = memory_report(legacy), memory_report(compact)
+    print(f"Full table as loaded before ({len(legacy):,} rows):")
+    print(legacy_report.to_string())
+    print(f"\nCompact dataset ({len(compact):,} rows):")
+    print(compact_report.to_string())
+
+    legacy_total, compact_total = legacy_report.loc['total', 'bytes'], compact_report.loc['total', 'bytes']
+    print(f"\n{legacy_total / 1024:,.0f} KiB -> {compact_total / 1024:,.0f} KiB ({legacy_total / compact_total:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark merging an ingest batch into the stored videos, old row-by-row update against merge_videos.
+
+    python -m benchmarks.bench_merge --rows 1000,10000,100000,1000000 --batch 500
+
+Both versions are checked to give the same result wherever the old one is run.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from utils.data_processor import merge_videos
+
+
+def make_videos(count, rng, start=0):
+    """Synthetic stored videos with typed columns, like load_videos returns."""
+    ids = [f"vid{i:09d}" for i in range(start, start + count)]
+    return pd.DataFrame({
+        'video_id': ids,
+        'channel_id': rng.choice([f"channel{i}" for i in range(50)], count),
+        'published_at': pd.Timestamp('2024-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 365 * 86400, count), unit='s'),
+        'views': pd.array(rng.integers(0, 10_000_000, count), dtype='Int64'),
+        'likes': pd.array(rng.integers(0, 100_000, count), dtype='Int64'),
+        'stats_refreshed_at': pd.Series(pd.Timestamp('2025-01-01', tz='UTC'), index=range(count)),
+    })
+
+
+def make_batch(existing, size, rng):
+    """Half refreshed stats for stored videos (some without likes), half new videos."""
+    known = existing.sample(size // 2, random_state=1).copy()
+    known['views'] = known['views'] + 1
+    known['likes'] = known['likes'].astype('float').where(rng.random(len(known)) > 0.1)
+    known['stats_refreshed_at'] = pd.Timestamp.now(tz='UTC')
+    new = make_videos(size - len(known), rng, start=len(existing))
+    return pd.concat([known, new], ignore_index=True)
+
+
+def legacy_merge(existing_data, new_data):
+    """The row-by-row update process_video_data used before merge_videos."""
+    existing_data = existing_data.copy()
+    new_videos = new_data[~new_data['video_id'].isin(existing_data['video_id'])]
+    existing_video_ids = set(existing_data['video_id'])
+    updated_videos = new_data[new_data['video_id'].isin(existing_video_ids)]
+
+    for _, row in updated_videos.iterrows():
+        idx = existing_data.index[existing_data['video_id'] == row['video_id']].tolist()[0]
+        if pd.notna(row['views']):
+            existing_data.at[idx, 'views'] = row['views']
+        if pd.notna(row['likes']):
+            existing_data.at[idx, 'likes'] = row['likes']
+        if pd.notna(row['stats_refreshed_at']):
+            existing_data.at[idx, 'stats_refreshed_at'] = row['stats_refreshed_at']
+
+    return pd.concat([existing_data, new_videos], ignore_index=True)
+
+
+def timed(merge, existing, batch):
+    start = time.perf_counter()
+    result = merge(existing, batch)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merging a batch into the stored videos")
+    parser.add_argument('--rows', default='1000,10000,100000,1000000', help="Comma separated stored video counts")
+    parser.add_argument('--batch', type=int, default=500, help="Videos per ingest batch")
+    parser.add_argument('--legacy-max-rows', type=int, default=100_000, help="Skip the old merge above this size")
+    options = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'stored videos':>14} {'row by row':>12} {'vectorized':>12} {'speedup':>9}")
+    for rows in (int(value) for value in options.rows.split(',')):
+        existing = make_videos(rows, rng)
+        batch = make_batch(existing, options.batch, rng)
+
+        merged, vectorized_time = timed(merge_videos, existing, batch)
+
+        if rows <= options.legacy_max_rows:
+            expected, legacy_time = timed(legacy_merge, existing, batch)
+            columns = ['video_id', 'views', 'likes', 'stats_refreshed_at']
+            pd.testing.assert_frame_equal(
+                merged[columns].astype(object), expected[columns].astype(object), check_dtype=False
+            )
+            print(f"{rows:>14,} {legacy_time:>11.3f}s {vectorized_time:>11.3f}s {legacy_time / vectorized_time:>8.0f}x")
+        else:
+            print(f"{rows:>14,} {'-':>12} {vectorized_time:>11.3f}s {'-':>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Measure how long choosing a week in the drill-down takes to rerun, on a synthetic store:
+
+- a full page rerun without memoized results (what every click cost before)
+- a full page rerun with the page's results memoized (utils/memo.py)
+- a rerun of only the drill-down fragment (what a click reruns now)
+
+and how the memo of page results was used (hits, misses, evictions, memory held).
+
+    python -m benchmarks.bench_rerun --rows 1000000 --repeat 5
+
+The store is written to a temporary directory and the app is run with streamlit's AppTest.
+AppTest always reruns the whole script, so the fragment rerun is requested from its script
+runner with the panel's fragment id, the way the browser does on a click inside a fragment.
+"""
+import argparse
+import functools
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# (page, fragment function, button of a week in it). The shorts page has a panel for shorts and
+# one for regular videos; the regular one is registered last.
+PANELS = [
+    ("Advanced Analytics", 'weekly_videos_panel', "View Videos for Selected Week"),
+    ("Shorts Impact", 'weekly_videos_panel', "View Regular Videos for Selected Week"),
+]
+
+
+def make_videos(count, channels, rng):
+    """Videos of the configured channels over 5 years, a third of them shorts."""
+    return pd.DataFrame({
+        'video_id': [f"vid{i:09d}" for i in range(count)],
+        'channel_id': rng.choice([f"channel{i}" for i in range(len(channels))], count),
+        'video_title': [f"Video {i}" for i in range(count)],
+        'channel_title': rng.choice(channels, count),
+        'published_at': pd.Timestamp('2020-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 5 * 365 * 86400, count), unit='s'),
+        'views': rng.integers(0, 10_000_000, count),
+        'likes': rng.integers(0, 100_000, count),
+        'duration_seconds': np.where(rng.random(count) < 1 / 3, rng.integers(5, 61, count), rng.integers(61, 3600, count)),
+    })
+
+
+def fragment_ids(app, name):
+    """Ids of the fragments running the function name, in the order they were registered."""
+    return [fid for fid, fragment in app._fragment_storage._fragments.items()
+            if any(getattr(cell.cell_contents, '__name__', None) == name for cell in fragment.__closure__ or ())]
+
+
+def open_page(app, page):
+    app.run()
+    app.sidebar.radio[0].set_value(page).run()
+    return app
+
+
+def click(app, label):
+    [button for button in app.button if button.label == label][0].click()
+
+
+def timed(run):
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure rerun latency of the week drill-down")
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_rerun_')
+    # The store path is read when the settings are imported
+    os.environ['STORE_PATH'] = os.path.join(directory, 'videos.parquet')
+    from streamlit.testing.v1 import AppTest
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+    from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+    from config.settings import CHANNEL_COLORS, STORE_PATH
+    from utils.memo import clear_memo, memo_stats
+    from utils.store import save_videos
+
+    save_videos(make_videos(options.rows, list(CHANNEL_COLORS), np.random.default_rng(0)), STORE_PATH)
+    print(f"{options.rows:,} videos in {STORE_PATH}")
+
+    for page, name, label in PANELS:
+        app = open_page(AppTest.from_file(APP_PATH, default_timeout=600), page)
+        full, memoized, fragment = [], [], []
+        for _ in range(options.repeat):
+            clear_memo()
+            click(app, label)
+            full.append(timed(app.run))
+
+            click(app, label)
+            memoized.append(timed(app.run))
+
+            # Rerun only the fragment of the clicked panel, then restore the whole page
+            click(app, label)
+            queue = fragment_ids(app, name)[-1:]
+            local_script_runner.RerunData = functools.partial(RerunData, fragment_id_queue=queue)
+            try:
+                fragment.append(timed(app.run))
+            finally:
+                local_script_runner.RerunData = RerunData
+            assert not app.exception, [e.value for e in app.exception]
+            open_page(app, page)
+
+        print(f"{page}, choosing a week (median of {options.repeat}):")
+        print(f"  full rerun:                 {np.median(full):7.3f}s")
+        print(f"  full rerun, memoized:       {np.median(memoized):7.3f}s")
+        print(f"  drill-down fragment rerun:  {np.median(fragment):7.3f}s")
+        stats = memo_stats()
+        print(f"  memo: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions, "
+              f"{stats['entries']} entries holding {stats['bytes'] / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark filling the channel × week grid of the weekly trend charts, the old complete_grid loop
+and merge against dense_weekly.
+
+    python -m benchmarks.bench_week_grid --channels 300 --years 5
+
+Channels publish in a random share of the weeks, so most of the grid is filled in. Both versions
+are checked to give the same value for every (channel, week) the old grid had.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from utils.weekly_stats import dense_weekly, week_labels
+
+
+def make_weekly(channels, years, rng):
+    """Average views per channel and ISO week as weekly_views returns them, about 30% of the weeks filled."""
+    weeks = pd.date_range('2019-12-30', periods=years * 52, freq='7D').isocalendar()
+    grid = pd.DataFrame({
+        'channel_title': np.repeat([f"Channel {i}" for i in range(channels)], len(weeks)),
+        'iso_year': np.tile(weeks['year'].to_numpy('int32'), channels),
+        'iso_week': np.tile(weeks['week'].to_numpy('int32'), channels),
+    })
+    weekly = grid[rng.random(len(grid)) < 0.3].reset_index(drop=True)
+    weekly['year_week'] = week_labels(weekly['iso_year'], weekly['iso_week'])
+    weekly['year_week_num'] = weekly['iso_year'] * 100 + weekly['iso_week']
+    weekly['avg_views'] = rng.integers(0, 1_000_000, len(weekly))
+    return weekly[['year_week', 'year_week_num', 'channel_title', 'avg_views']]
+
+
+def legacy_grid(weekly_data, all_channels):
+    """The loop the analytics and shorts pages ran on every rerun."""
+    weekly_data = weekly_data.sort_values('year_week_num')
+    all_year_weeks = weekly_data[['year_week', 'year_week_num']].drop_duplicates().sort_values('year_week_num')
+    all_weeks = all_year_weeks['year_week'].tolist()
+    complete_grid = []
+    for channel in all_channels:
+        for i, week in enumerate(all_weeks):
+            week_num = all_year_weeks.iloc[i]['year_week_num']
+            complete_grid.append({'year_week': week, 'year_week_num': week_num, 'channel_title': channel})
+    complete_df = pd.DataFrame(complete_grid)
+    weekly_data = pd.merge(complete_df, weekly_data, on=['year_week', 'year_week_num', 'channel_title'], how='left')
+    weekly_data['avg_views'] = weekly_data['avg_views'].fillna(0)
+    return weekly_data.sort_values(['channel_title', 'year_week_num'])
+
+
+def timed(build, *args):
+    start = time.perf_counter()
+    result = build(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark filling the channel × week grid")
+    parser.add_argument('--channels', type=int, default=300)
+    parser.add_argument('--years', type=int, default=5)
+    options = parser.parse_args()
+
+    weekly = make_weekly(options.channels, options.years, np.random.default_rng(0))
+    channels = weekly['channel_title'].unique()
+
+    expected, legacy_time = timed(legacy_grid, weekly, channels)
+    dense, dense_time = timed(dense_weekly, weekly, channels)
+
+    keys = ['channel_title', 'year_week_num']
+    compared = expected.merge(dense, on=keys, how='left', suffixes=('_legacy', '_dense'))
+    assert (compared['avg_views_legacy'] == compared['avg_views_dense']).all()
+    print(f"{len(channels):,} channels × {dense['year_week_num'].nunique():,} weeks = {len(dense):,} cells")
+    print(f"complete_grid loop: {legacy_time:.3f}s, dense_weekly: {dense_time:.3f}s "
+          f"({legacy_time / dense_time:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Check that videos.list responses are served from the response cache across runs, against the
+local API stub, in a temporary directory.
+
+    python -m benchmarks.check_http_cache
+
+- The same videos requested in a different order (as batches come out of another run) hit the cache.
+- Once the cached response is older than HTTP_CACHE_TTL, it is revalidated and the unchanged
+  payload comes back as 304 Not Modified.
+- The stats refresh packs the same due videos into the same batches whatever order they come in.
+
+Exits with status 1 and prints what failed.
+"""
+import os
+import random
+import sys
+import tempfile
+import pandas as pd
+from benchmarks.youtube_api_stub import start_stub_server
+from utils import api_client, http_cache
+from utils.refresh_scheduler import plan_stats_refresh
+
+VIDEO_IDS = [f"v{channel:06d}x{index:04d}" for channel in range(5) for index in range(10)]
+
+
+def fetch(video_ids):
+    """Fetch one batch of details in a fresh run. Returns (details, cache outcomes)."""
+    http_cache.reset_cache_stats()
+    details, errors = api_client.fetch_video_details_batch(video_ids)
+    assert not errors, errors
+    stats = http_cache.get_cache_stats()
+    return details, {outcome: stats[outcome] for outcome in ('hits', 'misses', 'not_modified')}
+
+
+def check_cache(rng):
+    problems = []
+    first, outcomes = fetch(VIDEO_IDS)
+    if outcomes['misses'] != 1:
+        problems.append(f"first fetch: expected a miss, got {outcomes}")
+
+    shuffled = rng.sample(VIDEO_IDS, len(VIDEO_IDS))
+    details, outcomes = fetch(shuffled)
+    if outcomes['hits'] != 1:
+        problems.append(f"same videos in another order: expected a hit, got {outcomes}")
+    if details != first:
+        problems.append("same videos in another order: the cached details differ")
+
+    # Every cached response is now too old to be served without asking
+    ttl = api_client.HTTP_CACHE_TTL
+    api_client.HTTP_CACHE_TTL = 0
+    try:
+        _, outcomes = fetch(rng.sample(VIDEO_IDS, len(VIDEO_IDS)))
+    finally:
+        api_client.HTTP_CACHE_TTL = ttl
+    if outcomes['not_modified'] != 1:
+        problems.append(f"expired entry: expected a 304, got {outcomes}")
+    return problems
+
+
+def check_refresh_batches(rng):
+    now = pd.Timestamp('2025-06-01', tz='UTC')
+    df = pd.DataFrame({
+        'video_id': [f"v{index:05d}" for index in range(200)],
+        'published_at': now - pd.Timedelta(days=400),
+        'stats_refreshed_at': pd.NaT,
+    })
+    batches = plan_stats_refresh(df, now=now)
+    shuffled = plan_stats_refresh(df.sample(frac=1, random_state=rng.randrange(1000)), now=now)
+    if batches != shuffled:
+        return ["the stats refresh packed the same due videos into different batches"]
+    return []
+
+
+def main():
+    rng = random.Random(0)
+    server, base_url = start_stub_server(['--port', '0', '--channels', '5', '--videos-per-channel', '10', '--latency', '0'])
+    api_client.API_BASE_URL = base_url
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='check_http_cache_'))
+    failures = []
+    try:
+        for check in (check_cache, check_refresh_batches):
+            problems = check(rng)
+            print(f"{check.__name__}: {'ok' if not problems else 'FAILED'}")
+            failures += problems
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+
+    for failure in failures:
+        print(f"  {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
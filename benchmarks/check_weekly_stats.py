@@ -0,0 +1,168 @@
+"""
+Check the weekly aggregates against the store they summarize, in a temporary directory.
+
+    python -m benchmarks.check_weekly_stats
+
+- Starting from only the legacy CSV (data/videos.csv), read_weekly_stats neither blocks nor
+  imports it; migrate imports it and builds the aggregates.
+- While a writer holds the store lock and the aggregates are missing, read_weekly_stats returns
+  without waiting and without writing, with the store aggregated in memory.
+- A write that fails after the store commits but before the aggregates are updated leaves them
+  marked: reads aggregate the store instead, and the next migration rebuilds them.
+- A SQLite and a Parquet store with the same name in one directory keep separate aggregates.
+
+Exits with status 1 and prints what failed.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import pandas as pd
+from config.settings import CSV_FILE_PATH
+import utils.data_processor as data_processor
+from utils.migrations import migrate
+from utils.store import load_videos, store_lock
+from utils.weekly_stats import (
+    VIDEO_COLUMNS, KEY_COLUMNS, SUM_COLUMNS, aggregate, read_weekly_stats, weekly_stats_current,
+    weekly_stats_path, weekly_stats_pending_path
+)
+
+TIMEOUT = 60
+
+
+def same_cells(cells, expected):
+    """Whether two sets of aggregates hold the same sums for the same keys."""
+    def normalized(frame):
+        frame = frame[KEY_COLUMNS + SUM_COLUMNS].astype({'channel_title': object, 'is_short': object})
+        return frame.sort_values(KEY_COLUMNS[:3] + ['videos', 'views_sum']).reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(normalized(cells), normalized(expected), check_dtype=False)
+        return True
+    except AssertionError:
+        return False
+
+
+def within_timeout(function, *args):
+    """Run function in a thread. Returns (finished, result)."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', function(*args)), daemon=True)
+    thread.start()
+    thread.join(TIMEOUT)
+    return not thread.is_alive(), result.get('value')
+
+
+def stored_cells(store_path):
+    return aggregate(load_videos(store_path, columns=VIDEO_COLUMNS))
+
+
+def check_legacy_csv(source_csv):
+    """Only the legacy CSV exists: reads leave it alone, the migration imports it and builds the aggregates."""
+    os.makedirs('data')
+    shutil.copy(source_csv, CSV_FILE_PATH)
+    store_path = 'data/videos.sqlite'
+
+    finished, cells = within_timeout(read_weekly_stats, store_path)
+    if not finished:
+        return [f"read_weekly_stats did not return within {TIMEOUT}s starting from {CSV_FILE_PATH}"]
+    if os.path.exists(store_path) or not cells.empty:
+        return ["read_weekly_stats imported the legacy CSV"]
+
+    migrate(store_path)
+    if not os.path.exists(store_path):
+        return ["migrate did not import the legacy CSV"]
+    if not weekly_stats_current(store_path):
+        return ["migrate did not build the aggregates"]
+    if not same_cells(read_weekly_stats(store_path), stored_cells(store_path)):
+        return ["aggregates built from the legacy CSV differ from the imported store"]
+    return []
+
+
+def check_reader_never_blocks(source_csv):
+    """A writer holds the lock and there are no aggregates: the read neither waits nor writes."""
+    store_path = 'videos.sqlite'
+    migrate(store_path, source_csv)
+    os.remove(weekly_stats_path(store_path))
+
+    with store_lock(store_path):
+        finished, cells = within_timeout(read_weekly_stats, store_path)
+    if not finished:
+        return [f"read_weekly_stats waited on the store lock for more than {TIMEOUT}s"]
+    if os.path.exists(weekly_stats_path(store_path)):
+        return ["read_weekly_stats wrote the aggregates"]
+    if not same_cells(cells, stored_cells(store_path)):
+        return ["aggregates read without the file differ from the store"]
+    return []
+
+
+def check_failed_write(source_csv):
+    """The process dies between the store write and the aggregates update: reads stay in sync, a migration repairs them."""
+    store_path = 'videos.sqlite'
+    videos = pd.read_csv(source_csv)
+    data_processor.process_video_data(videos, store_path)
+    stale = read_weekly_stats(store_path)
+
+    def fail(before, after, store_path):
+        raise RuntimeError("simulated crash before the aggregates update")
+    update_weekly_stats = data_processor.update_weekly_stats
+    data_processor.update_weekly_stats = fail
+    try:
+        data_processor.process_video_data(videos.assign(views=videos['views'] * 2), store_path)
+        return ["the simulated crash did not happen"]
+    except RuntimeError:
+        pass
+    finally:
+        data_processor.update_weekly_stats = update_weekly_stats
+
+    if not os.path.exists(weekly_stats_pending_path(store_path)):
+        return ["the failed write did not leave the aggregates marked"]
+    expected = stored_cells(store_path)
+    if same_cells(stale, expected):
+        return ["the simulated write did not change the store"]
+    if not same_cells(read_weekly_stats(store_path), expected):
+        return ["read_weekly_stats returned aggregates out of sync with the store"]
+
+    migrate(store_path)
+    if not weekly_stats_current(store_path):
+        return ["migrate did not rebuild the marked aggregates"]
+    if not same_cells(read_weekly_stats(store_path), expected):
+        return ["the rebuilt aggregates differ from the store"]
+    return []
+
+
+def check_stores_sharing_stem(source_csv):
+    """videos.sqlite and videos.parquet both ingest: each keeps aggregates of its own videos only."""
+    videos = pd.read_csv(source_csv)
+    half = len(videos) // 2
+    data_processor.process_video_data(videos.iloc[:half], 'videos.sqlite')
+    data_processor.process_video_data(videos.iloc[half:], 'videos.parquet')
+    data_processor.process_video_data(videos.iloc[:half].assign(views=videos['views'] * 2), 'videos.sqlite')
+
+    problems = []
+    for store_path in ('videos.sqlite', 'videos.parquet'):
+        if not same_cells(read_weekly_stats(store_path), stored_cells(store_path)):
+            problems.append(f"aggregates of {store_path} differ from its videos")
+    return problems
+
+
+def main():
+    source_csv = os.path.abspath(CSV_FILE_PATH)
+    failures = []
+    for check in (check_legacy_csv, check_reader_never_blocks, check_failed_write, check_stores_sharing_stem):
+        directory = tempfile.mkdtemp(prefix='check_weekly_stats_')
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            problems = check(source_csv)
+        finally:
+            os.chdir(cwd)
+        print(f"{check.__name__}: {'ok' if not problems else 'FAILED'}")
+        failures += problems
+
+    for failure in failures:
+        print(f"  {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
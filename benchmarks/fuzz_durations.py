@@ -0,0 +1,118 @@
+"""
+Fuzz parse_durations against isodate on random, partly malformed durations, and time both.
+
+    python -m benchmarks.fuzz_durations --samples 200000 --seed 1
+
+Exits with status 1 and prints the first mismatches if the two ever disagree.
+"""
+import argparse
+import random
+import sys
+import time
+import isodate
+import pandas as pd
+from isodate.isoduration import ISO8601_PERIOD_REGEX
+from utils.data_processor import parse_durations
+
+_ALPHABET = 'PTYMWDHS0123456789.,+- '
+
+
+def random_number(rng):
+    number = str(rng.choice([0, 1, 5, 9, 12, 59, 60, 61, 99, 3600, rng.randint(0, 10**6)]))
+    if rng.random() < 0.15:
+        number += rng.choice('.,') + ''.join(rng.choice('0123456789') for _ in range(rng.randint(1, 8)))
+    return number
+
+
+def random_duration(rng):
+    """A duration in the designator format, each component present at random."""
+    value = rng.choice(['', '', '', '-', '+']) + 'P'
+    for unit, chance in (('Y', 0.05), ('M', 0.05), ('W', 0.1), ('D', 0.2)):
+        if rng.random() < chance:
+            value += random_number(rng) + unit
+    if rng.random() < 0.9:
+        value += 'T'
+        for unit, chance in (('H', 0.4), ('M', 0.7), ('S', 0.8)):
+            if rng.random() < chance:
+                value += random_number(rng) + unit
+    return value
+
+
+def mutate(value, rng):
+    """Delete, insert or swap characters to produce near-miss inputs."""
+    chars = list(value)
+    for _ in range(rng.randint(1, 3)):
+        position = rng.randint(0, len(chars))
+        action = rng.random()
+        if action < 0.4 and chars:
+            del chars[min(position, len(chars) - 1)]
+        elif action < 0.8:
+            chars.insert(position, rng.choice(_ALPHABET))
+        elif len(chars) > 1:
+            i = rng.randint(0, len(chars) - 2)
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return ''.join(chars)
+
+
+def random_input(rng):
+    roll = rng.random()
+    if roll < 0.02:
+        return None
+    if roll < 0.05:
+        return ''.join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 12)))
+    value = random_duration(rng)
+    return mutate(value, rng) if roll < 0.45 else value
+
+
+def isodate_seconds(value):
+    """What the old per-row code computed, with failures as None."""
+    try:
+        return int(isodate.parse_duration(value).total_seconds())
+    except Exception:
+        # Malformed strings, years/months (no fixed length), overflow, non-strings
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the vectorized duration parser against isodate")
+    parser.add_argument('--samples', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+
+    rng = random.Random(options.seed)
+    values = pd.Series([random_input(rng) for _ in range(options.samples)], dtype=object)
+
+    start = time.perf_counter()
+    expected = [isodate_seconds(value) for value in values]
+    isodate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = parse_durations(values)
+    vectorized_time = time.perf_counter() - start
+
+    mismatches, skipped = [], 0
+    for value, want, got in zip(values, expected, parsed):
+        got = None if pd.isna(got) else int(got)
+        if want == got:
+            continue
+        # isodate's alternative PYYYY-MM-DDThh:mm:ss form is deliberately unsupported
+        if isinstance(value, str) and want is not None and not ISO8601_PERIOD_REGEX.match(value):
+            skipped += 1
+            continue
+        mismatches.append((value, want, got))
+
+    parsed_count = sum(want is not None for want in expected)
+    print(f"{options.samples:,} inputs ({parsed_count:,} valid durations), {skipped} in the alternative format skipped")
+    print(f"isodate per row: {isodate_time:.3f}s, parse_durations: {vectorized_time:.3f}s "
+          f"({isodate_time / vectorized_time:.0f}x)")
+
+    if mismatches:
+        print(f"{len(mismatches)} mismatches:")
+        for value, want, got in mismatches[:20]:
+            print(f"  {value!r}: isodate {want}, parse_durations {got}")
+        sys.exit(1)
+    print("No mismatches")
+
+
+if __name__ == '__main__':
+    main()
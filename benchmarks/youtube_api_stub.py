@@ -0,0 +1,424 @@
+"""
+Local stand-in for the YouTube Data API, used to benchmark and regression-test
+utils/api_client.py without an API key, quota or network.
+
+Serves the channels, search, playlistItems and videos endpoints for synthetic channels,
+or records real responses and replays them for deterministic runs:
+
+    # Synthetic data, point the dashboard or a benchmark at it
+    python -m benchmarks.youtube_api_stub --channels 2000 --videos-per-channel 300 --latency 0.05
+    YOUTUBE_API_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+    # Record real responses, then replay them
+    python -m benchmarks.youtube_api_stub --record benchmarks/fixtures
+    python -m benchmarks.youtube_api_stub --replay benchmarks/fixtures
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl, urlencode
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+from config.settings import CHANNEL_IDS, CHANNEL_COLORS
+
+UPSTREAM_BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+
+def stub_channel_ids(count):
+    """Return the IDs of the first count synthetic channels."""
+    return [f"UCstub{index:018d}" for index in range(count)]
+
+
+def _stable_int(*parts):
+    """Deterministic pseudo random integer derived from the given parts."""
+    digest = hashlib.sha256('/'.join(str(part) for part in parts).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def _format_time(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def parse_fields(text):
+    """
+    Parse a partial-response field mask such as "nextPageToken,items(id/videoId,snippet(title))"
+    into a nested dictionary, where None means "keep everything below this key".
+    """
+    def parse_list(position):
+        tree = {}
+        while position < len(text) and text[position] != ')':
+            # A path like a/b/c, optionally followed by a (sub,selection)
+            end = position
+            while end < len(text) and text[end] not in ',()':
+                end += 1
+            path = text[position:end].strip().split('/')
+            position = end
+            subtree = None
+            if position < len(text) and text[position] == '(':
+                subtree, position = parse_list(position + 1)
+                position += 1  # Skip the closing parenthesis
+            for name in reversed(path):
+                subtree = {name: subtree}
+            _merge_fields(tree, subtree)
+            if position < len(text) and text[position] == ',':
+                position += 1
+        return tree, position
+
+    return parse_list(0)[0]
+
+
+def _merge_fields(tree, other):
+    for name, subtree in other.items():
+        if name in tree and tree[name] is not None and subtree is not None:
+            _merge_fields(tree[name], subtree)
+        else:
+            tree[name] = None if name in tree and tree[name] is None else subtree
+
+
+def apply_fields(value, tree):
+    """Keep only the parts of a response selected by a parsed field mask."""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [apply_fields(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {name: apply_fields(value[name], subtree) for name, subtree in tree.items() if name in value}
+    return value
+
+
+class SyntheticYouTube:
+    """
+    Deterministic synthetic data set.
+    Videos are generated on demand from the channel and video index, so thousands of
+    channels cost no memory up front. The configured CHANNEL_IDS are served as well
+    (under their CHANNEL_COLORS names), so the dashboard works against the stub unchanged.
+    """
+
+    def __init__(self, channels, videos_per_channel, page_size, seed, now=None):
+        self.channel_ids = list(CHANNEL_IDS) + stub_channel_ids(channels)
+        # CHANNEL_COLORS lists the configured channels in the same order as CHANNEL_IDS
+        self.channel_titles = list(CHANNEL_COLORS)[:len(CHANNEL_IDS)]
+        self.channel_index = {channel_id: index for index, channel_id in enumerate(self.channel_ids)}
+        self.videos_per_channel = videos_per_channel
+        self.page_size = page_size
+        self.seed = seed
+        self.now = now or datetime.now(timezone.utc).replace(microsecond=0)
+
+    def video_id(self, channel, index):
+        return f"v{channel:06d}x{index:04d}"
+
+    def parse_video_id(self, video_id):
+        try:
+            channel, index = video_id[1:].split('x')
+            return int(channel), int(index)
+        except ValueError:
+            return None
+
+    def published_at(self, channel, index):
+        # Each channel posts at its own pace, between every 6 hours and every 4 days
+        interval_hours = 6 + _stable_int(self.seed, 'pace', channel) % 90
+        return self.now - timedelta(hours=interval_hours * index + 1)
+
+    def snippet(self, channel, index):
+        channel_id = self.channel_ids[channel]
+        video_id = self.video_id(channel, index)
+        return {
+            'publishedAt': _format_time(self.published_at(channel, index)),
+            'channelId': channel_id,
+            'title': f"Synthetic video {index} of channel {channel}",
+            'description': f"Description of synthetic video {index} of channel {channel}. " * 8,
+            'thumbnails': {
+                'default': {'url': f"https://i.ytimg.com/vi/{video_id}/default.jpg", 'width': 120, 'height': 90},
+                'high': {'url': f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg", 'width': 480, 'height': 360},
+            },
+            'channelTitle': self.channel_titles[channel] if channel < len(self.channel_titles) else f"Stub Channel {channel}",
+        }
+
+    def _page(self, indexes, params):
+        max_results = min(int(params.get('maxResults', 5)), self.page_size, 50)
+        offset = int(params.get('pageToken') or 0)
+        page = indexes[offset:offset + max_results]
+        response = {'pageInfo': {'totalResults': len(indexes), 'resultsPerPage': max_results}}
+        if offset + max_results < len(indexes):
+            response['nextPageToken'] = str(offset + max_results)
+        return page, response
+
+    def channels(self, params):
+        items = []
+        for channel_id in params.get('id', '').split(','):
+            if channel_id in self.channel_index:
+                items.append({
+                    'kind': 'youtube#channel',
+                    'id': channel_id,
+                    'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + channel_id[2:]}},
+                })
+        return {'kind': 'youtube#channelListResponse', 'items': items}
+
+    def search(self, params):
+        channel = self.channel_index.get(params.get('channelId'))
+        if channel is None:
+            return {'kind': 'youtube#searchListResponse', 'items': []}
+
+        indexes = range(self.videos_per_channel)
+        if params.get('publishedAfter'):
+            cutoff = _parse_time(params['publishedAfter'])
+            indexes = [index for index in indexes if self.published_at(channel, index) >= cutoff]
+
+        page, response = self._page(list(indexes), params)
+        response['kind'] = 'youtube#searchListResponse'
+        response['items'] = [
+            {
+                'kind': 'youtube#searchResult',
+                'id': {'kind': 'youtube#video', 'videoId': self.video_id(channel, index)},
+                'snippet': self.snippet(channel, index),
+            }
+            for index in page
+        ]
+        return response
+
+    def playlist_items(self, params):
+        playlist_id = params.get('playlistId', '')
+        channel = self.channel_index.get('UC' + playlist_id[2:])
+        if channel is None:
+            return {'kind': 'youtube#playlistItemListResponse', 'items': []}
+
+        page, response = self._page(list(range(self.videos_per_channel)), params)
+        response['kind'] = 'youtube#playlistItemListResponse'
+        response['items'] = []
+        for index in page:
+            snippet = self.snippet(channel, index)
+            snippet['resourceId'] = {'kind': 'youtube#video', 'videoId': self.video_id(channel, index)}
+            response['items'].append({
+                'kind': 'youtube#playlistItem',
+                'snippet': snippet,
+                'contentDetails': {
+                    'videoId': self.video_id(channel, index),
+                    'videoPublishedAt': snippet['publishedAt'],
+                },
+            })
+        return response
+
+    def videos(self, params):
+        items = []
+        for video_id in params.get('id', '').split(','):
+            parsed = self.parse_video_id(video_id)
+            if parsed is None or parsed[0] >= len(self.channel_ids) or parsed[1] >= self.videos_per_channel:
+                continue
+            channel, index = parsed
+            views = _stable_int(self.seed, 'views', video_id) % 5_000_000
+            duration = _stable_int(self.seed, 'duration', video_id) % 1800 + 15
+            minutes, seconds = divmod(duration, 60)
+            items.append({
+                'kind': 'youtube#video',
+                'id': video_id,
+                'statistics': {
+                    'viewCount': str(views),
+                    'likeCount': str(views // 25),
+                    'favoriteCount': '0',
+                    'commentCount': str(views // 400),
+                },
+                'contentDetails': {
+                    'duration': f"PT{minutes}M{seconds}S" if minutes else f"PT{seconds}S",
+                    'dimension': '2d',
+                    'definition': 'hd',
+                    'caption': 'false',
+                },
+            })
+        return {'kind': 'youtube#videoListResponse', 'items': items}
+
+    def handle(self, endpoint, params):
+        handlers = {
+            'channels': self.channels,
+            'search': self.search,
+            'playlistItems': self.playlist_items,
+            'videos': self.videos,
+        }
+        if endpoint not in handlers:
+            return 404, {'error': {'code': 404, 'message': f"Unknown endpoint {endpoint}"}}
+        return 200, handlers[endpoint](params)
+
+
+class FixtureStore:
+    """Recorded responses on disk, keyed by endpoint and parameters (without the API key)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, endpoint, params):
+        relevant = sorted((name, value) for name, value in params.items() if name != 'key')
+        digest = hashlib.sha256(f"{endpoint}?{urlencode(relevant)}".encode('utf-8')).hexdigest()[:24]
+        return os.path.join(self.directory, f"{endpoint}-{digest}.json")
+
+    def load(self, endpoint, params):
+        path = self.path(endpoint, params)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            fixture = json.load(f)
+        return fixture['status'], fixture['body']
+
+    def save(self, endpoint, params, status, body):
+        relevant = {name: value for name, value in params.items() if name != 'key'}
+        with open(self.path(endpoint, params), 'w') as f:
+            json.dump({'endpoint': endpoint, 'params': relevant, 'status': status, 'body': body}, f, indent=1)
+
+
+def _fetch_upstream(upstream, endpoint, params):
+    """Forward a request to the real API and return (status, body)."""
+    request = Request(f"{upstream}/{endpoint}?{urlencode(params)}", headers={'Accept-Encoding': 'identity'})
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+
+
+def make_handler(options, data=None, fixtures=None):
+    """Build the request handler class for the given options."""
+    rng = random.Random(options.seed)
+    rng_lock = threading.Lock()
+    stats = {'requests': 0, 'errors': 0, 'rate_limited': 0, 'not_modified': 0}
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            if options.verbose:
+                super().log_message(format, *args)
+
+        def send_json(self, status, body, extra_headers=None):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            # Like the real API, only compress when the client asks for it
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                payload = gzip.compress(payload, compresslevel=6)
+                self.send_header('Content-Encoding', 'gzip')
+            for name, value in (extra_headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+            params = dict(parse_qsl(url.query))
+            stats['requests'] += 1
+
+            if options.latency:
+                time.sleep(options.latency)
+
+            with rng_lock:
+                roll = rng.random()
+
+            # Injected failures, rate limiting first so both rates mean what they say
+            if roll < options.rate_limit_rate:
+                stats['rate_limited'] += 1
+                self.send_json(429, {'error': {'code': 429, 'message': 'Rate limit exceeded (stub)'}},
+                               {'Retry-After': str(options.retry_after)})
+                return
+            if roll < options.rate_limit_rate + options.error_rate:
+                stats['errors'] += 1
+                self.send_json(503, {'error': {'code': 503, 'message': 'Backend error (stub)'}})
+                return
+
+            if options.replay:
+                fixture = fixtures.load(endpoint, params)
+                if fixture is None:
+                    self.send_json(404, {'error': {'code': 404, 'message': f"No fixture recorded for {self.path}"}})
+                    return
+                status, body = fixture
+            elif options.record:
+                status, body = _fetch_upstream(options.upstream, endpoint, params)
+                fixtures.save(endpoint, params, status, body)
+            else:
+                status, body = data.handle(endpoint, params)
+
+            if status != 200:
+                self.send_json(status, body)
+                return
+
+            if params.get('fields'):
+                body = apply_fields(body, parse_fields(params['fields']))
+
+            etag = '"' + hashlib.md5(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest() + '"'
+            body['etag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                stats['not_modified'] += 1
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            self.send_json(200, body, {'ETag': etag})
+
+    StubHandler.stats = stats
+    return StubHandler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the YouTube Data API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--channels', type=int, default=0, help="Number of synthetic channels served next to CHANNEL_IDS")
+    parser.add_argument('--videos-per-channel', type=int, default=200, help="Videos per synthetic channel")
+    parser.add_argument('--page-size', type=int, default=50, help="Largest page the stub returns (maxResults is capped to it)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for synthetic data and injected failures")
+    parser.add_argument('--record', metavar='DIR', help="Proxy requests to --upstream and save the responses in DIR")
+    parser.add_argument('--replay', metavar='DIR', help="Serve responses previously recorded in DIR")
+    parser.add_argument('--upstream', default=UPSTREAM_BASE_URL, help="Real API base URL used when recording")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    options = parser.parse_args(argv)
+    if options.record and options.replay:
+        parser.error("--record and --replay cannot be combined")
+    return options
+
+
+def start_stub_server(argv=None):
+    """
+    Start the stub in a background thread.
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    options = parse_args(argv)
+    fixtures = FixtureStore(options.record or options.replay) if (options.record or options.replay) else None
+    data = SyntheticYouTube(options.channels, options.videos_per_channel, options.page_size, options.seed)
+    server = ThreadingHTTPServer((options.host, options.port), make_handler(options, data, fixtures))
+    server.daemon_threads = True
+    server.options = options
+    threading.Thread(target=server.serve_forever, name='youtube-api-stub', daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main(argv=None):
+    server, base_url = start_stub_server(argv)
+    options = server.options
+    mode = 'record' if options.record else 'replay' if options.replay else 'synthetic'
+    print(f"YouTube API stub ({mode}) listening on {base_url}")
+    print(f"Run the dashboard against it with YOUTUBE_API_BASE_URL={base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
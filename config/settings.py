@@ -1,5 +1,6 @@
 import os 
 API_KEY =  os.getenv('API') # get from env
+API_BASE_URL = os.getenv('YOUTUBE_API_BASE_URL', 'https://www.googleapis.com/youtube/v3')  # Point at a local stand-in for offline runs
 CHANNEL_IDS = [
     "UCMiJRAwDNSNzuYeN2uWa0pA",  # Mrwhosetheboss
     "UCBJycsmduvYEL83R_U4JriQ",  # Marques Brownlee
@@ -16,5 +17,38 @@ CHANNEL_COLORS = {
     "Austin Evans": "#800080",
     "Unbox Therapy": "#008080",
 }
-CSV_FILE_PATH = "data/videos.csv"
-UPDATE_INTERVAL = 60  # Time in seconds to check for new videos
\ No newline at end of file
+CSV_FILE_PATH = "data/videos.csv"  # Legacy CSV, imported into the store on first use
+UPDATE_INTERVAL = 60  # Time in seconds to check for new videos
+MAX_CONCURRENT_REQUESTS = 4  # Maximum number of YouTube API requests in flight at once
+HTTP_POOL_SIZE = 10  # Connections kept alive per host in the shared HTTP session
+HTTP_MAX_RETRIES = 4  # Retries for connection errors, 429 and 5xx responses
+HTTP_BACKOFF_BASE = 0.5  # Base delay in seconds for exponential backoff
+HTTP_BACKOFF_MAX = 30  # Upper bound in seconds for a single backoff delay
+HTTP_TIMEOUT = 30  # Timeout in seconds for a single HTTP request
+FETCH_ENGINE = os.getenv('FETCH_ENGINE', 'search')  # "search" (search.list) or "uploads" (channel uploads playlists)
+UPLOADS_PLAYLIST_CACHE_PATH = "data/uploads_playlists.json"  # Cache of channel ID -> uploads playlist ID
+FETCH_STATE_PATH = "data/fetch_state.json"  # Per-channel watermarks for incremental fetching
+CHANNEL_REFETCH_INTERVAL = 3600  # Minimum time in seconds between two fetches of the same channel
+HTTP_CACHE_PATH = "data/http_cache.sqlite"  # On-disk cache of videos.list responses
+HTTP_CACHE_TTL = 600  # Seconds a cached response is served without revalidating it
+HTTP_CACHE_MAX_BYTES = 50 * 1024 * 1024  # Size limit of the response cache, least recently used entries are evicted
+PIPELINE_QUEUE_DEPTH = 20  # Search pages that may wait for enrichment before fetching pauses
+PIPELINE_FLUSH_SIZE = 500  # Enriched videos written to the store at once during a streaming ingest
+# Stats refresh interval by video age, as (maximum age in seconds, refresh interval in seconds).
+# The last tier (maximum age None) applies to everything older.
+STATS_REFRESH_TIERS = [
+    (48 * 3600, 3600),  # First 48 hours: hourly
+    (30 * 86400, 86400),  # First month: daily
+    (None, 7 * 86400),  # After that: weekly
+]
+STATS_REFRESH_QUOTA = 100  # Quota units (videos.list calls of 50 IDs) a scheduled stats refresh may spend
+INGEST_LOCK_PATH = "data/ingest.lock"  # Held while an ingest runs, so only one runs at a time
+INGEST_STATUS_PATH = "data/ingest_status.json"  # Written by the ingestion worker, read by the dashboard
+STORE_PATH = os.getenv('STORE_PATH', "data/videos.sqlite")  # Video store: a .sqlite database (indexed upserts) or a .parquet file
+LEGACY_STORE_PATHS = ["data/videos.parquet", CSV_FILE_PATH]  # Imported into a new store by the first migration or ingest, first match wins
+HISTORY_PATH = "data/history"  # Append-only log of views/likes snapshots, one date=YYYY-MM-DD directory per day
+HISTORY_DOWNSAMPLE = [(2 * 86400, 'h'), (30 * 86400, 'D'), (180 * 86400, 'W')]  # (age in seconds, resolution): older snapshots are compacted to one per video and period
+MIGRATION_CHUNK_SIZE = 100_000  # Rows read, migrated and written at a time by utils/migrations.py
+SHORTS_THRESHOLD = 60  # Videos of at most this many seconds count as shorts
+MEMO_MAX_ENTRIES = 64  # Filter combinations whose results and figures the dashboards keep (utils/memo.py)
+MEMO_MAX_BYTES = 512 * 1024 * 1024  # Memory the memoized results may take, least recently used are dropped first
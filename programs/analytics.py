@@ -3,8 +3,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from config.settings import CSV_FILE_PATH, CHANNEL_COLORS
-from utils.data_processor import convert_date_str
+from config.settings import CHANNEL_COLORS, SHORTS_THRESHOLD
+from utils.dataset import load_dataset, load_weekly_stats, load_descriptions, filter_videos, default_filters, filter_date_bounds, filter_state_key, thumbnail_url
+from utils.store import summarize_frame, day_bounds
+from utils.weekly_stats import weekly_views, dense_weekly, week_starts
+from utils.memo import memoize
 
 # Add this function at the top of your file:
 
@@ -17,11 +20,11 @@ def display_weekly_videos(df, week_data):
     year = int(year)
     week_num = int(week_num)
     
-    # Filter videos for this week
-    week_videos = df[
-        (df['published_at'].dt.isocalendar().year == year) & 
-        (df['published_at'].dt.isocalendar().week == week_num)
-    ].sort_values('views', ascending=False)
+    # Filter videos for this week, from its Monday to the next (by binary search in the sorted dataset)
+    week_start = week_starts(pd.Series([year]), pd.Series([week_num])).iloc[0]
+    week_videos = filter_videos(
+        df, start=week_start, end=week_start + pd.Timedelta(days=7)
+    ).sort_values('views', ascending=False)
     
     if week_videos.empty:
         st.warning(f"No videos found for week {year_week}")
@@ -32,6 +35,8 @@ def display_weekly_videos(df, week_data):
     
     # Format the data for display
     display_df = week_videos.copy()
+    # Only the shown videos' descriptions are read from the store
+    descriptions = load_descriptions(display_df['video_id'].dropna())
     display_df['published_at'] = display_df['published_at'].dt.strftime('%Y-%m-%d')
     display_df['views'] = display_df['views'].apply(lambda x: f"{int(x):,}".replace(',', 'X').replace('.', ',').replace('X', '.'))
     if 'likes' in display_df.columns:
@@ -42,9 +47,9 @@ def display_weekly_videos(df, week_data):
         col1, col2 = st.columns([1, 3])
         
         with col1:
-            if 'thumbnail_url' in row and pd.notna(row['thumbnail_url']):
+            if pd.notna(row['video_id']):
                 try:
-                    st.image(row['thumbnail_url'], width=200)
+                    st.image(thumbnail_url(row['video_id']), width=200)
                 except:
                     st.write("No thumbnail")
         
@@ -54,48 +59,56 @@ def display_weekly_videos(df, week_data):
             minutes = int(row['duration_seconds'] // 60)
             seconds = int(row['duration_seconds'] % 60)
             st.write(f"Published: {row['published_at']} (•) Views: {row['views']} (•)  Duration: {minutes}:{seconds:02d}")
+            description = descriptions.get(row['video_id'])
+            if isinstance(description, str) and description.strip():
+                with st.expander("Description"):
+                    st.text(description)
 
 
-def show_analytics():
-    st.title("Advanced YouTube Analytics")
-    
-    # Load data
-    try:
-        df = pd.read_csv(CSV_FILE_PATH)
-        if df.empty:
-            st.warning("No data available. Please generate YouTube data first.")
-            return
-    except FileNotFoundError:
-        st.error("Data file not found. Please generate YouTube data first.")
-        return
-    
-    # Check if required columns exist
-    required_columns = ['video_id', 'video_title', 'channel_title', 'published_at', 'views']
-    missing_columns = [col for col in required_columns if col not in df.columns]
+@st.fragment
+def weekly_videos_panel(filtered_df, all_weeks):
+    """
+    Week selector and the videos of the chosen week, run as a fragment: choosing a week
+    only reruns this panel, not the page.
+    """
+    if 'selected_week' not in st.session_state:
+        st.session_state['selected_week'] = None
     
-    if missing_columns:
-        st.error(f"Missing required columns in data: {', '.join(missing_columns)}")
-        return
+    # Add a clickable week selector as a backup method
+    st.subheader("Select a week to view videos:")
+    selected_week = st.selectbox("Choose week:", all_weeks, index=0 if all_weeks else None)
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("View Videos for Selected Week"):
+            st.session_state['selected_week'] = selected_week
+    with col2:
+        if st.button("Clear Selected Week"):
+            st.session_state['selected_week'] = None
 
-    # Convert published_at to datetime and ensure it's timezone aware
-    df['published_at'] = df['published_at'].apply(convert_date_str)
-    df['published_at'] = pd.to_datetime(df['published_at'], errors='coerce', utc=True)
+    # Create a container for weekly videos
+    weekly_videos_container = st.container()
 
-    # Handle NaT values if any conversion failed
-    df = df.dropna(subset=['published_at'])
-    
-    # Apply short video filter if enabled
-    if st.session_state.get('filter_short_videos', False) and 'duration_seconds' in df.columns:
-        original_count = len(df)
-        df = df[df['duration_seconds'] >= 61]
-        filtered_count = len(df)
+    # Display videos for the selected week
+    if st.session_state['selected_week']:
+        week_data = {
+            'points': [{'x': st.session_state['selected_week']}]
+        }
+        with weekly_videos_container:
+            display_weekly_videos(filtered_df, week_data)
 
-    
+
+@st.fragment
+def analytics_filters(summary):
+    """
+    Sidebar filters of show_analytics, run as a fragment: editing them (e.g. the first click of
+    a date range) only reruns the sidebar. The page is rerun once the applied channels or dates
+    change, which are kept in st.session_state['analytics_filters'].
+    """
     # Add filters
-    st.sidebar.header("Filters")
+    st.header("Filters")
     
     # YouTuber filter
-    youtubers = sorted(df['channel_title'].unique())
+    youtubers = summary['channel_titles']
     
 
     
@@ -109,7 +122,7 @@ def show_analytics():
         st.markdown(f"<style>{rules}</style>", unsafe_allow_html=True)
     
 
-    selected_youtubers = st.sidebar.multiselect(
+    selected_youtubers = st.multiselect(
         "Select YouTubers",
         options=youtubers,
         default=youtubers[:3] if len(youtubers) > 3 else youtubers
@@ -121,19 +134,8 @@ def show_analytics():
         selected_youtubers = youtubers
     # Date range filter - Fix for the validation error
     try:
-        min_date = df['published_at'].min().date()
-        max_date = df['published_at'].max().date()
-        
-        # Ensure we have valid dates
-        if pd.isna(min_date) or pd.isna(max_date):
-            min_date = datetime.now().date() - timedelta(days=365)
-            max_date = datetime.now().date()
-        
-        # Ensure min_date is not greater than max_date
-        if min_date > max_date:
-            temp = min_date
-            min_date = max_date
-            max_date = temp
+        # Valid dates, earliest first (the same bounds default_filters uses)
+        min_date, max_date = filter_date_bounds(summary)
             
         default_range = (min_date, max_date)
         
@@ -148,12 +150,12 @@ def show_analytics():
                 st.session_state['date_range'] = default_range
         
         # Add button to reset date range
-        if st.sidebar.button("Reset to Full Date Range"):
+        if st.button("Reset to Full Date Range"):
             st.session_state['date_range'] = default_range
             st.rerun()  # Force rerun to update UI immediately
         
         # Always show date input with current value from session state
-        date_input = st.sidebar.date_input(
+        date_input = st.date_input(
             "Date Range",
             value=st.session_state['date_range'],
             min_value=min_date,
@@ -173,7 +175,7 @@ def show_analytics():
             # If date calculation fails, use a safe default range
             today = datetime.now().date()
             one_year_ago = today - timedelta(days=365)
-            date_input = st.sidebar.date_input(
+            date_input = st.date_input(
                 "Date Range",
                 value=(one_year_ago, today)
             )
@@ -181,225 +183,222 @@ def show_analytics():
             st.error(f"Could not create date input: {e2}")
             date_input = []
     
-    # Filter data based on selections
-    filtered_df = df[df['channel_title'].isin(selected_youtubers)].copy()  # Create a copy to avoid SettingWithCopyWarning
-    
+    # A range being picked has only its first day so far, the applied range stays
+    previous = st.session_state.get('analytics_filters')
     if len(date_input) == 2:
+        date_range = tuple(date_input)
+    else:
+        date_range = previous[1] if previous else None
+    
+    applied = (list(selected_youtubers), date_range)
+    if applied != previous:
+        st.session_state['analytics_filters'] = applied
+        st.rerun()
+
+
+def show_analytics():
+    st.title("Advanced YouTube Analytics")
+    
+    # Shorts can be left out in the store query
+    min_duration_seconds = SHORTS_THRESHOLD + 1 if st.session_state.get('filter_short_videos', False) else None
+
+    # Shared cached dataset, reruns do not touch the store
+    try:
+        df = filter_videos(load_dataset(), min_duration_seconds=min_duration_seconds)
+        summary = summarize_frame(df)
+        if summary['videos'] == 0:
+            st.warning("No data available. Please generate YouTube data first.")
+            return
+    except OSError:
+        st.error("Data file not found. Please generate YouTube data first.")
+        return
+    
+    # Add filters
+    if 'analytics_filters' not in st.session_state:
+        # Applied before the sidebar runs, so a first visit renders the page once
+        st.session_state['analytics_filters'] = default_filters(summary, st.session_state.get('date_range'))
+    with st.sidebar:
+        analytics_filters(summary)
+    selected_youtubers, date_range = st.session_state['analytics_filters']
+    
+    # Filter data based on selections
+    start, end = None, None
+    if date_range:
         try:
-            start_date, end_date = date_input
-            filtered_df = filtered_df[
-                (filtered_df['published_at'].dt.date >= start_date) & 
-                (filtered_df['published_at'].dt.date <= end_date)
-            ]
+            start, end = day_bounds(*date_range)
         except Exception as e:
             st.error(f"Error applying date filter: {e}")
     
+    # Rows, tables and figures are memoized per filter state: reruns that keep the filters
+    # (like choosing a week below) render them without recomputing
+    view = memoize(
+        filter_state_key('analytics', selected_youtubers, start, end, min_duration_seconds),
+        lambda: build_analytics_view(df, selected_youtubers, start, end, min_duration_seconds)
+    )
+    filtered_df = view['filtered_df']
+    
     if filtered_df.empty:
         st.warning("No data available for the selected filters.")
         return
     
-    # Create a color map for the currently selected YouTubers
-    color_discrete_map = {}
-    for channel in selected_youtubers:
-        color_discrete_map[channel] = CHANNEL_COLORS.get(channel, "#808080")  # Default to gray if not found
-    
     # Display analytics
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Channel Comparison")
-        channel_stats = filtered_df.groupby('channel_title').agg(
-            total_videos=('video_id', 'count'),
-            avg_views=('views', 'mean'),
-            total_views=('views', 'sum')
-        ).reset_index()
-        
-        # Format numbers for better display
-        channel_stats['avg_views'] = channel_stats['avg_views'].round(0).astype(int)
-        
-        # Sort by total views for better visualization
-        channel_stats = channel_stats.sort_values('total_views', ascending=False)
-        
-        fig1 = px.bar(
-            channel_stats, 
-            x='channel_title', 
-            y='total_views',
-            color='channel_title',
-            title="Total Views by Channel",
-            color_discrete_map=color_discrete_map,
-            text='total_views'  # Show values on bars
-        )
-        
-        # Improve layout
-        fig1.update_layout(
-            xaxis_title="Channel",
-            yaxis_title="Total Views",
-            legend_title="Channel",
-            uniformtext_minsize=10,
-            uniformtext_mode='hide',
-            yaxis=dict(tickformat=',d'),  # Format y-axis with comma as thousand separator
-        )
-        
-        # Format the text on bars to show millions/thousands
-        fig1.update_traces(
-            texttemplate='%{text:,.0f}',
-            textposition='outside'
-        )
-        
-        st.plotly_chart(fig1, use_container_width=True)
-        
-        # Format numbers for display in the dataframe
-        display_stats = channel_stats.copy()
-        display_stats['total_views'] = display_stats['total_views'].apply(lambda x: f"{int(x):,}".replace(',', 'X').replace('.', ',').replace('X', '.'))
-        display_stats['avg_views'] = display_stats['avg_views'].apply(lambda x: f"{int(x):,}".replace(',', 'X').replace('.', ',').replace('X', '.'))
-        
-        st.dataframe(display_stats)
-            # Format the published_at column for better display
-        display_top = filtered_df.sort_values('views', ascending=False).head(10).copy()
-        display_top['published_at'] = display_top['published_at'].dt.strftime('%Y-%m-%d')
-        display_top['views'] = display_top['views'].apply(lambda x: f"{int(x):,}".replace(',', 'X').replace('.', ',').replace('X', '.'))
+        st.plotly_chart(view['fig1'], use_container_width=True)
+        st.dataframe(view['display_stats'])
         
         # Display as table
-        st.dataframe(
-            display_top[['video_title', 'channel_title', 'published_at', 'views']]
-        )
+        st.dataframe(view['display_top'])
 
     with col2:
         st.subheader("Performance Trends")
-        # Process date information for visualization
-        processed_df = filtered_df.copy()  # Create another copy for further processing
-        
-        # Create a numeric representation of year-week for proper sorting
-        processed_df['year_week_num'] = processed_df['published_at'].dt.year * 100 + processed_df['published_at'].dt.isocalendar().week
-        
-        # Create the display version of year-week
-        processed_df['week'] = processed_df['published_at'].dt.isocalendar().week
-        processed_df['year'] = processed_df['published_at'].dt.year
-        processed_df['year_week'] = processed_df['year'].astype(str) + "-W" + processed_df['week'].astype(str).str.zfill(2)
-        
-        # Sort by date for proper chronological order
-        processed_df = processed_df.sort_values('year_week_num')
-        
-        # Group by week and channel
-        weekly_data = processed_df.groupby(['year_week', 'year_week_num', 'channel_title']).agg(
-            avg_views=('views', 'mean')
-        ).reset_index()
-        
-        # Round average views to integers
-        weekly_data['avg_views'] = weekly_data['avg_views'].round(0).astype(int)
-        
-        # Ensure chronological order of weeks by sorting
-        weekly_data = weekly_data.sort_values('year_week_num')
-        
-        # Get list of all youtubers
-        all_channels = filtered_df['channel_title'].unique()
-        
-        # Get list of all year-weeks in order
-        all_year_weeks = weekly_data[['year_week', 'year_week_num']].drop_duplicates().sort_values('year_week_num')
-        all_weeks = all_year_weeks['year_week'].tolist()
-        
-        # Create a complete grid of all channel/week combinations
-        complete_grid = []
-        for channel in all_channels:
-            for i, week in enumerate(all_weeks):
-                week_num = all_year_weeks.iloc[i]['year_week_num']
-                complete_grid.append({
-                    'year_week': week,
-                    'year_week_num': week_num,
-                    'channel_title': channel
-                })
-        
-        # Convert to dataframe and merge with actual data
-        complete_df = pd.DataFrame(complete_grid)
-        weekly_data = pd.merge(
-            complete_df, 
-            weekly_data, 
-            on=['year_week', 'year_week_num', 'channel_title'],
-            how='left'
-        )
-        
-        # Fill missing values with 0
-        weekly_data['avg_views'] = weekly_data['avg_views'].fillna(0)
-        
-        # Sort by year_week_num to ensure proper chronological order
-        weekly_data = weekly_data.sort_values(['channel_title', 'year_week_num'])
-        
-        # Use graph_objects for more control over the visualization
-        fig2 = go.Figure()
-        
-        # Add a line for each channel
-        for channel in all_channels:
-            channel_data = weekly_data[weekly_data['channel_title'] == channel]
-            
-            # Only add the channel if it has data
-            if not channel_data.empty and channel_data['avg_views'].sum() > 0:
-                # Use the channel color from the color map
-                color = color_discrete_map.get(channel, "#808080")
-                
-                fig2.add_trace(go.Scatter(
-                    x=channel_data['year_week'],
-                    y=channel_data['avg_views'],
-                    mode='lines+markers',
-                    name=channel,
-                    line=dict(color=color, width=2),
-                    marker=dict(color=color, size=6),
-                    connectgaps=True,  # Connect across weeks with no data
-                    hovertemplate="<b>%{x}</b><br>" +
-                                "Channel: " + channel + "<br>" +
-                                "Avg Views: %{y:,.0f}<br>" +
-                                "<extra></extra>"  # Hide trace name in hover
-                ))
-        
-        if 'selected_week' not in st.session_state:
-            st.session_state['selected_week'] = None
-
-        # Add custom events to the figure
-        fig2.update_layout(
-            title='Average Views per Week (Click on a week to see videos)',
-            xaxis_title='Week',
-            yaxis_title='Average Views',
-            legend_title='Channel',
-            hovermode='closest',  # Changed to closest for better click interaction
-            xaxis=dict(
-                tickmode='array',
-                # Show fewer ticks for readability
-                tickvals=all_weeks[::max(1, len(all_weeks) // 10)],
-                # Ensure the order matches the numeric order
-                categoryorder='array',
-                categoryarray=all_weeks
-            ),
-            yaxis=dict(tickformat=',d'),  # Format y-axis with comma as thousand separator
-            clickmode='event+select'  # Enable click events
-        )
+        all_weeks = view['all_weeks']
         
         # Display the chart
-        st.plotly_chart(fig2, use_container_width=True)
-        
-        # Add a clickable week selector as a backup method
-        st.subheader("Select a week to view videos:")
-        selected_week = st.selectbox("Choose week:", all_weeks, index=0 if all_weeks else None)
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("View Videos for Selected Week"):
-                st.session_state['selected_week'] = selected_week
-        with col2:
-            if st.button("Clear Selected Week"):
-                st.session_state['selected_week'] = None
-        
-        # Create a container for weekly videos
-        weekly_videos_container = st.container()
+        st.plotly_chart(view['fig2'], use_container_width=True)
         
-        # Display videos for the selected week
-        if st.session_state['selected_week']:
-            week_data = {
-                'points': [{'x': st.session_state['selected_week']}]
-            }
-            with weekly_videos_container:
-                display_weekly_videos(filtered_df, week_data)
+        weekly_videos_panel(filtered_df, all_weeks)
         
     # Top videos with consistent channel coloring
     st.subheader("Top Videos")
+    st.plotly_chart(view['fig3'], use_container_width=True)
+    
+    # Additional visualization: Views distribution by channel
+    st.subheader("Views Distribution by Channel")
+    st.plotly_chart(view['fig4'], use_container_width=True)
+    st.container()
+
+
+def build_analytics_view(df, selected_youtubers, start, end, min_duration_seconds):
+    """
+    Compute what show_analytics displays for a filter state: the filtered videos, the channel
+    and top-10 tables and the four figures (as plotly dicts). Makes no Streamlit calls, so the
+    result can be memoized and shared.
+    """
+    filtered_df = filter_videos(df, channel_titles=selected_youtubers, start=start, end=end)
+    if filtered_df.empty:
+        return {'filtered_df': filtered_df}
+    
+    # Create a color map for the currently selected YouTubers
+    color_discrete_map = {}
+    for channel in selected_youtubers:
+        color_discrete_map[channel] = CHANNEL_COLORS.get(channel, "#808080")  # Default to gray if not found
+    
+    channel_stats = filtered_df.groupby('channel_title', observed=True).agg(
+        total_videos=('video_id', 'count'),
+        avg_views=('views', 'mean'),
+        total_views=('views', 'sum')
+    ).reset_index()
+    
+    # Format numbers for better display
+    channel_stats['avg_views'] = channel_stats['avg_views'].round(0).astype(int)
+    
+    # Sort by total views for better visualization
+    channel_stats = channel_stats.sort_values('total_views', ascending=False)
+    
+    fig1 = px.bar(
+        channel_stats, 
+        x='channel_title', 
+        y='total_views',
+        color='channel_title',
+        title="Total Views by Channel",
+        color_discrete_map=color_discrete_map,
+        text='total_views'  # Show values on bars
+    )
+    
+    # Improve layout
+    fig1.update_layout(
+        xaxis_title="Channel",
+        yaxis_title="Total Views",
+        legend_title="Channel",
+        uniformtext_minsize=10,
+        uniformtext_mode='hide',
+        yaxis=dict(tickformat=',d'),  # Format y-axis with comma as thousand separator
+    )
+    
+    # Format the text on bars to show millions/thousands
+    fig1.update_traces(
+        texttemplate='%{text:,.0f}',
+        textposition='outside'
+    )
+    
+    # Format numbers for display in the dataframe
+    display_stats = channel_stats.copy()
+    display_stats['total_views'] = display_stats['total_views'].apply(lambda x: f"{int(x):,}".replace(',', 'X').replace('.', ',').replace('X', '.'))
+    display_stats['avg_views'] = display_stats['avg_views'].apply(lambda x: f"{int(x):,}".replace(',', 'X').replace('.', ',').replace('X', '.'))
+    
+    # Format the published_at column for better display
     top_videos = filtered_df.sort_values('views', ascending=False).head(10)
+    display_top = top_videos.copy()
+    display_top['published_at'] = display_top['published_at'].dt.strftime('%Y-%m-%d')
+    display_top['views'] = display_top['views'].apply(lambda x: f"{int(x):,}".replace(',', 'X').replace('.', ',').replace('X', '.'))
+    
+    # Average views per week and channel, from the precomputed weekly aggregates
+    weekly_data = weekly_views(
+        load_weekly_stats(),
+        filtered_df,
+        channel_titles=selected_youtubers,
+        start=start,
+        end=end,
+        is_short=False if min_duration_seconds else None
+    )[['year_week', 'year_week_num', 'channel_title', 'avg_views']]
+    
+    # Round average views to integers
+    weekly_data['avg_views'] = weekly_data['avg_views'].round(0).astype(int)
+    
+    # Get list of all youtubers
+    all_channels = filtered_df['channel_title'].unique()
+    
+    # Every channel gets every week of the range, weeks without videos count as 0
+    weekly_data = dense_weekly(weekly_data, all_channels)
+    all_weeks = weekly_data['year_week'].unique().tolist()
+    
+    # Use graph_objects for more control over the visualization
+    fig2 = go.Figure()
+    
+    # Add a line for each channel
+    for channel in all_channels:
+        channel_data = weekly_data[weekly_data['channel_title'] == channel]
+        
+        # Only add the channel if it has data
+        if not channel_data.empty and channel_data['avg_views'].sum() > 0:
+            # Use the channel color from the color map
+            color = color_discrete_map.get(channel, "#808080")
+            
+            fig2.add_trace(go.Scatter(
+                x=channel_data['year_week'],
+                y=channel_data['avg_views'],
+                mode='lines+markers',
+                name=channel,
+                line=dict(color=color, width=2),
+                marker=dict(color=color, size=6),
+                connectgaps=True,  # Connect across weeks with no data
+                hovertemplate="<b>%{x}</b><br>" +
+                            "Channel: " + channel + "<br>" +
+                            "Avg Views: %{y:,.0f}<br>" +
+                            "<extra></extra>"  # Hide trace name in hover
+            ))
+    
+    # Add custom events to the figure
+    fig2.update_layout(
+        title='Average Views per Week (Click on a week to see videos)',
+        xaxis_title='Week',
+        yaxis_title='Average Views',
+        legend_title='Channel',
+        hovermode='closest',  # Changed to closest for better click interaction
+        xaxis=dict(
+            tickmode='array',
+            # Show fewer ticks for readability
+            tickvals=all_weeks[::max(1, len(all_weeks) // 10)],
+            # Ensure the order matches the numeric order
+            categoryorder='array',
+            categoryarray=all_weeks
+        ),
+        yaxis=dict(tickformat=',d'),  # Format y-axis with comma as thousand separator
+        clickmode='event+select'  # Enable click events
+    )
     
     # Create a bar chart for top videos
     fig3 = px.bar(
@@ -428,11 +427,6 @@ def show_analytics():
         textposition='outside'
     )
     
-    st.plotly_chart(fig3, use_container_width=True)
-    
-    # Additional visualization: Views distribution by channel
-    st.subheader("Views Distribution by Channel")
-    
     fig4 = px.box(
         filtered_df,
         x='channel_title',
@@ -450,7 +444,17 @@ def show_analytics():
         yaxis=dict(tickformat=',d')  # Format y-axis with comma as thousand separator
     )
     
-    st.plotly_chart(fig4, use_container_width=True)
-    st.container()
+    return {
+        'filtered_df': filtered_df,
+        'display_stats': display_stats,
+        'display_top': display_top[['video_title', 'channel_title', 'published_at', 'views']],
+        'all_weeks': all_weeks,
+        'fig1': fig1.to_dict(),
+        'fig2': fig2.to_dict(),
+        'fig3': fig3.to_dict(),
+        'fig4': fig4.to_dict(),
+    }
+
+
 if __name__ == "__main__":
     show_analytics()
\ No newline at end of file
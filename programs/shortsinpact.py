@@ -2,8 +2,10 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from config.settings import CSV_FILE_PATH, CHANNEL_COLORS
-from utils.data_processor import convert_date_str
+from config.settings import CHANNEL_COLORS, SHORTS_THRESHOLD
+from utils.dataset import load_dataset, load_weekly_stats, load_descriptions, filter_videos, default_filters, filter_date_bounds, thumbnail_url
+from utils.store import summarize_frame, day_bounds
+from utils.weekly_stats import weekly_views, dense_weekly, week_starts
 import streamlit as st
 
 def display_weekly_videos(df, week_data, is_shorts=False):
@@ -15,11 +17,11 @@ def display_weekly_videos(df, week_data, is_shorts=False):
     year = int(year)
     week_num = int(week_num)
     
-    # Filter videos for this week
-    week_videos = df[
-        (df['published_at'].dt.isocalendar().year == year) & 
-        (df['published_at'].dt.isocalendar().week == week_num)
-    ].sort_values('views', ascending=False)
+    # Filter videos for this week, from its Monday to the next (by binary search in the sorted dataset)
+    week_start = week_starts(pd.Series([year]), pd.Series([week_num])).iloc[0]
+    week_videos = filter_videos(
+        df, start=week_start, end=week_start + pd.Timedelta(days=7)
+    ).sort_values('views', ascending=False)
     
     if week_videos.empty:
         st.warning(f"No videos found for week {year_week}")
@@ -36,6 +38,8 @@ def display_weekly_videos(df, week_data, is_shorts=False):
     
     # Format the data for display
     display_df = week_videos.copy()
+    # Only the shown videos' descriptions are read from the store
+    descriptions = load_descriptions(display_df['video_id'].dropna())
     display_df['published_at'] = display_df['published_at'].dt.strftime('%Y-%m-%d')
     display_df['views'] = display_df['views'].apply(lambda x: f"{int(x):,}")
     if 'likes' in display_df.columns:
@@ -46,9 +50,9 @@ def display_weekly_videos(df, week_data, is_shorts=False):
         col1, col2 = st.columns([1, 3])
         
         with col1:
-            if 'thumbnail_url' in row and pd.notna(row['thumbnail_url']):
+            if pd.notna(row['video_id']):
                 try:
-                    st.image(row['thumbnail_url'], width=200)
+                    st.image(thumbnail_url(row['video_id']), width=200)
                 except:
                     st.write("No thumbnail")
         
@@ -60,65 +64,62 @@ def display_weekly_videos(df, week_data, is_shorts=False):
             st.write(f"Published: {row['published_at']} (•) Views: {row['views']} (•)  Duration: {minutes}:{seconds:02d}")
             if 'likes' in row and pd.notna(row['likes']):
                 st.write(f"Likes: {row['likes']}")
+            description = descriptions.get(row['video_id'])
+            if isinstance(description, str) and description.strip():
+                with st.expander("Description"):
+                    st.text(description)
 
 
-def show_shortsinpact():
-    st.title("Shorts Impact Analysis")
-    
-    # Load data
-    try:
-        df = pd.read_csv(CSV_FILE_PATH)
-        if df.empty:
-            st.warning("No data available. Please generate YouTube data first.")
-            return
-    except FileNotFoundError:
-        st.error("Data file not found. Please generate YouTube data first.")
-        return
-    
-    # Check if required columns exist
-    required_columns = ['video_id', 'video_title', 'channel_title', 'published_at', 'views', 'duration_seconds']
-    missing_columns = [col for col in required_columns if col not in df.columns]
-    
-    if missing_columns:
-        st.error(f"Missing required columns in data: {', '.join(missing_columns)}")
-        return
-    
-    # Convert published_at to datetime and ensure it's timezone aware
-    df['published_at'] = df['published_at'].apply(convert_date_str)
-    df['published_at'] = pd.to_datetime(df['published_at'], errors='coerce', utc=True)
-    
-    # Handle NaT values if any conversion failed
-    df = df.dropna(subset=['published_at'])
-    
-    # Create Short vs Regular filters
-    shorts_threshold = 60  # Threshold in seconds for what counts as a short
-    
-    # Create two datasets
-    df_shorts = df[df['duration_seconds'] <= shorts_threshold].copy()
-    df_regular = df[df['duration_seconds'] > shorts_threshold].copy()
-    
-    # Display summary metrics
-    total_videos = len(df)
-    total_shorts = len(df_shorts)
-    total_regular = len(df_regular)
-    
-    st.subheader("Video Distribution Summary")
-    col1, col2, col3 = st.columns(3)
+@st.fragment
+def weekly_videos_panel(df, weeks, is_shorts):
+    """
+    Week selector and the videos of the chosen week, for the shorts or the regular videos.
+    Run as a fragment: choosing a week only reruns this panel, not the page.
+    """
+    if is_shorts:
+        state_key, videos_label, selector_label = 'selected_shorts_week', "short videos", "Shorts"
+        view_label, clear_label = "View Shorts for Selected Week", "Clear Shorts Week"
+    else:
+        state_key, videos_label, selector_label = 'selected_regular_week', "regular videos", "Regular"
+        view_label, clear_label = "View Regular Videos for Selected Week", "Clear Regular Week"
+    
+    # Week selector
+    st.write(f"#### Select a week to view {videos_label}:")
+    selected_week = st.selectbox(
+        f"Choose week ({selector_label}):", 
+        weeks, 
+        index=0 if weeks else None,
+        key=f"{selector_label.lower()}_week_selector"
+    )
     
+    col1, col2 = st.columns(2)
     with col1:
-        st.metric("Total Videos", f"{total_videos:,}")
-    
+        if st.button(view_label):
+            st.session_state[state_key] = selected_week
     with col2:
-        st.metric("Short Videos (≤60s)", f"{total_shorts:,} ({total_shorts/total_videos*100:.1f}%)")
-    
-    with col3:
-        st.metric("Regular Videos (>60s)", f"{total_regular:,} ({total_regular/total_videos*100:.1f}%)")
+        if st.button(clear_label):
+            st.session_state[state_key] = None
     
+    # Display videos for selected week
+    if st.session_state.get(state_key):
+        week_data = {
+            'points': [{'x': st.session_state[state_key]}]
+        }
+        display_weekly_videos(df, week_data, is_shorts=is_shorts)
+
+
+@st.fragment
+def shortsinpact_filters(summary):
+    """
+    Sidebar filters of show_shortsinpact, run as a fragment: editing them (e.g. the first click
+    of a date range) only reruns the sidebar. The page is rerun once the applied channels or
+    dates change, which are kept in st.session_state['shorts_filters'].
+    """
     # Add filters
-    st.sidebar.header("Filters")
+    st.header("Filters")
     
     # YouTuber filter
-    youtubers = sorted(df['channel_title'].unique())
+    youtubers = summary['channel_titles']
     
     def colorize_multiselect_options(colors: list[str]) -> None:
         rules = ""
@@ -129,7 +130,7 @@ def show_shortsinpact():
 
         st.markdown(f"<style>{rules}</style>", unsafe_allow_html=True)
     
-    selected_youtubers = st.sidebar.multiselect(
+    selected_youtubers = st.multiselect(
         "Select YouTubers",
         options=youtubers,
         default=youtubers[:3] if len(youtubers) > 3 else youtubers
@@ -143,19 +144,8 @@ def show_shortsinpact():
     
     # Date range filter
     try:
-        min_date = df['published_at'].min().date()
-        max_date = df['published_at'].max().date()
-        
-        # Ensure we have valid dates
-        if pd.isna(min_date) or pd.isna(max_date):
-            min_date = datetime.now().date() - timedelta(days=365)
-            max_date = datetime.now().date()
-        
-        # Ensure min_date is not greater than max_date
-        if min_date > max_date:
-            temp = min_date
-            min_date = max_date
-            max_date = temp
+        # Valid dates, earliest first (the same bounds default_filters uses)
+        min_date, max_date = filter_date_bounds(summary)
             
         default_range = (min_date, max_date)
         
@@ -170,12 +160,12 @@ def show_shortsinpact():
                 st.session_state['shorts_date_range'] = default_range
         
         # Add button to reset date range
-        if st.sidebar.button("Reset to Full Date Range"):
+        if st.button("Reset to Full Date Range"):
             st.session_state['shorts_date_range'] = default_range
             st.rerun()  # Force rerun to update UI immediately
         
         # Always show date input with current value from session state
-        date_input = st.sidebar.date_input(
+        date_input = st.date_input(
             "Date Range",
             value=st.session_state['shorts_date_range'],
             min_value=min_date,
@@ -192,24 +182,75 @@ def show_shortsinpact():
         st.error(f"Error setting up date filter: {e}")
         date_input = []
     
-    # Filter data based on selections
-    filtered_shorts = df_shorts[df_shorts['channel_title'].isin(selected_youtubers)].copy()
-    filtered_regular = df_regular[df_regular['channel_title'].isin(selected_youtubers)].copy()
-    
+    # A range being picked has only its first day so far, the applied range stays
+    previous = st.session_state.get('shorts_filters')
     if len(date_input) == 2:
+        date_range = tuple(date_input)
+    else:
+        date_range = previous[1] if previous else None
+    
+    applied = (list(selected_youtubers), date_range)
+    if applied != previous:
+        st.session_state['shorts_filters'] = applied
+        st.rerun()
+
+
+def show_shortsinpact():
+    st.title("Shorts Impact Analysis")
+    
+    # Create Short vs Regular filters
+    shorts_threshold = SHORTS_THRESHOLD  # Threshold in seconds for what counts as a short
+    
+    # Shared cached dataset, reruns do not touch the store
+    try:
+        df = load_dataset()
+        summary = summarize_frame(df, shorts_threshold)
+        if summary['videos'] == 0:
+            st.warning("No data available. Please generate YouTube data first.")
+            return
+    except OSError:
+        st.error("Data file not found. Please generate YouTube data first.")
+        return
+    
+    # Display summary metrics
+    total_videos = summary['videos']
+    total_shorts = summary['shorts']
+    total_regular = summary['regular']
+    
+    st.subheader("Video Distribution Summary")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Total Videos", f"{total_videos:,}")
+    
+    with col2:
+        st.metric("Short Videos (≤60s)", f"{total_shorts:,} ({total_shorts/total_videos*100:.1f}%)")
+    
+    with col3:
+        st.metric("Regular Videos (>60s)", f"{total_regular:,} ({total_regular/total_videos*100:.1f}%)")
+    
+    # Add filters
+    if 'shorts_filters' not in st.session_state:
+        # Applied before the sidebar runs, so a first visit renders the page once
+        st.session_state['shorts_filters'] = default_filters(summary, st.session_state.get('shorts_date_range'))
+    with st.sidebar:
+        shortsinpact_filters(summary)
+    selected_youtubers, date_range = st.session_state['shorts_filters']
+    
+    # Filter data based on selections
+    start, end = None, None
+    if date_range:
         try:
-            start_date, end_date = date_input
-            filtered_shorts = filtered_shorts[
-                (filtered_shorts['published_at'].dt.date >= start_date) & 
-                (filtered_shorts['published_at'].dt.date <= end_date)
-            ]
-            filtered_regular = filtered_regular[
-                (filtered_regular['published_at'].dt.date >= start_date) & 
-                (filtered_regular['published_at'].dt.date <= end_date)
-            ]
+            start, end = day_bounds(*date_range)
         except Exception as e:
             st.error(f"Error applying date filter: {e}")
     
+    df = filter_videos(df, channel_titles=selected_youtubers, start=start, end=end)
+    
+    # Split into shorts and regular videos
+    filtered_shorts = df[df['duration_seconds'] <= shorts_threshold].copy()
+    filtered_regular = df[df['duration_seconds'] > shorts_threshold].copy()
+    
     if filtered_shorts.empty and filtered_regular.empty:
         st.warning("No data available for the selected filters.")
         return
@@ -224,14 +265,14 @@ def show_shortsinpact():
     col1, col2 = st.columns(2)
     
     # Process data for shorts
-    shorts_stats = filtered_shorts.groupby('channel_title').agg(
+    shorts_stats = filtered_shorts.groupby('channel_title', observed=True).agg(
         total_videos=('video_id', 'count'),
         avg_views=('views', 'mean'),
         total_views=('views', 'sum')
     ).reset_index()
     
     # Process data for regular videos
-    regular_stats = filtered_regular.groupby('channel_title').agg(
+    regular_stats = filtered_regular.groupby('channel_title', observed=True).agg(
         total_videos=('video_id', 'count'),
         avg_views=('views', 'mean'),
         total_views=('views', 'sum')
@@ -343,53 +384,30 @@ def show_shortsinpact():
     if 'selected_regular_week' not in st.session_state:
         st.session_state['selected_regular_week'] = None
     
+    weekly_stats = load_weekly_stats()
     col1, col2 = st.columns(2)
     
     with col1:
         # Process shorts data for weekly visualization
         if not filtered_shorts.empty:
-            processed_shorts = filtered_shorts.copy()
-            processed_shorts['year_week_num'] = processed_shorts['published_at'].dt.year * 100 + processed_shorts['published_at'].dt.isocalendar().week
-            processed_shorts['week'] = processed_shorts['published_at'].dt.isocalendar().week
-            processed_shorts['year'] = processed_shorts['published_at'].dt.year
-            processed_shorts['year_week'] = processed_shorts['year'].astype(str) + "-W" + processed_shorts['week'].astype(str).str.zfill(2)
-            
-            # Group by week and channel
-            weekly_shorts = processed_shorts.groupby(['year_week', 'year_week_num', 'channel_title']).agg(
-                avg_views=('views', 'mean')
-            ).reset_index()
+            # Average views per week and channel, from the precomputed weekly aggregates
+            weekly_shorts = weekly_views(
+                weekly_stats,
+                filtered_shorts,
+                channel_titles=selected_youtubers,
+                start=start,
+                end=end,
+                is_short=True
+            )[['year_week', 'year_week_num', 'channel_title', 'avg_views']]
             
             if not weekly_shorts.empty:
                 # Prepare data for visualization
                 weekly_shorts['avg_views'] = weekly_shorts['avg_views'].round(0).astype(int)
-                weekly_shorts = weekly_shorts.sort_values('year_week_num')
                 
-                # Get list of youtubers and weeks
+                # Every channel gets every week of the range, weeks without videos count as 0
                 shorts_channels = filtered_shorts['channel_title'].unique()
-                all_shorts_weeks = weekly_shorts[['year_week', 'year_week_num']].drop_duplicates().sort_values('year_week_num')
-                shorts_weeks = all_shorts_weeks['year_week'].tolist()
-                
-                # Create complete grid for all combinations
-                complete_grid = []
-                for channel in shorts_channels:
-                    for i, week in enumerate(shorts_weeks):
-                        week_num = all_shorts_weeks.iloc[i]['year_week_num']
-                        complete_grid.append({
-                            'year_week': week,
-                            'year_week_num': week_num,
-                            'channel_title': channel
-                        })
-                
-                # Merge and fill missing values
-                complete_df = pd.DataFrame(complete_grid)
-                weekly_shorts = pd.merge(
-                    complete_df, 
-                    weekly_shorts, 
-                    on=['year_week', 'year_week_num', 'channel_title'],
-                    how='left'
-                )
-                weekly_shorts['avg_views'] = weekly_shorts['avg_views'].fillna(0)
-                weekly_shorts = weekly_shorts.sort_values(['channel_title', 'year_week_num'])
+                weekly_shorts = dense_weekly(weekly_shorts, shorts_channels)
+                shorts_weeks = weekly_shorts['year_week'].unique().tolist()
                 
                 # Create figure for shorts
                 fig_shorts_weekly = go.Figure()
@@ -433,29 +451,7 @@ def show_shortsinpact():
                 
                 st.plotly_chart(fig_shorts_weekly, use_container_width=True)
                 
-                # Week selector for shorts
-                st.write("#### Select a week to view short videos:")
-                selected_shorts_week = st.selectbox(
-                    "Choose week (Shorts):", 
-                    shorts_weeks, 
-                    index=0 if shorts_weeks else None,
-                    key="shorts_week_selector"
-                )
-                
-                col1a, col2a = st.columns(2)
-                with col1a:
-                    if st.button("View Shorts for Selected Week"):
-                        st.session_state['selected_shorts_week'] = selected_shorts_week
-                with col2a:
-                    if st.button("Clear Shorts Week"):
-                        st.session_state['selected_shorts_week'] = None
-                
-                # Display shorts for selected week
-                if st.session_state['selected_shorts_week']:
-                    week_data = {
-                        'points': [{'x': st.session_state['selected_shorts_week']}]
-                    }
-                    display_weekly_videos(filtered_shorts, week_data, is_shorts=True)
+                weekly_videos_panel(filtered_shorts, shorts_weeks, is_shorts=True)
             else:
                 st.info("Not enough weekly data to visualize shorts performance.")
         else:
@@ -464,48 +460,24 @@ def show_shortsinpact():
     with col2:
         # Process regular videos data for weekly visualization
         if not filtered_regular.empty:
-            processed_regular = filtered_regular.copy()
-            processed_regular['year_week_num'] = processed_regular['published_at'].dt.year * 100 + processed_regular['published_at'].dt.isocalendar().week
-            processed_regular['week'] = processed_regular['published_at'].dt.isocalendar().week
-            processed_regular['year'] = processed_regular['published_at'].dt.year
-            processed_regular['year_week'] = processed_regular['year'].astype(str) + "-W" + processed_regular['week'].astype(str).str.zfill(2)
-            
-            # Group by week and channel
-            weekly_regular = processed_regular.groupby(['year_week', 'year_week_num', 'channel_title']).agg(
-                avg_views=('views', 'mean')
-            ).reset_index()
+            # Average views per week and channel, from the precomputed weekly aggregates
+            weekly_regular = weekly_views(
+                weekly_stats,
+                filtered_regular,
+                channel_titles=selected_youtubers,
+                start=start,
+                end=end,
+                is_short=False
+            )[['year_week', 'year_week_num', 'channel_title', 'avg_views']]
             
             if not weekly_regular.empty:
                 # Prepare data for visualization
                 weekly_regular['avg_views'] = weekly_regular['avg_views'].round(0).astype(int)
-                weekly_regular = weekly_regular.sort_values('year_week_num')
                 
-                # Get list of youtubers and weeks
+                # Every channel gets every week of the range, weeks without videos count as 0
                 regular_channels = filtered_regular['channel_title'].unique()
-                all_regular_weeks = weekly_regular[['year_week', 'year_week_num']].drop_duplicates().sort_values('year_week_num')
-                regular_weeks = all_regular_weeks['year_week'].tolist()
-                
-                # Create complete grid for all combinations
-                complete_grid = []
-                for channel in regular_channels:
-                    for i, week in enumerate(regular_weeks):
-                        week_num = all_regular_weeks.iloc[i]['year_week_num']
-                        complete_grid.append({
-                            'year_week': week,
-                            'year_week_num': week_num,
-                            'channel_title': channel
-                        })
-                
-                # Merge and fill missing values
-                complete_df = pd.DataFrame(complete_grid)
-                weekly_regular = pd.merge(
-                    complete_df, 
-                    weekly_regular, 
-                    on=['year_week', 'year_week_num', 'channel_title'],
-                    how='left'
-                )
-                weekly_regular['avg_views'] = weekly_regular['avg_views'].fillna(0)
-                weekly_regular = weekly_regular.sort_values(['channel_title', 'year_week_num'])
+                weekly_regular = dense_weekly(weekly_regular, regular_channels)
+                regular_weeks = weekly_regular['year_week'].unique().tolist()
                 
                 # Create figure for regular videos
                 fig_regular_weekly = go.Figure()
@@ -549,29 +521,7 @@ def show_shortsinpact():
                 
                 st.plotly_chart(fig_regular_weekly, use_container_width=True)
                 
-                # Week selector for regular videos
-                st.write("#### Select a week to view regular videos:")
-                selected_regular_week = st.selectbox(
-                    "Choose week (Regular):", 
-                    regular_weeks, 
-                    index=0 if regular_weeks else None,
-                    key="regular_week_selector"
-                )
-                
-                col1b, col2b = st.columns(2)
-                with col1b:
-                    if st.button("View Regular Videos for Selected Week"):
-                        st.session_state['selected_regular_week'] = selected_regular_week
-                with col2b:
-                    if st.button("Clear Regular Week"):
-                        st.session_state['selected_regular_week'] = None
-                
-                # Display regular videos for selected week
-                if st.session_state['selected_regular_week']:
-                    week_data = {
-                        'points': [{'x': st.session_state['selected_regular_week']}]
-                    }
-                    display_weekly_videos(filtered_regular, week_data, is_shorts=False)
+                weekly_videos_panel(filtered_regular, regular_weeks, is_shorts=False)
             else:
                 st.info("Not enough weekly data to visualize regular video performance.")
         else:
@@ -715,7 +665,7 @@ def show_shortsinpact():
             st.plotly_chart(fig_dist_shorts, use_container_width=True)
             
             # Show summary statistics
-            shorts_view_stats = filtered_shorts.groupby('channel_title')['views'].describe()[
+            shorts_view_stats = filtered_shorts.groupby('channel_title', observed=True)['views'].describe()[
                 ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
             ].reset_index()
             
@@ -752,7 +702,7 @@ def show_shortsinpact():
             st.plotly_chart(fig_dist_regular, use_container_width=True)
             
             # Show summary statistics
-            regular_view_stats = filtered_regular.groupby('channel_title')['views'].describe()[
+            regular_view_stats = filtered_regular.groupby('channel_title', observed=True)['views'].describe()[
                 ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
             ].reset_index()
             
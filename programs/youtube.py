@@ -5,15 +5,16 @@ from datetime import datetime, timedelta
 import re
 import isodate
 import pytz  # Add this import for timezone support
-from utils.api_client import fetch_top_youtubers_videos, fetch_video_views_and_details
-from utils.data_processor import process_video_data, convert_date_str
-from config.settings import CHANNEL_IDS, CSV_FILE_PATH
+from utils.ingest_worker import read_status, start_background_ingest
+from utils.dataset import load_dataset
+from utils.store import store_exists, summarize_frame
+from config.settings import STORE_PATH
 
 def show_youtube_data():
     st.title("YouTube Analytics Dashboard")
 
     # Check if data file exists
-    file_exists = os.path.exists(CSV_FILE_PATH)
+    file_exists = store_exists()
     
     # Add a refresh button
     col1, col2, col3 = st.columns([3, 1, 1])
@@ -25,79 +26,60 @@ def show_youtube_data():
     # Show smart fetching status
     if file_exists:
         try:
-            df = pd.read_csv(CSV_FILE_PATH)
-            if 'published_at' in df.columns:
-                # Use more flexible date parsing with errors='coerce' and make timezone aware
-                df['published_at'] = df['published_at'].apply(convert_date_str)
-                df['published_at'] = pd.to_datetime(df['published_at'], errors='coerce', utc=True)
-                # Drop rows with invalid dates
-                df = df.dropna(subset=['published_at'])
+            # Shared cached dataset, only reloaded when the store changes
+            df = load_dataset()
+            summary = summarize_frame(df)
+            if summary['videos']:
+                latest_date = summary['last_published_at']
+                # Make now timezone-aware to match latest_date
+                now = datetime.now(pytz.UTC)
+                days_since_latest = (now - latest_date).days
                 
-                if not df.empty:
-                    latest_date = df['published_at'].max()
-                    # Make now timezone-aware to match latest_date
-                    now = datetime.now(pytz.UTC)
-                    days_since_latest = (now - latest_date).days
-                    
-                    st.info(f"Database contains {len(df)} videos. Most recent video: {latest_date.strftime('%Y-%m-%d')} ({days_since_latest} days ago)")
-                    
-                    if days_since_latest <= 1:
-                        st.success("Data is up to date (last video from today)")
+                st.info(f"Database contains {summary['videos']} videos. Most recent video: {latest_date.strftime('%Y-%m-%d')} ({days_since_latest} days ago)")
+                
+                if days_since_latest <= 1:
+                    st.success("Data is up to date (last video from today)")
         except Exception as e:
             st.error(f"Error reading existing data: {str(e)}")
 
-    # Fetch new data if refresh is clicked or if the file doesn't exist
-    if refresh or not file_exists:
-        with st.spinner("Fetching latest video data from YouTube..."):
-            # Set date for one year ago if forced refresh, otherwise use smart fetching
-            # Make sure it's in a format compatible with the YouTube API
-            one_year_ago = (datetime.now(pytz.UTC) - timedelta(days=365)).isoformat().split('.')[0] + 'Z'
-            
-            # Fetch video data from YouTube API (with forced refresh or smart fetching)
-            videos_df = fetch_top_youtubers_videos(CHANNEL_IDS)
-            
-            if not videos_df.empty:
-                st.success(f"Found {len(videos_df)} new videos")
-                
-                # Get views, likes and duration for each video
-                video_ids = videos_df['video_id'].tolist()
-                video_details = fetch_video_views_and_details(video_ids)
-                
-                # Add details to the dataframe
-                for video_id in video_ids:
-                    if video_id in video_details:
-                        details = video_details[video_id]
-                        index = videos_df.index[videos_df['video_id'] == video_id].tolist()[0]
-                        
-                        for key, value in details.items():
-                            videos_df.at[index, key] = value
-                
-                # Process and save video data
-                process_video_data(videos_df.to_dict('records'), CSV_FILE_PATH)
-                st.success("Data updated successfully!")
-            elif file_exists:
-                st.info("No new videos found or up to date. Using existing data.")
-            else:
-                st.error("No videos found and no existing data. Check API key and channel IDs.")
-                return
+    # Ingestion runs in the background worker (utils/ingest_worker.py), this page only reads its status
+    status = read_status()
+    if refresh:
+        if start_background_ingest():
+            st.success("Started fetching the latest video data in the background. Use Check Status to follow it.")
+            status['running'] = True
+        else:
+            st.info("An ingest is already running.")
     
-    # Load the video data from CSV
+    with col3:
+        st.button("Check Status")
+    
+    if status.get('running'):
+        st.info(f"Fetching latest video data from YouTube (started {status.get('started_at', 'just now')})...")
+    elif status.get('state') == 'failed':
+        st.error(f"Last ingest failed at {status.get('finished_at')}: {status.get('error')}")
+    elif status.get('last_success_at'):
+        st.caption(
+            f"Last ingest finished {status['last_success_at']}: {status.get('videos_stored', 0)} videos stored, "
+            f"{status.get('stats_refreshed', 0)} stats refreshed"
+        )
+        for error in status.get('stats_errors') or []:
+            st.warning(f"Stats refresh: {error}")
+    
+    if not file_exists:
+        st.warning("No video data yet. Click Refresh Data or run `python -m utils.ingest_worker` to fetch it.")
+        return
+    if not os.path.exists(STORE_PATH):
+        # Pages only read the store, the legacy data is imported by the ingest worker
+        st.info("Found video data in the old format. Click Refresh Data or run `python -m utils.migrations migrate` to import it.")
+        return
+    
+    # Load the video data (typed, rows without a publish date already left out)
     try:
-        df = pd.read_csv(CSV_FILE_PATH)
+        df = load_dataset()
         if df.empty:
             st.error("The data file exists but contains no data.")
             return
-            
-        # Clean up the published_at dates - make sure they're all timezone aware
-        if 'published_at' in df.columns:
-            df['published_at'] = df['published_at'].apply(convert_date_str)
-            df['published_at'] = pd.to_datetime(df['published_at'], errors='coerce', utc=True)
-            # Remove rows where date parsing completely failed
-            if df['published_at'].isna().any():
-                original_count = len(df)
-                df = df.dropna(subset=['published_at'])
-                if len(df) < original_count:
-                    st.warning(f"Removed {original_count - len(df)} rows with invalid dates")
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return
@@ -129,7 +111,7 @@ def show_youtube_data():
     
     # Group by channel
     try:
-        channel_stats = df.groupby('channel_title').agg(
+        channel_stats = df.groupby('channel_title', observed=True).agg(
             videos=('video_id', 'count'),
             total_views=('views', 'sum'),
             avg_views=('views', 'mean')
@@ -0,0 +1,53 @@
+"""
+Seeded comparison of the vectorized duration parser against isodate.
+benchmarks/fuzz_durations.py runs the same comparison on many more inputs and times both.
+"""
+import random
+import pandas as pd
+import pytest
+from isodate.isoduration import ISO8601_PERIOD_REGEX
+from benchmarks.fuzz_durations import isodate_seconds, random_input
+from utils.data_processor import duration_seconds, parse_durations
+
+SAMPLES = 5_000
+
+
+def as_int(value):
+    return None if pd.isna(value) else int(value)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_parse_durations_matches_isodate(seed):
+    rng = random.Random(seed)
+    values = pd.Series([random_input(rng) for _ in range(SAMPLES)], dtype=object)
+    parsed = parse_durations(values)
+
+    assert parsed.index.equals(values.index)
+    mismatches = []
+    for value, got in zip(values, parsed):
+        want, got = isodate_seconds(value), as_int(got)
+        # isodate's alternative PYYYY-MM-DDThh:mm:ss form is deliberately unsupported
+        if want != got and not (isinstance(value, str) and want is not None and not ISO8601_PERIOD_REGEX.match(value)):
+            mismatches.append((value, want, got))
+    assert not mismatches, mismatches[:20]
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('PT4M13S', 253),
+    ('P1DT2H', 93600),
+    ('P1W', 604800),
+    ('PT1,5M', 90),
+    ('-PT10S', -10),
+    ('P1Y', 0),
+    ('PT1XS', None),
+    ('4M13S', None),
+    (None, None),
+])
+def test_parse_durations_known_values(value, expected):
+    assert as_int(parse_durations(pd.Series([value], dtype=object)).iloc[0]) == expected
+
+
+def test_duration_seconds_live_streams_are_missing():
+    seconds = duration_seconds(pd.Series(['P0D', 'PT0S', 'PT1M'], index=[10, 20, 30]))
+    assert seconds.isna().tolist() == [True, False, False]
+    assert seconds.loc[[20, 30]].tolist() == [0, 60]
@@ -1,88 +1,484 @@
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import streamlit as st
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
-from config.settings import API_KEY, CSV_FILE_PATH
+import random
+import threading
+import time
+from config.settings import (
+    API_KEY, API_BASE_URL, MAX_CONCURRENT_REQUESTS, HTTP_POOL_SIZE, HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_TIMEOUT, HTTP_CACHE_TTL, FETCH_ENGINE, UPLOADS_PLAYLIST_CACHE_PATH,
+    CHANNEL_REFETCH_INTERVAL
+)
+from utils import http_cache
+from utils.atomic_file import atomic_write_json
+from utils.fetch_state import load_fetch_state, format_api_time
 
-def get_fetch_strategy():
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Partial-response field masks, so each endpoint only returns what the pipeline stores
+SEARCH_FIELDS = "nextPageToken,items(id/videoId,snippet(title,channelTitle,publishedAt,thumbnails/default/url,thumbnails/high/url))"
+CHANNELS_FIELDS = "items(id,contentDetails/relatedPlaylists/uploads)"
+PLAYLIST_ITEMS_FIELDS = "nextPageToken,items(snippet(title,channelTitle,thumbnails/default/url,thumbnails/high/url),contentDetails(videoId,videoPublishedAt))"
+VIDEOS_FIELDS = "etag,items(id,statistics(viewCount,likeCount),contentDetails/duration)"
+
+# Google only sends gzip responses when the User-Agent also mentions gzip
+REQUEST_HEADERS = {
+    'Accept-Encoding': 'gzip',
+    'User-Agent': 'youtube-analytics-dashboard (gzip)',
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+# Payload sizes per endpoint for the current refresh, see get_transfer_stats
+_transfer_stats = {}
+_transfer_lock = threading.Lock()
+
+def get_session():
+    """
+    Return the shared requests session used for all YouTube API calls.
+    The session is created on first use with a connection pool of HTTP_POOL_SIZE,
+    so connections (and TLS handshakes) are reused across pages and batches.
     """
-    Determine the fetch strategy based on existing data.
-    Returns:
-    - fetch_needed: Boolean indicating if fetch is needed
-    - from_date: The date from which to fetch videos
-    - max_results: Maximum number of results to fetch per channel
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(REQUEST_HEADERS)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def get_connection_stats():
     """
-    # Default strategy (full fetch)
-    fetch_needed = True
-    from_date = (datetime.now() - timedelta(days=365)).isoformat() + 'Z'  # One year ago
-    max_results = 250  # Maximum allowed by YouTube API
+    Report how the shared session used its connection pools.
+    Returns a dictionary with the number of requests sent, connections opened and connections reused.
+    """
+    stats = {'requests': 0, 'opened': 0, 'reused': 0}
+    # The same adapter is mounted for http and https, so count each one once
+    adapters = {id(adapter): adapter for adapter in get_session().adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats['requests'] += pool.num_requests
+            stats['opened'] += pool.num_connections
+    stats['reused'] = max(0, stats['requests'] - stats['opened'])
+    return stats
+
+def _record_transfer(url, response):
+    """Record the compressed (wire) and decoded payload size of a response."""
+    endpoint = url.rstrip('/').rsplit('/', 1)[-1]
+    decoded_bytes = len(response.content)
+    try:
+        # Bytes read from the socket, before gzip decoding
+        wire_bytes = response.raw.tell()
+    except (AttributeError, OSError):
+        wire_bytes = 0
+    if not wire_bytes:
+        wire_bytes = int(response.headers.get('Content-Length', decoded_bytes))
     
-    # Check if data file exists
-    if not os.path.exists(CSV_FILE_PATH):
-        return fetch_needed, from_date, max_results
+    with _transfer_lock:
+        stats = _transfer_stats.setdefault(endpoint, {'requests': 0, 'wire_bytes': 0, 'decoded_bytes': 0})
+        stats['requests'] += 1
+        stats['wire_bytes'] += wire_bytes
+        stats['decoded_bytes'] += decoded_bytes
+
+def get_transfer_stats():
+    """
+    Report payload sizes since the last reset.
+    Returns a dictionary mapping endpoint names to requests, wire_bytes (as transferred,
+    compressed) and decoded_bytes (after gzip decoding).
+    """
+    with _transfer_lock:
+        return {endpoint: dict(stats) for endpoint, stats in _transfer_stats.items()}
+
+def reset_transfer_stats():
+    """Reset the payload size counters, call this at the start of a refresh."""
+    with _transfer_lock:
+        _transfer_stats.clear()
+
+def _retry_delay(attempt, response=None):
+    """
+    Work out how long to wait before the next attempt.
+    Uses the Retry-After header when the server sends one, otherwise exponential backoff with full jitter.
+    """
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return min(HTTP_BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return min(HTTP_BACKOFF_MAX, max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()))
+            except (TypeError, ValueError):
+                pass
     
-    try:
-        # Load existing data
-        df = pd.read_csv(CSV_FILE_PATH)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+def api_get(url, params, headers=None):
+    """
+    Send a GET request through the shared session, retrying on connection errors,
+    timeouts, 429 and 5xx responses.
+    Returns the response, or raises requests.exceptions.RequestException once retries are exhausted.
+    """
+    session = get_session()
+    
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=HTTP_TIMEOUT)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == HTTP_MAX_RETRIES:
+                raise
+            delay = _retry_delay(attempt)
+            print(f"Request error ({str(e)}), retrying in {delay:.1f}s (attempt {attempt + 1}/{HTTP_MAX_RETRIES})")
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == HTTP_MAX_RETRIES:
+                response.raise_for_status()
+                _record_transfer(url, response)
+                return response
+            delay = _retry_delay(attempt, response)
+            print(f"Got HTTP {response.status_code}, retrying in {delay:.1f}s (attempt {attempt + 1}/{HTTP_MAX_RETRIES})")
         
-        # If no data or missing required columns, do a full fetch
-        if df.empty or 'published_at' not in df.columns or 'channel_id' not in df.columns:
-            return fetch_needed, from_date, max_results
+        time.sleep(delay)
+
+def api_get_cached(url, params):
+    """
+    Send a GET request through the on-disk response cache (see utils/http_cache.py).
+    Entries younger than HTTP_CACHE_TTL are served without a request, older ones are
+    revalidated with If-None-Match so an unchanged payload costs a 304 instead of a full download.
+    Returns the decoded JSON payload.
+    """
+    key = http_cache.cache_key(url, params)
+    entry = http_cache.get_entry(key)
+    
+    if entry is not None and time.time() - entry['stored_at'] < HTTP_CACHE_TTL:
+        http_cache.record_outcome('hits')
+        return json.loads(entry['body'])
+    
+    headers = {'If-None-Match': entry['etag']} if entry is not None and entry['etag'] else None
+    response = api_get(url, params, headers=headers)
+    
+    if response.status_code == 304 and entry is not None:
+        http_cache.record_outcome('not_modified')
+        http_cache.refresh_entry(key)
+        return json.loads(entry['body'])
+    
+    http_cache.record_outcome('misses')
+    data = response.json()
+    # The API sends the ETag as a header and also in the payload
+    etag = response.headers.get('ETag') or data.get('etag')
+    http_cache.store_entry(key, etag, response.content)
+    return data
+
+def print_fetch_stats(include_cache=True):
+    """Print the response cache outcomes for the current refresh and how many connections were reused."""
+    if include_cache:
+        stats = http_cache.get_cache_stats()
+        print(f"Response cache: {stats['hits']} hits ({stats['hits_ratio']:.0%}), "
+              f"{stats['misses']} misses ({stats['misses_ratio']:.0%}), "
+              f"{stats['not_modified']} not modified ({stats['not_modified_ratio']:.0%})")
+    
+    for endpoint, stats in get_transfer_stats().items():
+        average = stats['wire_bytes'] / stats['requests'] if stats['requests'] else 0
+        print(f"Payload {endpoint}: {stats['requests']} requests, {stats['wire_bytes']:,} bytes transferred "
+              f"({stats['decoded_bytes']:,} decoded, {average:,.0f} per request)")
+    
+    stats = get_connection_stats()
+    print(f"HTTP connections: {stats['opened']} opened, {stats['reused']} reused ({stats['requests']} requests)")
+
+def get_channel_fetch_plan(channel_ids):
+    """
+    Determine per channel whether a fetch is needed and from which date,
+    based on the stored per-channel state (see utils/fetch_state.py).
+    Channels fetched less than CHANNEL_REFETCH_INTERVAL seconds ago are left out.
+    Returns a dictionary mapping channel IDs that need a fetch to:
+    - from_date: The date from which to fetch videos for this channel
+    - max_results: Maximum number of results to fetch for this channel
+    - stop_video_id: Newest video already stored; fetching stops as soon as it shows up
+    """
+    now = datetime.now(timezone.utc)
+    one_year_ago = now - timedelta(days=365)
+    
+    try:
+        state = load_fetch_state()
+    except Exception as e:
+        print(f"Error loading fetch state: {str(e)}")
+        # If any error occurs, fall back to full fetch
+        state = {}
+    
+    plan = {}
+    for channel_id in channel_ids:
+        channel_state = state.get(channel_id, {})
         
-        # Convert published_at to datetime (use utc=True to ensure timezone aware)
-        df['published_at'] = pd.to_datetime(df['published_at'], errors='coerce', utc=True)
+        last_fetch_at = channel_state.get('last_fetch_at')
+        if last_fetch_at and (now - _parse_api_time(last_fetch_at)).total_seconds() < CHANNEL_REFETCH_INTERVAL:
+            continue
         
-        # Drop rows with invalid dates
-        df = df.dropna(subset=['published_at'])
+        last_published_at = channel_state.get('last_published_at')
+        if last_published_at:
+            # Start a day before the newest stored video, in case videos show up in the API late
+            from_date = max(_parse_api_time(last_published_at) - timedelta(days=1), one_year_ago)
+        else:
+            # Never fetched this channel, do a full fetch
+            from_date = one_year_ago
         
-        if df.empty:
-            return fetch_needed, from_date, max_results
+        plan[channel_id] = {
+            'from_date': format_api_time(from_date),
+            'max_results': 250,  # Maximum allowed by YouTube API
+            'stop_video_id': channel_state.get('last_video_id')
+        }
+    
+    return plan
+
+def _fetch_channel_videos(channel_id, published_after, max_results_per_page, total_max_results, max_pages, stop_video_id=None, on_page=None):
+    """
+    Fetch the search result pages for a single channel.
+    Pages are requested one after another so the order within the channel is preserved.
+    Results are newest first, so fetching stops as soon as stop_video_id shows up.
+    If on_page is given, each page of videos is passed to it instead of being collected.
+    Returns a tuple of (videos, api_errors) for this channel.
+    """
+    videos = []
+    api_errors = []
+    videos_fetched = 0
+    next_page_token = None
+    page_count = 0
+    
+    # Continue fetching pages until we hit limits
+    while (videos_fetched < total_max_results and 
+           page_count < max_pages and 
+           (page_count == 0 or next_page_token is not None)):
+        try:
+            url = f"{API_BASE_URL}/search"
+            params = {
+                "key": API_KEY,
+                "channelId": channel_id,
+                "part": "snippet",
+                "fields": SEARCH_FIELDS,
+                "order": "date",
+                "maxResults": max_results_per_page,
+                "publishedAfter": published_after,
+                "type": "video"
+            }
             
-        # Get the most recent video date
-        latest_date = df['published_at'].max()
-        
-        # Ensure today is timezone-aware to match latest_date
-        today = datetime.now(latest_date.tzinfo)
-        
-        # Calculate days since the most recent video
-        days_since_latest = (today - latest_date).days
-        print(f"Latest video date: {latest_date}, Days since: {days_since_latest}")
-        
-        # Strategy based on recency of data
-        if days_since_latest <= 1:
-            # If we have data from today, no need to fetch
-            fetch_needed = False
-            return fetch_needed, None, None
+            # Add page token for pagination if it exists
+            if next_page_token:
+                params["pageToken"] = next_page_token
             
-        elif days_since_latest <= 7:
-            # If data is within the last week, just get recent videos
-            from_date = (today - timedelta(days=14)).isoformat()  # 2 weeks ago for overlap
-            # Remove microseconds and add Z for UTC
-            from_date = from_date.split('.')[0] + 'Z'
-            max_results = 10  # Reduced number to save quota
+            response = api_get(url, params)
+            data = response.json()
             
-        elif days_since_latest <= 30:
-            # If data is within a month, get videos from the last month
-            from_date = (today - timedelta(days=45)).isoformat()  # 1.5 months for overlap
-            # Remove microseconds and add Z for UTC
-            from_date = from_date.split('.')[0] + 'Z'
-            max_results = 25  # Medium number to balance coverage and quota
-        else:
-            # Full fetch but adjust the date based on the oldest video we have
-            from_date = (today - timedelta(days=365)).isoformat()  # One year ago
-            # Remove microseconds and add Z for UTC
-            from_date = from_date.split('.')[0] + 'Z'
+            # Get next page token if available
+            next_page_token = data.get("nextPageToken")
             
-        print(f"Strategy: days_since_latest={days_since_latest}, fetch_needed={fetch_needed}, from_date={from_date}, max_results={max_results}")
-        return fetch_needed, from_date, max_results
-        
-    except Exception as e:
-        print(f"Error determining fetch strategy: {str(e)}")
-        # If any error occurs, fall back to full fetch
-        return fetch_needed, from_date, max_results
+            if 'items' in data and data['items']:
+                items_count = len(data['items'])
+                videos_fetched += items_count
+                page_count += 1
+                
+                print(f"Found {items_count} videos for channel {channel_id} (page {page_count}, total {videos_fetched})")
+                
+                page_videos = []
+                reached_known_video = False
+                for item in data['items']:
+                    # Everything from the newest stored video onwards is already known
+                    if stop_video_id and item['id']['videoId'] == stop_video_id:
+                        reached_known_video = True
+                        break
+                    
+                    video = {
+                        'video_id': item['id']['videoId'],
+                        'channel_id': channel_id,
+                        'video_title': item['snippet']['title'],
+                        'channel_title': item['snippet']['channelTitle'],
+                        'published_at': item['snippet']['publishedAt'],
+                        'thumbnail_url': item['snippet']['thumbnails']['high']['url'] if 'high' in item['snippet']['thumbnails'] else item['snippet']['thumbnails']['default']['url']
+                    }
+                    page_videos.append(video)
+                
+                if on_page is not None:
+                    if page_videos:
+                        on_page(page_videos)
+                else:
+                    videos.extend(page_videos)
+                
+                if reached_known_video:
+                    print(f"Reached already stored video {stop_video_id} for channel {channel_id}")
+                    break
+                
+                # If no next page token, we've reached the end
+                if not next_page_token:
+                    print(f"No more pages available for channel {channel_id}")
+                    break
+                    
+                # If we've reached our desired number of videos, stop
+                if videos_fetched >= total_max_results:
+                    print(f"Reached maximum videos limit ({total_max_results}) for channel {channel_id}")
+                    break
+            else:
+                print(f"No videos found for channel {channel_id} on page {page_count + 1}")
+                if 'error' in data:
+                    error_msg = f"API Error for channel {channel_id}: {data['error']['message']}"
+                    print(error_msg)
+                    api_errors.append(error_msg)
+                break
+                
+        except requests.exceptions.RequestException as e:
+            error_msg = f"Request failed for channel {channel_id} (page {page_count + 1}): {str(e)}"
+            print(error_msg)
+            api_errors.append(error_msg)
+            break
+    
+    return videos, api_errors
+
+def _parse_api_time(value):
+    """Parse an API timestamp (or a published_after cutoff) into a timezone aware UTC timestamp."""
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
 
-def fetch_top_youtubers_videos(channel_ids, published_after=None, max_results=5, max_pages=3):
+def get_uploads_playlist_ids(channel_ids):
+    """
+    Resolve the uploads playlist of each channel.
+    Playlist IDs never change, so they are cached in UPLOADS_PLAYLIST_CACHE_PATH and
+    only unknown channels are looked up (one channels.list call per 50 channels).
+    Returns a dictionary mapping channel IDs to uploads playlist IDs.
+    """
+    playlist_ids = {}
+    if os.path.exists(UPLOADS_PLAYLIST_CACHE_PATH):
+        try:
+            with open(UPLOADS_PLAYLIST_CACHE_PATH) as f:
+                playlist_ids = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading uploads playlist cache: {str(e)}")
+    
+    missing = [channel_id for channel_id in dict.fromkeys(channel_ids) if channel_id not in playlist_ids]
+    
+    for i in range(0, len(missing), 50):
+        batch = missing[i:i+50]
+        try:
+            url = f"{API_BASE_URL}/channels"
+            params = {
+                "key": API_KEY,
+                "id": ','.join(batch),
+                "part": "contentDetails",
+                "fields": CHANNELS_FIELDS,
+                "maxResults": 50
+            }
+            data = api_get(url, params).json()
+            for item in data.get('items', []):
+                playlist_ids[item['id']] = item['contentDetails']['relatedPlaylists']['uploads']
+        except requests.exceptions.RequestException as e:
+            print(f"Request failed while resolving uploads playlists: {str(e)}")
+    
+    if missing:
+        try:
+            atomic_write_json(UPLOADS_PLAYLIST_CACHE_PATH, playlist_ids, indent=2)
+        except OSError as e:
+            print(f"Error writing uploads playlist cache: {str(e)}")
+    
+    return {channel_id: playlist_ids[channel_id] for channel_id in channel_ids if channel_id in playlist_ids}
+
+def _fetch_channel_uploads(channel_id, playlist_id, published_after, stop_video_id=None, on_page=None):
+    """
+    Fetch videos for a single channel by paging through its uploads playlist.
+    playlistItems costs 1 quota unit per page (search costs 100), so instead of capping
+    the number of pages we keep going until we reach videos older than published_after
+    or the already stored stop_video_id.
+    If on_page is given, each page of videos is passed to it instead of being collected.
+    Returns a tuple of (videos, api_errors) for this channel.
+    """
+    videos = []
+    api_errors = []
+    
+    if playlist_id is None:
+        error_msg = f"No uploads playlist found for channel {channel_id}"
+        print(error_msg)
+        return videos, [error_msg]
+    
+    cutoff = _parse_api_time(published_after) if published_after else None
+    next_page_token = None
+    page_count = 0
+    
+    while page_count == 0 or next_page_token is not None:
+        try:
+            url = f"{API_BASE_URL}/playlistItems"
+            params = {
+                "key": API_KEY,
+                "playlistId": playlist_id,
+                "part": "snippet,contentDetails",
+                "fields": PLAYLIST_ITEMS_FIELDS,
+                "maxResults": 50
+            }
+            
+            if next_page_token:
+                params["pageToken"] = next_page_token
+            
+            data = api_get(url, params).json()
+            next_page_token = data.get("nextPageToken")
+            page_count += 1
+            page_videos = []
+            reached_cutoff = False
+            
+            for item in data.get('items', []):
+                published_at = item.get('contentDetails', {}).get('videoPublishedAt')
+                
+                # Private and deleted videos have no publish date or thumbnails
+                if not published_at:
+                    continue
+                
+                # Everything from the newest stored video onwards is already known
+                if stop_video_id and item['contentDetails']['videoId'] == stop_video_id:
+                    reached_cutoff = True
+                    break
+                
+                if cutoff is not None and _parse_api_time(published_at) < cutoff:
+                    reached_cutoff = True
+                    continue
+                
+                thumbnails = item['snippet'].get('thumbnails', {})
+                thumbnail = thumbnails.get('high', thumbnails.get('default', {}))
+                page_videos.append({
+                    'video_id': item['contentDetails']['videoId'],
+                    'channel_id': channel_id,
+                    'video_title': item['snippet']['title'],
+                    'channel_title': item['snippet']['channelTitle'],
+                    'published_at': published_at,
+                    'thumbnail_url': thumbnail.get('url')
+                })
+            
+            if on_page is not None:
+                if page_videos:
+                    on_page(page_videos)
+            else:
+                videos.extend(page_videos)
+            
+            print(f"Fetched uploads page {page_count} for channel {channel_id} ({len(page_videos)} videos)")
+            
+            # The uploads playlist is newest first, so once we see older or known videos we are done
+            if reached_cutoff:
+                break
+                
+        except requests.exceptions.RequestException as e:
+            error_msg = f"Request failed for channel {channel_id} (uploads page {page_count + 1}): {str(e)}"
+            print(error_msg)
+            api_errors.append(error_msg)
+            break
+    
+    return videos, api_errors
+
+def fetch_top_youtubers_videos(channel_ids, published_after=None, max_results=5, max_pages=3, max_workers=None, engine=None, on_page=None, on_fetched=None):
     """
     Fetch videos from a list of YouTube channels published after the specified date.
     Returns additional data including video_id, channel_id, thumbnail_url and more.
@@ -92,97 +488,87 @@ def fetch_top_youtubers_videos(channel_ids, published_after=None, max_results=5,
     - published_after: Date filter for videos
     - max_results: Maximum results per page (YouTube limits to 50)
     - max_pages: Maximum number of pages to fetch per channel
+    - max_workers: Maximum number of requests in flight at once (defaults to
+      MAX_CONCURRENT_REQUESTS, use 1 to fetch channels sequentially)
+    - engine: "search" (search.list, 100 quota units per page, limited by max_results/max_pages)
+      or "uploads" (playlistItems.list, 1 unit per page, fetches everything back to
+      published_after). Defaults to FETCH_ENGINE.
+    - on_page: Optional callable that receives each page of videos as soon as it arrives
+      (called from worker threads). Pages are then handed off instead of collected and
+      an empty DataFrame is returned.
+    - on_fetched: Optional callable that receives the channels fetched without errors and the
+      time their fetch started, once every channel is done. Their fetch times are not recorded
+      here: the caller records them with record_channel_fetches once the videos are stored.
     """
-    # Check if we need to fetch based on existing data
-    fetch_needed, from_date, results_per_channel = get_fetch_strategy()
+    # Check which channels need a fetch based on their stored state
+    plan = get_channel_fetch_plan(channel_ids)
     
-    if not fetch_needed:
+    if not plan:
         print("Skipping API fetch as data is up to date")
         return pd.DataFrame()  # Return empty DataFrame to indicate no new data needed
+    
+    # Only channels in the plan are fetched, each from its own watermark unless published_after is given
+    planned_channel_ids = [channel_id for channel_id in channel_ids if channel_id in plan]
+    if on_page is None:
+        # A streaming ingest keeps its own counters for the whole refresh
+        reset_transfer_stats()
+    max_workers = MAX_CONCURRENT_REQUESTS if max_workers is None else max_workers
+    engine = engine if engine else FETCH_ENGINE
+    fetch_started_at = datetime.now(timezone.utc)
+    
+    if engine == "uploads":
+        print(f"Fetching videos for {len(planned_channel_ids)} channels using channel uploads playlists")
+        playlist_ids = get_uploads_playlist_ids(planned_channel_ids)
+        
+        def fetch_channel(channel_id):
+            channel_plan = plan[channel_id]
+            return _fetch_channel_uploads(
+                channel_id,
+                playlist_ids.get(channel_id),
+                published_after if published_after else channel_plan['from_date'],
+                stop_video_id=channel_plan['stop_video_id'],
+                on_page=on_page
+            )
+    else:
+        print(f"Fetching videos for {len(planned_channel_ids)} channels using search")
         
-    # Use provided params or ones from strategy
-    published_after = published_after if published_after else from_date
-    max_results_per_page = min(50, results_per_channel if results_per_channel else max_results)
-    total_max_results = results_per_channel
+        def fetch_channel(channel_id):
+            channel_plan = plan[channel_id]
+            results_per_channel = channel_plan['max_results']
+            return _fetch_channel_videos(
+                channel_id,
+                published_after if published_after else channel_plan['from_date'],
+                max_results_per_page=min(50, results_per_channel if results_per_channel else max_results),
+                total_max_results=results_per_channel,
+                max_pages=max_pages,
+                stop_video_id=channel_plan['stop_video_id'],
+                on_page=on_page
+            )
     
-    print(f"Fetching videos from {published_after} with max_results={total_max_results} per channel")
+    # Each channel is handled by one worker, so at most max_workers requests are in flight
+    if max_workers > 1 and len(planned_channel_ids) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(planned_channel_ids))) as executor:
+            channel_results = list(executor.map(fetch_channel, planned_channel_ids))
+    else:
+        channel_results = [fetch_channel(channel_id) for channel_id in planned_channel_ids]
     
+    # Combine results in channel order so the output matches the sequential path
     videos = []
     api_errors = []
+    fetched_channel_ids = []
+    for channel_id, (channel_videos, channel_errors) in zip(planned_channel_ids, channel_results):
+        videos.extend(channel_videos)
+        api_errors.extend(channel_errors)
+        if not channel_errors:
+            fetched_channel_ids.append(channel_id)
     
-    for channel_id in channel_ids:
-        videos_fetched = 0
-        next_page_token = None
-        page_count = 0
-        
-        # Continue fetching pages until we hit limits
-        while (videos_fetched < total_max_results and 
-               page_count < max_pages and 
-               (page_count == 0 or next_page_token is not None)):
-            try:
-                url = "https://www.googleapis.com/youtube/v3/search"
-                params = {
-                    "key": API_KEY,
-                    "channelId": channel_id,
-                    "part": "snippet",
-                    "order": "date",
-                    "maxResults": max_results_per_page,
-                    "publishedAfter": published_after,
-                    "type": "video"
-                }
-                
-                # Add page token for pagination if it exists
-                if next_page_token:
-                    params["pageToken"] = next_page_token
-                
-                response = requests.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Get next page token if available
-                next_page_token = data.get("nextPageToken")
-                
-                if 'items' in data and data['items']:
-                    items_count = len(data['items'])
-                    videos_fetched += items_count
-                    page_count += 1
-                    
-                    print(f"Found {items_count} videos for channel {channel_id} (page {page_count}, total {videos_fetched})")
-                    
-                    for item in data['items']:
-                        video = {
-                            'video_id': item['id']['videoId'],
-                            'channel_id': channel_id,
-                            'video_title': item['snippet']['title'],
-                            'channel_title': item['snippet']['channelTitle'],
-                            'published_at': item['snippet']['publishedAt'],
-                            'description': item['snippet']['description'],
-                            'thumbnail_url': item['snippet']['thumbnails']['high']['url'] if 'high' in item['snippet']['thumbnails'] else item['snippet']['thumbnails']['default']['url']
-                        }
-                        videos.append(video)
-                    
-                    # If no next page token, we've reached the end
-                    if not next_page_token:
-                        print(f"No more pages available for channel {channel_id}")
-                        break
-                        
-                    # If we've reached our desired number of videos, stop
-                    if videos_fetched >= total_max_results:
-                        print(f"Reached maximum videos limit ({total_max_results}) for channel {channel_id}")
-                        break
-                else:
-                    print(f"No videos found for channel {channel_id} on page {page_count + 1}")
-                    if 'error' in data:
-                        error_msg = f"API Error for channel {channel_id}: {data['error']['message']}"
-                        print(error_msg)
-                        api_errors.append(error_msg)
-                    break
-                    
-            except requests.exceptions.RequestException as e:
-                error_msg = f"Request failed for channel {channel_id} (page {page_count + 1}): {str(e)}"
-                print(error_msg)
-                api_errors.append(error_msg)
-                break
+    # Watermarks and fetch times only move once the videos are stored (see process_video_data
+    # and the pipeline), here we just report which channels were fetched successfully
+    if on_fetched is not None:
+        on_fetched(fetched_channel_ids, fetch_started_at)
+    
+    if on_page is None:
+        print_fetch_stats(include_cache=False)
     
     if api_errors:
         st.error("YouTube API Errors:")
@@ -191,73 +577,74 @@ def fetch_top_youtubers_videos(channel_ids, published_after=None, max_results=5,
     
     return pd.DataFrame(videos) if videos else pd.DataFrame()
 
-def fetch_video_views_and_details(video_ids):
+# Columns of the frame the enrichment stage returns, besides video_id
+DETAILS_COLUMNS = ['views', 'likes', 'duration']
+
+def fetch_video_details_batch(video_ids):
     """
-    Fetch view counts, likes, and duration for a list of video IDs.
-    Returns a dictionary mapping video IDs to their stats.
+    Fetch view counts, likes, and duration for up to 50 video IDs in a single videos.list call.
+    Returns a tuple of (video_details, api_errors), where video_details maps video IDs to their stats.
     """
-    if not video_ids:
-        print("No video IDs provided to fetch details")
-        return {}
-        
     video_details = {}
     api_errors = []
     
-    # Process in batches of 50 (API limit)
-    for i in range(0, len(video_ids), 50):
-        try:
-            batch = video_ids[i:i+50]
-            id_str = ','.join(batch)
-            
-            url = "https://www.googleapis.com/youtube/v3/videos"
-            params = {
-                "key": API_KEY,
-                "id": id_str,
-                "part": "statistics,contentDetails"  # Include contentDetails for duration
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()  # Will raise exception for 4XX/5XX responses
-            data = response.json()
-            
-            if 'items' in data:
-                print(f"Fetched details for {len(data['items'])} videos")
-                for item in data['items']:
-                    video_id = item['id']
-                    stats = {}
-                    
-                    # Get view count and likes
-                    if 'statistics' in item:
-                        if 'viewCount' in item['statistics']:
-                            stats['views'] = int(item['statistics']['viewCount'])
-                        else:
-                            stats['views'] = 0
-                            
-                        if 'likeCount' in item['statistics']:
-                            stats['likes'] = int(item['statistics']['likeCount'])
-                        else:
-                            stats['likes'] = 0
-                    
-                    # Get video duration
-                    if 'contentDetails' in item and 'duration' in item['contentDetails']:
-                        stats['duration'] = item['contentDetails']['duration']  # ISO 8601 duration format
-                    
-                    video_details[video_id] = stats
-            else:
-                print(f"No details found for batch of videos")
-                if 'error' in data:
-                    error_msg = f"API Error: {data['error']['message']}"
-                    print(error_msg)
-                    api_errors.append(error_msg)
-                    
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Request failed for video details: {str(e)}"
-            print(error_msg)
-            api_errors.append(error_msg)
-    
-    if api_errors:
-        st.error("YouTube API Errors (video details):")
-        for error in api_errors:
-            st.error(error)
+    try:
+        # In a fixed order, so the same videos make the same request (and response cache key) in every run
+        id_str = ','.join(sorted(video_ids))
+        
+        url = f"{API_BASE_URL}/videos"
+        params = {
+            "key": API_KEY,
+            "id": id_str,
+            "part": "statistics,contentDetails",  # Include contentDetails for duration
+            "fields": VIDEOS_FIELDS
+        }
+        
+        # Statistics are served from the response cache when unchanged
+        data = api_get_cached(url, params)  # Will raise exception for 4XX/5XX responses once retries are exhausted
+        
+        if 'items' in data:
+            print(f"Fetched details for {len(data['items'])} videos")
+            for item in data['items']:
+                video_id = item['id']
+                stats = {}
+                
+                # Get view count and likes
+                if 'statistics' in item:
+                    if 'viewCount' in item['statistics']:
+                        stats['views'] = int(item['statistics']['viewCount'])
+                    else:
+                        stats['views'] = 0
+                        
+                    if 'likeCount' in item['statistics']:
+                        stats['likes'] = int(item['statistics']['likeCount'])
+                    else:
+                        stats['likes'] = 0
+                
+                # Get video duration
+                if 'contentDetails' in item and 'duration' in item['contentDetails']:
+                    stats['duration'] = item['contentDetails']['duration']  # ISO 8601 duration format
+                
+                video_details[video_id] = stats
+        else:
+            print(f"No details found for batch of videos")
+            if 'error' in data:
+                error_msg = f"API Error: {data['error']['message']}"
+                print(error_msg)
+                api_errors.append(error_msg)
+                
+    except requests.exceptions.RequestException as e:
+        error_msg = f"Request failed for video details: {str(e)}"
+        print(error_msg)
+        api_errors.append(error_msg)
     
-    return video_details
\ No newline at end of file
+    return video_details, api_errors
+
+def details_frame(video_details):
+    """
+    Turn the video_details dictionary of fetch_video_details_batch into a columnar frame
+    with one row per video: video_id, views, likes and duration.
+    """
+    df = pd.DataFrame.from_dict(video_details, orient='index', columns=DETAILS_COLUMNS)
+    df = df.astype({'views': 'Int64', 'likes': 'Int64'})
+    return df.rename_axis('video_id').reset_index()
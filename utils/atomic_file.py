@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+
+def _fsync_directory(directory):
+    """Make a rename durable by syncing its directory (not possible, nor needed, on Windows)."""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(path, write, mode='wb'):
+    """
+    Write a file so that readers only ever see the old or the complete new version.
+    The data goes to a temporary file in the same directory, which is synced to disk and then
+    renamed over path. If anything fails the temporary file is removed and path is untouched.
+
+    Parameters:
+    - path: File to replace
+    - write: Function called with the open temporary file, writes the new content
+    - mode: Mode to open the temporary file with ('wb' or 'w')
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+def atomic_write_json(path, data, **dump_options):
+    """Atomically replace path with data serialized as JSON."""
+    atomic_write(path, lambda f: json.dump(data, f, **dump_options), mode='w')
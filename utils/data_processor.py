@@ -1,28 +1,37 @@
+import numpy as np
 import pandas as pd
-import os
-import isodate  # For parsing ISO duration
+import pyarrow as pa
+import pyarrow.compute as pc
 import pytz  # For timezone support
+from utils.fetch_state import update_channel_watermarks
+from utils.stats_history import append_snapshots
+from utils.weekly_stats import VIDEO_COLUMNS as WEEKLY_COLUMNS, begin_weekly_update, update_weekly_stats
+from utils.store import load_videos, save_videos, store_exists, store_lock, import_legacy, is_sqlite_store, upsert_videos, normalize_timestamps
+from config.settings import STORE_PATH
 
-def process_video_data(video_data, csv_file_path):
+def process_video_data(video_data, store_path=STORE_PATH):
     """
-    Process video data and save to CSV.
+    Process video data (a list of video dictionaries or a DataFrame) and save it to the video store.
     Handles merging with existing data and updating stats for existing videos.
+    The SQLite store upserts only the new batch, the Parquet store is merged and rewritten.
+    Either way the batch is returned as written (normalized, with stats_refreshed_at), an empty
+    DataFrame if there was nothing to write; use load_videos for the stored videos.
+    Concurrent writers (e.g. two ingests) take turns through the store lock, readers
+    never wait and see either the old or the new version of the store.
     """
-    # Handle empty data case
-    if not video_data:
+    # Bring in the legacy data before the first write, this takes the lock itself
+    import_legacy(store_path)
+    with store_lock(store_path):
+        return _process_video_data(video_data, store_path)
+
+def _process_video_data(video_data, store_path):
+    # Handle empty data case (a list of videos or a DataFrame)
+    if video_data is None or len(video_data) == 0:
         print("No new video data to process")
-        return pd.DataFrame() if not os.path.exists(csv_file_path) else pd.read_csv(csv_file_path)
+        return pd.DataFrame()
 
     # Convert video data to DataFrame
     new_data = pd.DataFrame(video_data)
-    
-    # Load existing data if file exists
-    if os.path.exists(csv_file_path):
-        existing_data = pd.read_csv(csv_file_path)
-        print(f"Loaded {len(existing_data)} existing videos from CSV")
-    else:
-        existing_data = pd.DataFrame()
-        print("No existing CSV file found, creating new one")
 
     # Ensure required columns exist in new data
     required_columns = ['video_id', 'video_title', 'channel_id', 'channel_title', 
@@ -42,77 +51,185 @@ def process_video_data(video_data, csv_file_path):
 
     # Convert ISO 8601 duration to seconds for easier analysis
     if 'duration' in new_data.columns:
-        new_data['duration_seconds'] = new_data['duration'].apply(
-            lambda x: int(isodate.parse_duration(str(x)).total_seconds()) 
-            if x and pd.notna(x) and str(x).startswith('PT') else None
-        )
+        new_data['duration_seconds'] = duration_seconds(new_data['duration'])
 
     # Make sure published_at is in datetime format with timezone
     if 'published_at' in new_data.columns:
-        new_data['published_at'] = pd.to_datetime(new_data['published_at'], errors='coerce', utc=True)
+        new_data['published_at'], invalid_dates = normalize_timestamps(new_data['published_at'])
+        if invalid_dates:
+            print(f"Warning: {invalid_dates} videos have an unparseable publish date")
+
+    # Remember when the stats were fetched, the refresh scheduler uses this
+    if 'stats_refreshed_at' not in new_data.columns:
+        new_data['stats_refreshed_at'] = pd.Series(pd.NaT, index=new_data.index, dtype='datetime64[ns, UTC]')
+        new_data.loc[new_data['views'].notna(), 'stats_refreshed_at'] = pd.Timestamp.now(tz='UTC')
+
+    # The batch's videos as stored before and after the write update the weekly aggregates
+    batch_ids = new_data['video_id'].dropna().unique().tolist()
+    stored_before = load_videos(store_path, columns=WEEKLY_COLUMNS, video_ids=batch_ids)
+    # Until they are updated below, the aggregates are marked out of date: if the write fails
+    # half-way, they are rebuilt instead of staying out of sync with the store
+    begin_weekly_update(store_path)
+
+    # The SQLite store upserts the batch in place, its cost does not grow with the history
+    if is_sqlite_store(store_path):
+        written = upsert_videos(new_data, store_path)
+        print(f"Upserted {written} videos into the store")
+        update_weekly_stats(stored_before, load_videos(store_path, columns=WEEKLY_COLUMNS, video_ids=batch_ids), store_path)
+        append_snapshots(new_data)
+        update_channel_watermarks(new_data)
+        return new_data
+
+    # Load existing data if the store exists, already in the current schema (see utils/migrations.py)
+    if store_exists(store_path):
+        existing_data = load_videos(store_path)
+        print(f"Loaded {len(existing_data)} existing videos from the store")
+    else:
+        existing_data = pd.DataFrame()
+        print("No existing video store found, creating new one")
 
-    # Ensure existing_data has all required columns and proper datetime format
-    if not existing_data.empty:
-        for column in required_columns:
-            if column not in existing_data.columns:
-                existing_data[column] = None
-        
-        if 'duration' in existing_data.columns and 'duration_seconds' not in existing_data.columns:
-            # Convert duration to seconds in existing data too
-            existing_data['duration_seconds'] = existing_data['duration'].apply(
-                lambda x: int(isodate.parse_duration(str(x)).total_seconds())
-                if x and pd.notna(x) and str(x).startswith('PT') else None
-            )
-            
-        # Make sure published_at is in datetime format with timezone
-        if 'published_at' in existing_data.columns:
-            existing_data['published_at'] = pd.to_datetime(existing_data['published_at'], errors='coerce', utc=True)
-    
     # Check for duplicates based on video ID
     if not existing_data.empty:
-        # Filter out videos that already exist in the dataset
-        new_videos = new_data[~new_data['video_id'].isin(existing_data['video_id'])]
-        
-        # For videos that exist in both datasets, update their views/likes
-        existing_video_ids = set(existing_data['video_id'])
-        updated_videos = new_data[new_data['video_id'].isin(existing_video_ids)]
-        
-        if not updated_videos.empty:
-            print(f"Updating details for {len(updated_videos)} existing videos")
-            for _, row in updated_videos.iterrows():
-                video_id = row['video_id']
-                # Find the index in existing data
-                idx = existing_data.index[existing_data['video_id'] == video_id].tolist()[0]
-                
-                # Update view count and likes
-                if 'views' in row and pd.notna(row['views']):
-                    existing_data.at[idx, 'views'] = row['views']
-                if 'likes' in row and pd.notna(row['likes']):
-                    existing_data.at[idx, 'likes'] = row['likes']
-        
-        print(f"Found {len(new_videos)} new videos to add")
-        # Combine existing data with new videos
-        updated_data = pd.concat([existing_data, new_videos], ignore_index=True)
+        updated_data = merge_videos(existing_data, new_data)
     else:
         updated_data = new_data
         print(f"Adding {len(new_data)} videos to new dataset")
 
-    # Save updated data to CSV
-    updated_data.to_csv(csv_file_path, index=False)
-    print(f"Saved {len(updated_data)} videos to CSV")
+    # Save updated data to the store
+    save_videos(updated_data, store_path)
+    print(f"Saved {len(updated_data)} videos to the store")
+    update_weekly_stats(stored_before, load_videos(store_path, columns=WEEKLY_COLUMNS, video_ids=batch_ids), store_path)
+    
+    # The store only keeps the latest stats, the history log keeps every observation
+    append_snapshots(new_data)
+    
+    # Move the per-channel watermarks now that the new videos are stored
+    update_channel_watermarks(new_data)
     
-    return updated_data
+    return new_data
+
+def merge_videos(existing_data, new_data, update_columns=('views', 'likes', 'stats_refreshed_at')):
+    """
+    Merge a batch of videos into the existing ones, keyed on video_id, in one vectorized pass.
+    Known videos get the update_columns from the batch, but a missing value in the batch
+    never overwrites a stored one; if a video appears several times in the batch, the last
+    value seen for each column wins. Videos not stored yet are appended.
+
+    Parameters:
+    - existing_data: DataFrame of the stored videos
+    - new_data: DataFrame of the incoming batch
+
+    Returns:
+    - DataFrame with the updated existing videos followed by the new ones
+    """
+    # Match the stored videos against the (small) batch, not the other way round,
+    # so the cost is one hash lookup per stored video
+    in_batch = existing_data['video_id'].isin(new_data['video_id'])
+    known = new_data['video_id'].isin(existing_data.loc[in_batch, 'video_id'])
+    new_videos = new_data[~known]
+    updated_videos = new_data[known]
+
+    merged = existing_data.copy()
+    if not updated_videos.empty:
+        print(f"Updating details for {len(updated_videos)} existing videos")
+        columns = [column for column in update_columns if column in updated_videos.columns]
+        # groupby().last() skips missing values, so this is the last non-missing value per video and column
+        latest = updated_videos.groupby('video_id', sort=False)[columns].last()
+        rows = merged.index[in_batch]
+
+        for column in columns:
+            if column not in merged.columns:
+                merged[column] = None
+            fresh = merged.loc[rows, 'video_id'].map(latest[column])
+            has_value = fresh.notna()
+            merged.loc[rows, column] = merged.loc[rows, column].mask(has_value, fresh)
+
+    print(f"Found {len(new_videos)} new videos to add")
+    # Combine existing data with new videos
+    return pd.concat([merged, new_videos], ignore_index=True)
+
+# isodate's duration grammar, in the designator form (PnYnMnWnDTnHnMnS) the API uses
+_NUMBER = r'[0-9]+(?:[,.][0-9]+)?'
+_DURATION_PATTERN = (
+    rf'^(?P<sign>[+-]?)P'
+    rf'(?:(?P<years>{_NUMBER})Y)?(?:(?P<months>{_NUMBER})M)?(?:(?P<weeks>{_NUMBER})W)?(?:(?P<days>{_NUMBER})D)?'
+    rf'(?:T(?:(?P<hours>{_NUMBER})H)?(?:(?P<minutes>{_NUMBER})M)?(?:(?P<seconds>{_NUMBER})S)?)?$'
+)
+# isodate also requires a digit or T right after the P (RE2 has no lookahead, so this is a second match)
+_DURATION_START = r'^[+-]?P[0-9T]'
+
+# Components in the order timedelta adds them, with their length in microseconds
+_MICROSECONDS_PER_UNIT = {'seconds': 10**6, 'minutes': 60 * 10**6, 'hours': 3600 * 10**6,
+                          'days': 86400 * 10**6, 'weeks': 604800 * 10**6}
+# Largest duration a timedelta holds, isodate fails beyond it
+_MAX_DURATION_SECONDS = 999999999 * 86400 + 86399
+
+def _round_half_up(values):
+    """C round() for non-negative values: halves go up."""
+    rounded = np.floor(values)
+    return rounded + ((values - rounded) >= 0.5)
+
+def parse_durations(durations):
+    """
+    Parse a column of ISO 8601 durations (e.g. 'PT4M13S', 'P1DT2H') into whole seconds at once.
+    Gives the same result as int(isodate.parse_duration(value).total_seconds()), including
+    fractions, commas as decimal mark, weeks and a leading sign. Like isodate's total_seconds(),
+    years and months are accepted but not counted. Missing or malformed values become missing.
+    The alternative PYYYY-MM-DDThh:mm:ss form is not supported, the API never sends it.
+
+    Parameters:
+    - durations: Series of duration strings
+
+    Returns:
+    - Series of nullable integers (Int64) with the same index
+    """
+    durations = pd.Series(durations, copy=False)
+    # Arrow's regex kernels run over the whole column in C++, pandas' str.extract loops in Python
+    text = pa.array(durations.astype('string'), type=pa.string())
+    parts = pc.extract_regex(text, _DURATION_PATTERN)
+    matched = pc.and_kleene(pc.is_valid(parts), pc.match_substring_regex(text, _DURATION_START))
+    matched = pc.fill_null(matched, False).to_numpy(zero_copy_only=False)
+
+    def component(name):
+        digits = pc.replace_substring(pc.struct_field(parts, name), ',', '.')
+        # Absent components are empty strings, they count as zero
+        digits = pc.if_else(pc.equal(digits, ''), None, digits)
+        return pc.fill_null(pc.cast(digits, pa.float64()), 0.0).to_numpy(zero_copy_only=False)
+
+    values = {name: component(name) for name in _MICROSECONDS_PER_UNIT}
+    approximate = sum(values[name] * (unit / 10**6) for name, unit in _MICROSECONDS_PER_UNIT.items())
+    valid = matched & (approximate <= _MAX_DURATION_SECONDS)
+
+    # Rebuild timedelta's arithmetic so fractional components round exactly like isodate:
+    # whole units are exact, each fraction is scaled to microseconds, and the sub-microsecond
+    # leftovers are summed and rounded once at the end (halves to an even total).
+    whole_seconds = np.zeros(len(durations), dtype='int64')
+    microseconds = np.zeros(len(durations), dtype='int64')
+    leftover = np.zeros(len(durations))
+    for name, unit in _MICROSECONDS_PER_UNIT.items():
+        fraction, whole = np.modf(np.where(valid, values[name], 0))
+        whole_seconds += whole.astype('int64') * (unit // 10**6)
+        scaled_fraction, scaled_whole = np.modf(fraction * unit)
+        microseconds += scaled_whole.astype('int64')
+        leftover += scaled_fraction
+
+    odd = microseconds % 2
+    rounded = _round_half_up(leftover)
+    tie = np.abs(rounded - leftover) == 0.5
+    rounded = np.where(tie, 2 * _round_half_up((leftover + odd) * 0.5) - odd, rounded)
+    microseconds += rounded.astype('int64')
+
+    # total_seconds() divides the microseconds by a million as a float, int() then truncates
+    whole_seconds += microseconds // 10**6
+    seconds = np.trunc(whole_seconds.astype('float64') + (microseconds % 10**6) / 1e6)
+    negative = pc.fill_null(pc.equal(pc.struct_field(parts, 'sign'), '-'), False).to_numpy(zero_copy_only=False)
+    seconds = np.where(negative, -seconds, seconds)
+
+    return pd.Series(seconds, index=durations.index).where(valid).astype('Int64')
 
-def convert_date_str(date_str):
+def duration_seconds(durations):
     """
-    Convert a date string from the format '2024-04-15T09:04:24Z'
-    to '2024-04-15 09:04:24+00:00'. If the date string is already in
-    the target format, return it as-is.
+    Duration of each video in seconds, from the API's ISO 8601 durations.
+    The API reports P0D for live and upcoming streams, whose length is unknown rather than zero.
     """
-    from datetime import datetime
-    try:
-        dt = datetime.strptime(str(date_str), '%Y-%m-%dT%H:%M:%SZ')
-        return dt.strftime('%Y-%m-%d %H:%M:%S+00:00')
-    except ValueError:
-        # If conversion fails (e.g. the date is already converted), return it unchanged.
-        return date_str
+    return parse_durations(durations).mask(pd.Series(durations, copy=False).eq('P0D'))
@@ -0,0 +1,243 @@
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.store import load_videos
+from utils.weekly_stats import read_weekly_stats, weekly_stats_current, weekly_stats_path
+from config.settings import STORE_PATH
+
+# Columns the dashboard pages use. Descriptions are loaded on demand (load_descriptions),
+# thumbnails are derived from the video id (thumbnail_url) and durations shown from duration_seconds.
+DATASET_COLUMNS = ['video_id', 'video_title', 'channel_id', 'channel_title', 'published_at',
+                   'views', 'likes', 'duration_seconds']
+
+# The API's 'high' thumbnail, which is what the store holds for every video
+THUMBNAIL_URL = "https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+# Channel fields repeat on every row, each distinct value is kept once
+_CATEGORY_COLUMNS = ['channel_id', 'channel_title']
+# Counters are stored as int64. Likes and durations fit in half the space; views stay Int64,
+# popular videos pass the int32 range and the pages aggregate them.
+_COUNTER_COLUMNS = ['likes', 'duration_seconds']
+_INT32_MAX = np.iinfo(np.int32).max
+# The dataset is kept sorted by channel, then publish date: each channel is one block of rows in
+# date order, so filter_videos finds a channel and date range by binary search
+SORT_COLUMNS = ('channel_title', 'published_at')
+
+def dataset_version(path=STORE_PATH):
+    """
+    Identify the current version of the store by the mtime and size of its files
+    (including SQLite's write-ahead log, where recent commits live until a checkpoint).
+    Returns None if nothing is stored yet.
+    """
+    version = []
+    for file_path in (path, f"{path}-wal"):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        version.append((file_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(version) or None
+
+def compact_frame(df):
+    """
+    Convert a frame read from the store to the compact in-memory types: categorical channel
+    columns, and likes and durations downcast to Int32 where every value fits.
+    """
+    df = df.copy()
+    for column in _CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column in _COUNTER_COLUMNS:
+        if column in df.columns:
+            largest = df[column].abs().max()
+            df[column] = df[column].astype('Int32' if pd.isna(largest) or largest <= _INT32_MAX else 'Int64')
+    return df
+
+def _copy_on_write():
+    """Whether pandas keeps shallow copies apart: always since pandas 3, opt-in before (mode.copy_on_write)."""
+    return int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+@st.cache_resource(max_entries=2, show_spinner="Loading video data...")
+def _load_dataset(path, version):
+    # version is only part of the cache key: a new store version misses the cache and is loaded once
+    df = load_videos(path, columns=DATASET_COLUMNS)
+    df = compact_frame(df.dropna(subset=['published_at']))
+    df = df.sort_values(list(SORT_COLUMNS), kind='stable', na_position='first', ignore_index=True)
+    df.attrs['sorted_by'] = SORT_COLUMNS
+    print(f"Loaded {len(df)} videos for the dashboard ({df.memory_usage(deep=True).sum() / 1024:.0f} KiB)")
+    return df
+
+def load_dataset(path=STORE_PATH):
+    """
+    The typed video dataset shared by all pages, loaded and normalized once per store version.
+    The parsed frame is cached across reruns and sessions, so reruns only stat the store files.
+    Rows without a publish date are dropped, the rest are sorted by channel and publish date.
+
+    Returns:
+    - DataFrame with DATASET_COLUMNS (empty if nothing is stored). It is a copy of the cached
+      frame: pages may modify it without affecting other pages or sessions. With Copy-on-Write
+      a shallow copy is enough, older pandas versions get a deep copy.
+    """
+    version = dataset_version(path)
+    if version is None:
+        # No store yet (legacy data is imported by the ingest worker or migrations, not by readers)
+        return compact_frame(load_videos(path, columns=DATASET_COLUMNS))
+    return _load_dataset(path, version).copy(deep=not _copy_on_write())
+
+@st.cache_resource(max_entries=2)
+def _load_weekly_stats(path, version):
+    return read_weekly_stats(path)
+
+def load_weekly_stats(path=STORE_PATH):
+    """
+    The weekly aggregates of the store (see utils/weekly_stats.py), cached across reruns and
+    sessions until an ingest updates them. Until they are built, or while a store write has them
+    marked out of date, they are aggregated from the store and cached per store version instead.
+    """
+    if weekly_stats_current(path):
+        version = dataset_version(weekly_stats_path(path))
+    else:
+        # Aggregated from the store, so they change with it
+        store_version = dataset_version(path)
+        version = ('store', store_version) if store_version is not None else None
+    if version is None:
+        return read_weekly_stats(path)
+    return _load_weekly_stats(path, version)
+
+def _is_sorted_dataset(df):
+    """Whether df is the dataset or rows taken from it in order, so it is still sorted by SORT_COLUMNS."""
+    return (df.attrs.get('sorted_by') == SORT_COLUMNS
+            and isinstance(df['channel_title'].dtype, pd.CategoricalDtype)
+            and df.index.is_monotonic_increasing)
+
+def channel_offsets(df):
+    """
+    Where each channel's block of rows starts in a frame sorted by SORT_COLUMNS, found by binary
+    search over the channel codes. Rows of channel code c are offsets[c + 1]:offsets[c + 2]
+    (code -1 are the rows without a channel, which sort first).
+    """
+    channels = df['channel_title'].array
+    codes = channels.codes
+    # Searching in the codes' own dtype avoids converting the whole column; pandas picks
+    # a dtype with room for one more code than there are categories
+    return np.searchsorted(codes, np.arange(-1, len(channels.categories) + 1, dtype=codes.dtype))
+
+def _sorted_selection(df, channel_titles, start, end):
+    """Rows of the selected channels published in [start, end), as a slice or positions of df."""
+    offsets = channel_offsets(df)
+    if channel_titles is None:
+        codes = np.arange(-1, len(offsets) - 2)
+    else:
+        categories = df['channel_title'].array.categories
+        codes = np.unique([categories.get_loc(title) for title in channel_titles if title in categories]).astype(int)
+
+    published = df['published_at'].values
+    start = None if start is None else start.to_datetime64()
+    end = None if end is None else end.to_datetime64()
+    ranges = []
+    for code in codes:
+        first, last = offsets[code + 1], offsets[code + 2]
+        block = published[first:last]
+        if end is not None:
+            last = first + np.searchsorted(block, end, side='left')
+        if start is not None:
+            first += np.searchsorted(block, start, side='left')
+        if first < last:
+            ranges.append((first, last))
+
+    if len(ranges) == 1:
+        return slice(*ranges[0])
+    return np.concatenate([np.arange(first, last) for first, last in ranges] or [np.arange(0)])
+
+def filter_videos(df, channel_titles=None, start=None, end=None, min_duration_seconds=None):
+    """
+    Filter the dataset in memory, with the same filters as store.load_videos. On the sorted
+    dataset (load_dataset, or rows filter_videos took from it) the channels and date range are
+    found by binary search and only the selected rows are read; other frames are filtered row by row.
+
+    Parameters:
+    - channel_titles: Only keep videos of these channels
+    - start / end: Only keep videos published in [start, end), as UTC timestamps (see store.day_bounds)
+    - min_duration_seconds: Only keep videos at least this long
+
+    Returns:
+    - Filtered DataFrame (the index of df is kept)
+    """
+    if (channel_titles is not None or start is not None or end is not None) and _is_sorted_dataset(df):
+        df = df.iloc[_sorted_selection(df, channel_titles, start, end)]
+        if min_duration_seconds is None:
+            return df
+        return df[(df['duration_seconds'] >= min_duration_seconds).fillna(False)]
+
+    mask = pd.Series(True, index=df.index)
+    if channel_titles is not None:
+        mask &= df['channel_title'].isin(channel_titles)
+    if start is not None:
+        mask &= df['published_at'] >= start
+    if end is not None:
+        mask &= df['published_at'] < end
+    if min_duration_seconds is not None:
+        mask &= (df['duration_seconds'] >= min_duration_seconds).fillna(False)
+    return df[mask]
+
+def filter_state_key(page, channel_titles, start, end, min_duration_seconds, path=STORE_PATH):
+    """
+    Key for memoizing what a page computes from a filter state (see utils/memo.py): the page,
+    the versions of the store and of its weekly aggregates, and the filters.
+    """
+    channels = None if channel_titles is None else tuple(sorted(channel_titles))
+    return (page, dataset_version(path), dataset_version(weekly_stats_path(path)),
+            channels, start, end, min_duration_seconds)
+
+def filter_date_bounds(summary):
+    """
+    Earliest and latest publish date the date filter allows, from summarize_frame's summary
+    (the last year if the dates are unknown).
+    """
+    min_date = summary['first_published_at'].date()
+    max_date = summary['last_published_at'].date()
+    if pd.isna(min_date) or pd.isna(max_date):
+        min_date = datetime.now().date() - timedelta(days=365)
+        max_date = datetime.now().date()
+    return min(min_date, max_date), max(min_date, max_date)
+
+def default_filters(summary, date_range=None):
+    """
+    The filters the page sidebars apply before anything is changed: the first three channels
+    and date_range (the range kept in the session) if it lies within the publish dates, else all of them.
+    Returns (channel_titles, (start_date, end_date)).
+    """
+    youtubers = summary['channel_titles']
+    min_date, max_date = filter_date_bounds(summary)
+    if date_range is None or date_range[0] < min_date or date_range[1] > max_date:
+        date_range = (min_date, max_date)
+    return list(youtubers[:3] if len(youtubers) > 3 else youtubers), tuple(date_range)
+
+def thumbnail_url(video_id):
+    """URL of a video's thumbnail, derived from its id instead of being kept per row."""
+    return THUMBNAIL_URL.format(video_id=video_id)
+
+def load_descriptions(video_ids, path=STORE_PATH):
+    """
+    Read the descriptions of the given videos from the store, only when they are shown.
+    Only imported legacy data has them: the API fetch no longer requests descriptions.
+    Returns a Series of descriptions indexed by video_id.
+    """
+    df = load_videos(path, columns=['video_id', 'description'], video_ids=list(video_ids))
+    return df.set_index('video_id')['description']
+
+def memory_report(df):
+    """
+    Memory used by each column of df, including the strings it references.
+    Returns a DataFrame with the dtype, total bytes and bytes per row of every column, plus a total row.
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'bytes': usage,
+        'bytes_per_row': (usage / max(len(df), 1)).round(1),
+    })
+    report.loc['total'] = ['', usage.sum(), round(usage.sum() / max(len(df), 1), 1)]
+    return report
@@ -0,0 +1,101 @@
+import json
+import os
+import pandas as pd
+from datetime import datetime, timezone
+from utils.atomic_file import atomic_write_json
+from utils.file_lock import FileLock
+from utils.store import load_videos, store_exists, normalize_timestamps
+from config.settings import STORE_PATH, FETCH_STATE_PATH
+
+def format_api_time(value):
+    """Format a timestamp as an RFC 3339 UTC string, the format the YouTube API expects."""
+    timestamp = pd.Timestamp(value)
+    timestamp = timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def _bootstrap_fetch_state():
+    """
+    Build the initial per-channel state from the stored videos.
+    This only runs once, when no state file exists yet, and only reads the three columns it needs.
+    """
+    if not store_exists(STORE_PATH):
+        return {}
+
+    try:
+        df = load_videos(STORE_PATH, columns=['video_id', 'channel_id', 'published_at'])
+    except (OSError, ValueError) as e:
+        print(f"Could not build fetch state from {STORE_PATH}: {str(e)}")
+        return {}
+
+    print(f"Building per-channel fetch state from {STORE_PATH}")
+    return _watermarks_from_frame(df, {})
+
+def _watermarks_from_frame(df, state):
+    """Advance the watermark of every channel in df to its newest video."""
+    if df.empty or not {'video_id', 'channel_id', 'published_at'}.issubset(df.columns):
+        return state
+
+    df = df[['video_id', 'channel_id', 'published_at']].copy()
+    df['published_at'], _ = normalize_timestamps(df['published_at'])
+    df = df.dropna(subset=['channel_id', 'published_at'])
+
+    if df.empty:
+        return state
+
+    # Newest video per channel
+    latest = df.loc[df.groupby('channel_id')['published_at'].idxmax()]
+
+    for _, row in latest.iterrows():
+        channel_state = state.setdefault(row['channel_id'], {})
+        current = channel_state.get('last_published_at')
+        if current is None or row['published_at'] > pd.Timestamp(current):
+            channel_state['last_published_at'] = format_api_time(row['published_at'])
+            channel_state['last_video_id'] = row['video_id']
+
+    return state
+
+def load_fetch_state():
+    """
+    Load the per-channel fetch state.
+    Returns a dictionary mapping channel IDs to a dictionary with
+    last_published_at, last_video_id and last_fetch_at (any of which may be missing).
+    """
+    if os.path.exists(FETCH_STATE_PATH):
+        try:
+            with open(FETCH_STATE_PATH) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading fetch state, rebuilding it: {str(e)}")
+
+    state = _bootstrap_fetch_state()
+    save_fetch_state(state)
+    return state
+
+def save_fetch_state(state):
+    """Write the per-channel fetch state to FETCH_STATE_PATH, replacing the file in one step."""
+    atomic_write_json(FETCH_STATE_PATH, state, indent=2, sort_keys=True)
+
+def _state_lock():
+    # Serializes read-modify-write updates, across threads (separate flocks) and processes
+    return FileLock(f"{FETCH_STATE_PATH}.lock")
+
+def record_channel_fetches(channel_ids, fetched_at=None):
+    """Remember when each of the given channels was last fetched successfully."""
+    if not channel_ids:
+        return
+
+    fetched_at = format_api_time(fetched_at if fetched_at is not None else datetime.now(timezone.utc))
+    with _state_lock():
+        state = load_fetch_state()
+        for channel_id in channel_ids:
+            state.setdefault(channel_id, {})['last_fetch_at'] = fetched_at
+        save_fetch_state(state)
+
+def update_channel_watermarks(videos_df):
+    """
+    Advance the per-channel watermarks using videos that were just stored.
+    Rows without a channel or publish date (e.g. stats-only updates) are ignored.
+    """
+    with _state_lock():
+        state = load_fetch_state()
+        save_fetch_state(_watermarks_from_frame(videos_df, state))
@@ -0,0 +1,73 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class LockNotAcquired(Exception):
+    """Raised when a non-blocking lock is already held by another process."""
+
+class FileLock:
+    """
+    Inter-process lock backed by an OS file lock (flock on Unix, msvcrt.locking on Windows).
+    The lock is released automatically if the holding process dies.
+
+    Usage:
+        with FileLock("data/ingest.lock", blocking=False):
+            ...
+    """
+
+    def __init__(self, path, blocking=True):
+        self.path = path
+        self.blocking = blocking
+        self._fd = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if self.blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(fd, flags)
+            else:
+                mode = msvcrt.LK_LOCK if self.blocking else msvcrt.LK_NBLCK
+                msvcrt.locking(fd, mode, 1)
+        except OSError:
+            os.close(fd)
+            raise LockNotAcquired(f"Lock {self.path} is held by another process")
+
+        # Leave the holder's PID in the file to make debugging easier
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode('ascii'))
+        self._fd = fd
+        return self
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def is_locked(self):
+        """Check whether another process currently holds the lock, without keeping it."""
+        try:
+            probe = FileLock(self.path, blocking=False).acquire()
+        except LockNotAcquired:
+            return True
+        probe.release()
+        return False
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config.settings import HTTP_CACHE_PATH, HTTP_CACHE_MAX_BYTES
+
+# Outcome counters for the current refresh, see reset_cache_stats/get_cache_stats
+_stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+_lock = threading.Lock()
+
+def cache_key(url, params):
+    """
+    Build the cache key for a request from its URL and parameters.
+    The API key is left out so rotating keys does not invalidate the cache.
+    """
+    relevant = {name: str(value) for name, value in params.items() if name != 'key'}
+    raw = url + '?' + json.dumps(relevant, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _connect():
+    """Open the cache database, creating it if needed."""
+    os.makedirs(os.path.dirname(HTTP_CACHE_PATH) or '.', exist_ok=True)
+    connection = sqlite3.connect(HTTP_CACHE_PATH, timeout=30)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            etag TEXT,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """)
+    connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+    return connection
+
+def get_entry(key):
+    """
+    Look up a cached response.
+    Returns a dictionary with etag, body and stored_at, or None if the key is not cached.
+    """
+    with _lock:
+        connection = _connect()
+        try:
+            row = connection.execute(
+                "SELECT etag, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            # Mark as recently used for LRU eviction
+            connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            connection.commit()
+            return {'etag': row[0], 'body': row[1], 'stored_at': row[2]}
+        finally:
+            connection.close()
+
+def store_entry(key, etag, body):
+    """Store a response body and its ETag, then evict least recently used entries over HTTP_CACHE_MAX_BYTES."""
+    now = time.time()
+    with _lock:
+        connection = _connect()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, body, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, etag, body, len(body), now, now)
+            )
+
+            total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total_size > HTTP_CACHE_MAX_BYTES:
+                evict = []
+                for old_key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                    if total_size <= HTTP_CACHE_MAX_BYTES:
+                        break
+                    evict.append((old_key,))
+                    total_size -= size
+                connection.executemany("DELETE FROM responses WHERE key = ?", evict)
+                print(f"Evicted {len(evict)} entries from the response cache")
+
+            connection.commit()
+        finally:
+            connection.close()
+
+def refresh_entry(key):
+    """Mark a cached response as fresh again after the server answered 304 Not Modified."""
+    now = time.time()
+    with _lock:
+        connection = _connect()
+        try:
+            connection.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+            connection.commit()
+        finally:
+            connection.close()
+
+def record_outcome(outcome):
+    """Count a cache outcome: 'hits', 'misses' or 'not_modified'."""
+    with _lock:
+        _stats[outcome] += 1
+
+def reset_cache_stats():
+    """Reset the outcome counters, call this at the start of a refresh."""
+    with _lock:
+        for outcome in _stats:
+            _stats[outcome] = 0
+
+def get_cache_stats():
+    """
+    Report the cache outcomes since the last reset.
+    Returns a dictionary with hits, misses and not_modified counts and their ratios.
+    """
+    with _lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats['total'] = total
+    for outcome in ('hits', 'misses', 'not_modified'):
+        stats[f'{outcome}_ratio'] = stats[outcome] / total if total else 0.0
+    return stats
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+from datetime import datetime, timezone
+from utils.atomic_file import atomic_write_json
+from utils.file_lock import FileLock, LockNotAcquired
+from config.settings import (
+    CHANNEL_IDS, STORE_PATH, UPDATE_INTERVAL, INGEST_LOCK_PATH, INGEST_STATUS_PATH
+)
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def read_status():
+    """
+    Read the status the ingestion worker last wrote.
+    Returns a dictionary (empty if the worker never ran), with a 'running' flag
+    telling whether an ingest currently holds the lock.
+    """
+    status = {}
+    if os.path.exists(INGEST_STATUS_PATH):
+        try:
+            with open(INGEST_STATUS_PATH) as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            status = {}
+    status['running'] = FileLock(INGEST_LOCK_PATH).is_locked()
+    return status
+
+def _write_status(**changes):
+    """Merge changes into the status file, replacing it in one step so readers never see half a file."""
+    status = {}
+    if os.path.exists(INGEST_STATUS_PATH):
+        try:
+            with open(INGEST_STATUS_PATH) as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            status = {}
+    status.pop('running', None)
+    status.update(changes)
+
+    atomic_write_json(INGEST_STATUS_PATH, status, indent=2)
+
+def run_ingest_once():
+    """
+    Run one ingest: migrate the store if its schema is behind, fetch new videos, enrich them and
+    store them, refresh the stats that are due and compact the stats history.
+    Only one ingest runs at a time; if another process holds the lock this returns None.
+    Returns a dictionary with videos_stored, stats_refreshed and stats_errors (the API errors of
+    the stats refresh) otherwise.
+    """
+    # Imported here so the dashboard can read the status without loading the API client
+    from utils.migrations import migrate
+    from utils.pipeline import run_streaming_ingest
+    from utils.refresh_scheduler import run_stats_refresh
+    from utils.stats_history import compact_history
+
+    try:
+        lock = FileLock(INGEST_LOCK_PATH, blocking=False).acquire()
+    except LockNotAcquired:
+        print("Another ingest is already running, skipping")
+        return None
+
+    try:
+        _write_status(state='running', pid=os.getpid(), started_at=_now(), error=None)
+        migrate(STORE_PATH)
+        videos_stored = run_streaming_ingest(CHANNEL_IDS, STORE_PATH)
+        stats_refreshed, stats_errors = run_stats_refresh(STORE_PATH)
+        compact_history()
+        _write_status(
+            state='idle',
+            finished_at=_now(),
+            last_success_at=_now(),
+            videos_stored=videos_stored,
+            stats_refreshed=stats_refreshed,
+            stats_errors=stats_errors
+        )
+        return {'videos_stored': videos_stored, 'stats_refreshed': stats_refreshed, 'stats_errors': stats_errors}
+    except Exception as e:
+        traceback.print_exc()
+        _write_status(state='failed', finished_at=_now(), error=str(e))
+        raise
+    finally:
+        lock.release()
+
+def run_forever(interval=UPDATE_INTERVAL):
+    """Run an ingest every interval seconds until interrupted."""
+    print(f"Ingestion worker started, running every {interval} seconds")
+    while True:
+        started = time.monotonic()
+        try:
+            run_ingest_once()
+        except Exception as e:
+            print(f"Ingest failed: {str(e)}")
+
+        next_run = max(0, interval - (time.monotonic() - started))
+        _write_status(next_run_at=datetime.fromtimestamp(time.time() + next_run, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'))
+        time.sleep(next_run)
+
+def start_background_ingest():
+    """
+    Start a single ingest in a separate process, so the caller (the dashboard) never waits on the network.
+    Returns False if an ingest is already running.
+    """
+    if FileLock(INGEST_LOCK_PATH).is_locked():
+        return False
+
+    subprocess.Popen(
+        [sys.executable, '-m', 'utils.ingest_worker', '--once'],
+        cwd=os.getcwd(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch YouTube videos into the local store")
+    parser.add_argument('--once', action='store_true', help="Run a single ingest and exit")
+    parser.add_argument('--interval', type=int, default=UPDATE_INTERVAL, help="Seconds between ingests")
+    args = parser.parse_args(argv)
+
+    if args.once:
+        result = run_ingest_once()
+        sys.exit(0 if result is not None else 1)
+    run_forever(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from config.settings import MEMO_MAX_BYTES, MEMO_MAX_ENTRIES
+
+# Process-wide memo of page results (filtered frames, aggregates, figure specs) keyed by the
+# filter state that produced them. Shared by all sessions; least recently used entries are
+# evicted once there are more than MEMO_MAX_ENTRIES or they take more than MEMO_MAX_BYTES.
+_entries = OrderedDict()  # key -> (value, size in bytes)
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+def estimate_size(value):
+    """Approximate memory held by value: frames, arrays and the dicts and lists of figure specs."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + sum(estimate_size(item) for item in value.ravel())
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+def memoize(key, build, max_bytes=None, max_entries=None):
+    """
+    Return the value memoized under key, or build it, memoize it and return it.
+    The value is shared with later callers, who must not modify it.
+
+    Parameters:
+    - key: Hashable key, covering everything the value depends on (dataset version, filters...)
+    - build: Function without arguments computing the value
+    - max_bytes / max_entries: Limits of the memo (default MEMO_MAX_BYTES / MEMO_MAX_ENTRIES)
+
+    Returns:
+    - The value
+    """
+    max_bytes = max_bytes if max_bytes is not None else MEMO_MAX_BYTES
+    max_entries = max_entries if max_entries is not None else MEMO_MAX_ENTRIES
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            _stats['hits'] += 1
+            return _entries[key][0]
+        _stats['misses'] += 1
+
+    # Built outside the lock, other sessions keep reading meanwhile
+    value = build()
+    size = estimate_size(value)
+    if size > max_bytes:
+        return value
+
+    with _lock:
+        if key in _entries:
+            _stats['bytes'] -= _entries.pop(key)[1]
+        _entries[key] = (value, size)
+        _stats['bytes'] += size
+        while len(_entries) > max_entries or _stats['bytes'] > max_bytes:
+            _, (_, evicted_size) = _entries.popitem(last=False)
+            _stats['bytes'] -= evicted_size
+            _stats['evictions'] += 1
+    return value
+
+def memo_stats():
+    """Hits, misses, evictions, entries and bytes held by the memo."""
+    with _lock:
+        return dict(_stats, entries=len(_entries))
+
+def clear_memo():
+    """Drop every memoized value."""
+    with _lock:
+        _entries.clear()
+        _stats['bytes'] = 0
@@ -0,0 +1,166 @@
+import argparse
+import pandas as pd
+import pyarrow.parquet as pq
+from utils import sqlite_store
+from utils.data_processor import duration_seconds
+from utils.store import (
+    SCHEMA_VERSION, import_legacy, is_sqlite_store, normalize_timestamps, save_chunks, schema_version, store_lock
+)
+from utils.weekly_stats import ensure_weekly_stats, rebuild_weekly_stats
+from config.settings import STORE_PATH, MIGRATION_CHUNK_SIZE
+
+# Every migration takes a chunk of rows and returns it fixed. Migrations must be idempotent:
+# a store interrupted mid-migration keeps its old version and is migrated again from the start.
+
+def _rename_api_fields(df):
+    """Older exports kept the API's field names."""
+    for api_name, column in (('title', 'video_title'), ('channelTitle', 'channel_title')):
+        if api_name in df.columns:
+            if column in df.columns:
+                df[column] = df[column].fillna(df[api_name])
+            else:
+                df[column] = df[api_name]
+            df = df.drop(columns=[api_name])
+    return df
+
+def _parse_timestamps(df):
+    """Publish dates were kept as text in both the '...Z' and the '... +00:00' form."""
+    if 'published_at' in df.columns:
+        df['published_at'], invalid_dates = normalize_timestamps(df['published_at'])
+        if invalid_dates:
+            print(f"Warning: {invalid_dates} videos have an unparseable publish date")
+    return df
+
+def _fill_duration_seconds(df):
+    """duration_seconds was added after the first CSVs were written."""
+    if 'duration' not in df.columns:
+        return df
+    stored = df['duration_seconds'] if 'duration_seconds' in df.columns else pd.Series(pd.NA, index=df.index)
+    stored = pd.to_numeric(stored, errors='coerce').round().astype('Int64')
+    missing = stored.isna() & df['duration'].notna()
+    if missing.any():
+        stored[missing] = duration_seconds(df.loc[missing, 'duration'])
+    df['duration_seconds'] = stored
+    return df
+
+def _whole_number_counters(df):
+    """The CSV held views and likes as floats (9610.0)."""
+    for column in ('views', 'likes'):
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').round().astype('Int64')
+    return df
+
+def _add_stats_refreshed_at(df):
+    """The refresh scheduler tracks when the stats of each video were last fetched."""
+    if 'stats_refreshed_at' in df.columns:
+        df['stats_refreshed_at'], _ = normalize_timestamps(df['stats_refreshed_at'])
+    else:
+        df['stats_refreshed_at'] = pd.Series(pd.NaT, index=df.index, dtype='datetime64[us, UTC]')
+    return df
+
+# (version, description, migration), applied in order to stores below that version
+MIGRATIONS = [
+    (1, "Rename API field names to the store's column names", _rename_api_fields),
+    (2, "Parse publish dates in either stored format to UTC", _parse_timestamps),
+    (3, "Fill duration_seconds from the ISO 8601 duration", _fill_duration_seconds),
+    (4, "Store views and likes as whole numbers", _whole_number_counters),
+    (5, "Add stats_refreshed_at for the refresh scheduler", _add_stats_refreshed_at),
+]
+
+if MIGRATIONS[-1][0] != SCHEMA_VERSION:
+    raise RuntimeError(f"The last migration ({MIGRATIONS[-1][0]}) does not match SCHEMA_VERSION ({SCHEMA_VERSION})")
+
+def pending_migrations(version):
+    """The migrations a store at version still needs, in order."""
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+def migrate_chunk(df, version):
+    """Apply the pending migrations of a store at version to a chunk of its rows."""
+    for _, _, migration in pending_migrations(version):
+        df = migration(df)
+    return df
+
+def _read_chunks(path, chunk_size):
+    """Stream a CSV file or a store as DataFrames of up to chunk_size rows, as they are stored."""
+    if path.endswith('.csv'):
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif is_sqlite_store(path):
+        yield from sqlite_store.iter_chunks(path, chunk_size)
+    else:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+def convert(source_path, path=STORE_PATH, chunk_size=None):
+    """
+    Stream a CSV file or a store into path through the migrations it still needs, replacing path in
+    one step once every chunk is written, and rebuild its weekly aggregates.
+    Callers must hold the store lock of path.
+    Returns the number of videos written.
+    """
+    chunk_size = chunk_size if chunk_size else MIGRATION_CHUNK_SIZE
+    version = 0 if source_path.endswith('.csv') else schema_version(source_path)
+    chunks = (migrate_chunk(df, version) for df in _read_chunks(source_path, chunk_size))
+    written = save_chunks(chunks, path, version=SCHEMA_VERSION)
+    rebuild_weekly_stats(path)
+    return written
+
+def migrate(path=STORE_PATH, source_path=None, chunk_size=None):
+    """
+    Bring the store up to SCHEMA_VERSION, streaming it in chunks so memory stays constant
+    whatever the size of the store. The store is replaced in one step once every chunk is
+    written; the new version is only recorded then.
+    Without source_path, legacy data is imported first if there is no store yet, and weekly
+    aggregates that are missing or left behind by a failed write are rebuilt. The ingest worker
+    runs this before every ingest, so the dashboard's readers never have to write.
+
+    Parameters:
+    - path: Path of the store
+    - source_path: Read the videos from this file (a CSV, or a store in the other format)
+      and replace the store with them. CSV files have no version, all migrations run on them.
+    - chunk_size: Rows per chunk (defaults to MIGRATION_CHUNK_SIZE)
+
+    Returns:
+    - Number of videos written, 0 if the store was already up to date
+    """
+    if not source_path:
+        # Takes the lock itself
+        import_legacy(path)
+    with store_lock(path):
+        source_path = source_path if source_path else path
+        version = 0 if source_path.endswith('.csv') else schema_version(source_path)
+        if version is None:
+            print(f"No store at {source_path}, nothing to migrate")
+            return 0
+
+        migrations = pending_migrations(version)
+        if not migrations and source_path == path:
+            print(f"{path} is at schema version {version}, nothing to migrate")
+            ensure_weekly_stats(path)
+            return 0
+
+        for number, description, _ in migrations:
+            print(f"Migration {number}: {description}")
+        written = convert(source_path, path, chunk_size)
+
+    print(f"Migrated {written} videos from {source_path} to schema version {SCHEMA_VERSION}")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the video store to the current schema")
+    parser.add_argument('command', choices=['status', 'migrate'])
+    parser.add_argument('--store', default=STORE_PATH, help="Path of the store (.sqlite or .parquet)")
+    parser.add_argument('--source', help="CSV or store to migrate into --store (default: migrate --store in place)")
+    parser.add_argument('--chunk-size', type=int, default=MIGRATION_CHUNK_SIZE, help="Rows read and written at a time")
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        version = schema_version(args.store)
+        if version is None:
+            print(f"No store at {args.store}")
+        else:
+            print(f"{args.store} is at schema version {version} of {SCHEMA_VERSION}")
+            for number, description, _ in pending_migrations(version):
+                print(f"  pending migration {number}: {description}")
+    else:
+        migrate(args.store, args.source, args.chunk_size)
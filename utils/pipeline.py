@@ -0,0 +1,181 @@
+import queue
+import threading
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.api_client import (
+    details_frame, fetch_top_youtubers_videos, fetch_video_details_batch, print_fetch_stats, reset_transfer_stats
+)
+from utils.data_processor import process_video_data
+from utils.fetch_state import record_channel_fetches
+from utils import http_cache
+from config.settings import PIPELINE_QUEUE_DEPTH, PIPELINE_FLUSH_SIZE
+
+# Put on a queue after its last item
+_DONE = object()
+# Seconds a stage waits on a full or empty queue before checking whether the ingest was cancelled
+_POLL_INTERVAL = 0.1
+
+class _Cancelled(Exception):
+    """Raised inside a stage once another stage failed, so the whole ingest ends."""
+
+def _put(q, item, cancelled):
+    """Put item on the bounded queue q, waiting for room unless the ingest gets cancelled."""
+    while not cancelled.is_set():
+        try:
+            q.put(item, timeout=_POLL_INTERVAL)
+            return
+        except queue.Full:
+            pass
+    raise _Cancelled()
+
+def _get(q, cancelled):
+    """Take the next item off q, waiting for one unless the ingest gets cancelled."""
+    while not cancelled.is_set():
+        try:
+            return q.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+    raise _Cancelled()
+
+def run_streaming_ingest(channel_ids, store_path, queue_depth=None, flush_size=None, **fetch_kwargs):
+    """
+    Fetch, enrich and store videos with all three phases overlapping.
+    Search pages are pushed onto a bounded queue by the channel fetch workers while this
+    thread sends a videos.list call for every 50 IDs as soon as they are available, joining
+    every flush_size enriched videos with their details in one keyed merge. A writer thread
+    stores each flush while the next one is enriched.
+    Memory stays bounded by the queue depth (in pages) plus two flush buffers.
+    If enriching or storing fails, the fetch workers and the other stages stop and the error
+    is raised; if fetching fails, the videos fetched so far are still stored before it is raised.
+    The channels' fetch times are recorded only once all their videos are stored.
+
+    Parameters:
+    - channel_ids: List of YouTube channel IDs
+    - store_path: Path of the video store
+    - queue_depth: Maximum number of search pages waiting for enrichment (defaults to PIPELINE_QUEUE_DEPTH)
+    - flush_size: Number of enriched videos written to the store at once (defaults to PIPELINE_FLUSH_SIZE)
+    - fetch_kwargs: Passed on to fetch_top_youtubers_videos
+
+    Returns the number of videos stored.
+    """
+    queue_depth = queue_depth if queue_depth else PIPELINE_QUEUE_DEPTH
+    flush_size = flush_size if flush_size else PIPELINE_FLUSH_SIZE
+
+    # Fetch workers block here when enrichment falls behind
+    page_queue = queue.Queue(maxsize=queue_depth)
+    # Enrichment blocks here when the store writer falls behind
+    store_queue = queue.Queue(maxsize=1)
+    # Set by the first failing stage (other than fetching), the others stop at their next queue operation
+    cancelled = threading.Event()
+    producer_errors = []
+    errors = []
+    fetched = []  # (channel_ids, fetched_at) of the channels fetched without errors
+    stored = 0
+
+    def produce():
+        try:
+            fetch_top_youtubers_videos(
+                channel_ids,
+                on_page=lambda page: _put(page_queue, page, cancelled),
+                on_fetched=lambda fetched_ids, fetched_at: fetched.append((fetched_ids, fetched_at)),
+                **fetch_kwargs
+            )
+        except _Cancelled:
+            return
+        except Exception as e:
+            producer_errors.append(e)
+        try:
+            _put(page_queue, _DONE, cancelled)
+        except _Cancelled:
+            pass
+
+    def store():
+        nonlocal stored
+        try:
+            while True:
+                videos = _get(store_queue, cancelled)
+                if videos is _DONE:
+                    break
+                process_video_data(videos, store_path)
+                stored += len(videos)
+        except _Cancelled:
+            pass
+        except Exception as e:
+            errors.append(e)
+            cancelled.set()
+
+    http_cache.reset_cache_stats()
+    reset_transfer_stats()
+    producer = threading.Thread(target=produce, name="youtube-fetch", daemon=True)
+    writer = threading.Thread(target=store, name="store-writer", daemon=True)
+    # Let both threads report errors on the page when running inside Streamlit
+    for thread in (producer, writer):
+        add_script_run_ctx(thread, get_script_run_ctx())
+        thread.start()
+
+    pending = []  # Videos waiting for a full batch of 50
+    enriched = []  # Search results whose details were fetched, waiting to be handed to the writer
+    details = []  # Details frames of the enriched videos
+    api_errors = []
+
+    def enrich(batch):
+        batch_details, batch_errors = fetch_video_details_batch([video['video_id'] for video in batch])
+        api_errors.extend(batch_errors)
+        details.append(details_frame(batch_details))
+        enriched.extend(batch)
+
+    def flush():
+        if enriched:
+            # Videos without details (e.g. removed meanwhile) are stored without stats
+            videos = pd.DataFrame(enriched).merge(
+                pd.concat(details, ignore_index=True).drop_duplicates('video_id'), on='video_id', how='left'
+            )
+            enriched.clear()
+            details.clear()
+            _put(store_queue, videos, cancelled)
+
+    try:
+        while True:
+            page = _get(page_queue, cancelled)
+            if page is _DONE:
+                break
+
+            pending.extend(page)
+            while len(pending) >= 50:
+                enrich(pending[:50])
+                del pending[:50]
+
+            if len(enriched) >= flush_size:
+                flush()
+
+        # Whatever is left after the last page
+        if pending:
+            enrich(pending)
+        flush()
+        _put(store_queue, _DONE, cancelled)
+    except _Cancelled:
+        pass
+    except Exception as e:
+        errors.append(e)
+        cancelled.set()
+
+    producer.join()
+    writer.join()
+    print_fetch_stats()
+    print(f"Streaming ingest stored {stored} videos")
+
+    if api_errors:
+        st.error("YouTube API Errors (video details):")
+        for error in api_errors:
+            st.error(error)
+
+    if errors:
+        raise errors[0]
+    # Every flush is stored, so the fetched channels need no refetch for a while
+    for fetched_ids, fetched_at in fetched:
+        record_channel_fetches(fetched_ids, fetched_at)
+    if producer_errors:
+        raise producer_errors[0]
+
+    return stored
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from utils.api_client import details_frame, fetch_video_details_batch, print_fetch_stats, reset_transfer_stats
+from utils.data_processor import process_video_data
+from utils import http_cache
+from utils.store import load_videos, store_exists, normalize_timestamps
+from config.settings import STORE_PATH, STATS_REFRESH_TIERS, STATS_REFRESH_QUOTA
+
+def refresh_intervals(ages):
+    """
+    Map video ages (a Series of timedeltas) to how often their stats should be refreshed,
+    using STATS_REFRESH_TIERS. Returns a Series of intervals in seconds.
+    """
+    age_seconds = ages.dt.total_seconds().to_numpy()
+    conditions = [age_seconds < max_age for max_age, _ in STATS_REFRESH_TIERS if max_age is not None]
+    choices = [interval for max_age, interval in STATS_REFRESH_TIERS if max_age is not None]
+    default = [interval for max_age, interval in STATS_REFRESH_TIERS if max_age is None][0]
+    return pd.Series(np.select(conditions, choices, default=default), index=ages.index)
+
+def get_due_videos(df, now=None):
+    """
+    Find the stored videos whose stats are due for a refresh.
+    Videos that were never refreshed are always due. The result is ordered by how
+    overdue each video is relative to its own interval, most overdue first.
+    """
+    now = pd.Timestamp(now if now is not None else datetime.now(timezone.utc))
+    df = df.copy()
+    df['published_at'], _ = normalize_timestamps(df['published_at'])
+    df = df.dropna(subset=['video_id', 'published_at'])
+
+    if 'stats_refreshed_at' in df.columns:
+        refreshed_at, _ = normalize_timestamps(df['stats_refreshed_at'])
+    else:
+        refreshed_at = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns, UTC]')
+
+    df['refresh_interval'] = refresh_intervals(now - df['published_at'])
+    since_refresh = (now - refreshed_at).dt.total_seconds()
+    # Never refreshed counts as infinitely overdue
+    df['overdue'] = (since_refresh / df['refresh_interval']).fillna(np.inf)
+
+    due = df[df['overdue'] >= 1]
+    return due.sort_values('overdue', ascending=False, kind='stable')
+
+def plan_stats_refresh(df, quota_budget=None, now=None):
+    """
+    Pack the due videos into videos.list batches of 50 IDs.
+    Each batch costs one quota unit, so at most quota_budget batches are planned
+    (defaults to STATS_REFRESH_QUOTA). Only the last batch can be partially filled.
+    The most overdue videos are picked, then packed in ID order, so the same due videos
+    form the same batches (and hit the response cache) from run to run.
+    Returns a list of batches, each a list of video IDs.
+    """
+    quota_budget = STATS_REFRESH_QUOTA if quota_budget is None else quota_budget
+    video_ids = get_due_videos(df, now)['video_id'].drop_duplicates().tolist()
+    video_ids = sorted(video_ids[:quota_budget * 50])
+    return [video_ids[i:i+50] for i in range(0, len(video_ids), 50)]
+
+def run_stats_refresh(store_path=STORE_PATH, quota_budget=None, now=None):
+    """
+    Refresh views and likes for the stored videos that are due, within the quota budget.
+    Every video of a batch the API answered is stamped as refreshed, also those it no longer
+    returns (deleted or private videos), so they wait for their next refresh like the others.
+    Videos of failed batches stay due and are retried on the next run.
+    Returns a tuple of (number of videos whose stats were refreshed, api_errors).
+    """
+    if not store_exists(store_path):
+        print("No stored videos to refresh")
+        return 0, []
+
+    df = load_videos(store_path, columns=['video_id', 'published_at', 'stats_refreshed_at'])
+    batches = plan_stats_refresh(df, quota_budget, now)
+
+    if not batches:
+        print("No video stats are due for a refresh")
+        return 0, []
+
+    print(f"Refreshing stats for {sum(len(batch) for batch in batches)} videos in {len(batches)} batches")
+    http_cache.reset_cache_stats()
+    reset_transfer_stats()
+
+    frames = []
+    api_errors = []
+    for batch in batches:
+        details, errors = fetch_video_details_batch(batch)
+        if errors:
+            api_errors.extend(errors)
+            continue
+        stats = details_frame(details)[['video_id', 'views', 'likes']]
+        frames.append(pd.DataFrame({'video_id': batch}).merge(stats, on='video_id', how='left'))
+
+    print_fetch_stats()
+    if api_errors:
+        print(f"{len(api_errors)} batches failed, their videos are retried on the next run")
+
+    if not frames:
+        return 0, api_errors
+
+    updates = pd.concat(frames, ignore_index=True)
+    updates['stats_refreshed_at'] = pd.Timestamp.now(tz='UTC')
+    missing = int(updates['views'].isna().sum())
+    if missing:
+        print(f"{missing} videos were not returned by the API (deleted or private), keeping their stored stats")
+    process_video_data(updates, store_path)
+
+    return len(updates) - missing, api_errors
+
+if __name__ == "__main__":
+    run_stats_refresh()
@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import pandas as pd
+
+# Timestamps are stored as fixed-width UTC text, so comparing strings compares times
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    channel_id TEXT,
+    video_title TEXT,
+    channel_title TEXT,
+    published_at TEXT,
+    description TEXT,
+    thumbnail_url TEXT,
+    views INTEGER,
+    likes INTEGER,
+    duration TEXT,
+    duration_seconds INTEGER,
+    stats_refreshed_at TEXT
+)
+"""
+
+_CREATE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_videos_channel_published ON videos (channel_id, published_at)",
+    # The dashboards filter on the channel title they display
+    "CREATE INDEX IF NOT EXISTS idx_videos_title_published ON videos (channel_title, published_at)",
+]
+
+def connect(path):
+    """Open the SQLite store, creating the table and indexes if needed."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    # Write-ahead logging: readers never block on a writer and see the last committed version
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(_CREATE_TABLE)
+    for statement in _CREATE_INDEXES:
+        conn.execute(statement)
+    return conn
+
+def _to_rows(df, columns, timestamp_columns):
+    """Turn a store frame into parameter tuples: timestamps as text, missing values as NULL."""
+    df = df[columns].copy()
+    for column in timestamp_columns:
+        df[column] = df[column].dt.strftime(TIME_FORMAT)
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+def upsert(path, df, columns, timestamp_columns):
+    """
+    Insert new videos and refresh the stats of known ones in one transaction.
+    Known videos keep their stored views, likes and refresh time where the batch has none.
+    Returns the number of rows written.
+    """
+    placeholders = ', '.join('?' for _ in columns)
+    sql = (
+        f"INSERT INTO videos ({', '.join(columns)}) VALUES ({placeholders}) "
+        "ON CONFLICT (video_id) DO UPDATE SET "
+        "views = COALESCE(excluded.views, videos.views), "
+        "likes = COALESCE(excluded.likes, videos.likes), "
+        "stats_refreshed_at = COALESCE(excluded.stats_refreshed_at, videos.stats_refreshed_at)"
+    )
+    rows = _to_rows(df, columns, timestamp_columns)
+
+    conn = connect(path)
+    try:
+        with conn:
+            conn.executemany(sql, rows)
+    finally:
+        conn.close()
+    return len(rows)
+
+def replace_all(path, frames, columns, timestamp_columns, schema_version):
+    """
+    Replace the whole table with the rows of frames (an iterable of store frames) in one
+    transaction, and record schema_version. Only one frame is held in memory at a time.
+    """
+    placeholders = ', '.join('?' for _ in columns)
+    sql = f"INSERT OR REPLACE INTO videos ({', '.join(columns)}) VALUES ({placeholders})"
+    written = 0
+
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM videos")
+            for df in frames:
+                rows = _to_rows(df, columns, timestamp_columns)
+                conn.executemany(sql, rows)
+                written += len(rows)
+            conn.execute(f"PRAGMA user_version = {int(schema_version)}")
+    finally:
+        conn.close()
+    return written
+
+def schema_version(path):
+    """The schema version recorded in the database (0 if none was recorded)."""
+    conn = connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+def set_schema_version(path, version):
+    conn = connect(path)
+    try:
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+    finally:
+        conn.close()
+
+def iter_chunks(path, chunk_size):
+    """
+    Read the whole table as untyped DataFrames of up to chunk_size rows.
+    The reads see the table as it was when the first chunk was read, even if it is replaced meanwhile.
+    """
+    conn = connect(path)
+    try:
+        yield from pd.read_sql_query("SELECT * FROM videos ORDER BY rowid", conn, chunksize=chunk_size)
+    finally:
+        conn.close()
+
+def _where(video_ids=None, channel_ids=None, channel_titles=None, start=None, end=None, min_duration_seconds=None):
+    """Build a parameterized WHERE clause for the filters that are set."""
+    clauses, params = [], []
+    if video_ids is not None:
+        clauses.append(f"video_id IN ({', '.join('?' for _ in video_ids)})")
+        params.extend(video_ids)
+    if channel_ids is not None:
+        clauses.append(f"channel_id IN ({', '.join('?' for _ in channel_ids)})")
+        params.extend(channel_ids)
+    if channel_titles is not None:
+        clauses.append(f"channel_title IN ({', '.join('?' for _ in channel_titles)})")
+        params.extend(channel_titles)
+    if start is not None:
+        clauses.append("published_at >= ?")
+        params.append(start.strftime(TIME_FORMAT))
+    if end is not None:
+        clauses.append("published_at < ?")
+        params.append(end.strftime(TIME_FORMAT))
+    if min_duration_seconds is not None:
+        clauses.append("duration_seconds >= ?")
+        params.append(int(min_duration_seconds))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def query(path, columns, **filters):
+    """
+    Read the given columns for the rows matching the filters.
+    start is inclusive and end exclusive, both UTC timestamps.
+    Returns an untyped DataFrame, see store.load_videos for the typed one.
+    """
+    where, params = _where(**filters)
+    conn = connect(path)
+    try:
+        return pd.read_sql_query(f"SELECT {', '.join(columns)} FROM videos{where}", conn, params=params)
+    finally:
+        conn.close()
@@ -0,0 +1,197 @@
+import argparse
+import glob
+import os
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime, timezone
+from utils.atomic_file import atomic_write
+from config.settings import HISTORY_PATH, HISTORY_DOWNSAMPLE
+
+# One row per observation of a video's stats. The video store only keeps the latest
+# values, so it stays the place to read the current state; this log keeps the past.
+SCHEMA = pa.schema([
+    ('video_id', pa.string()),
+    ('observed_at', pa.timestamp('us', tz='UTC')),
+    ('views', pa.int64()),
+    ('likes', pa.int64()),
+])
+
+_PARTITIONING = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+
+def _partition_dir(day, history_path):
+    return os.path.join(history_path, f"date={day}")
+
+def _write_file(df, path):
+    """Write a snapshot frame as one Parquet file, renamed into place once complete."""
+    table = pa.Table.from_pandas(df[SCHEMA.names], preserve_index=False).cast(SCHEMA)
+    atomic_write(path, lambda f: pq.write_table(table, f, compression='zstd'))
+
+def append_snapshots(video_data, history_path=HISTORY_PATH):
+    """
+    Append the views and likes observed in a batch to the history log.
+    Rows without stats are skipped; observed_at is the row's stats_refreshed_at (now if missing).
+    Each day of observations gets a new file, so the cost only depends on the batch size.
+    Returns the number of snapshots written.
+    """
+    if video_data is None or len(video_data) == 0:
+        return 0
+
+    df = pd.DataFrame({
+        'video_id': video_data['video_id'],
+        'views': pd.to_numeric(video_data['views'], errors='coerce') if 'views' in video_data else None,
+        'likes': pd.to_numeric(video_data['likes'], errors='coerce') if 'likes' in video_data else None,
+    })
+    if 'stats_refreshed_at' in video_data:
+        df['observed_at'] = pd.to_datetime(video_data['stats_refreshed_at'], errors='coerce', utc=True)
+    else:
+        df['observed_at'] = pd.NaT
+    df['observed_at'] = df['observed_at'].fillna(pd.Timestamp.now(tz='UTC'))
+    df = df[df['views'].notna() | df['likes'].notna()]
+    df = df.dropna(subset=['video_id'])
+
+    if df.empty:
+        return 0
+
+    # Unique per process and call, so concurrent writers never collide
+    file_name = f"part-{time.time_ns()}-{os.getpid()}.parquet"
+    for day, day_snapshots in df.groupby(df['observed_at'].dt.strftime('%Y-%m-%d')):
+        os.makedirs(_partition_dir(day, history_path), exist_ok=True)
+        _write_file(day_snapshots, os.path.join(_partition_dir(day, history_path), file_name))
+
+    return len(df)
+
+def load_history(video_ids=None, start=None, end=None, history_path=HISTORY_PATH):
+    """
+    Load the stats snapshots, oldest first. Only the date partitions in the requested
+    range are opened, so reading recent history does not scan the whole log.
+
+    Parameters:
+    - video_ids: Only return snapshots of these videos
+    - start / end: Only return snapshots observed in [start, end), as UTC timestamps
+
+    Returns:
+    - DataFrame with video_id, observed_at, views and likes
+    """
+    if not os.path.isdir(history_path):
+        return pd.DataFrame({name: pd.Series(dtype='object') for name in SCHEMA.names})
+
+    dataset = ds.dataset(history_path, format='parquet', partitioning=_PARTITIONING, schema=SCHEMA.append(pa.field('date', pa.string())))
+
+    condition = None
+    def add(expression):
+        return expression if condition is None else condition & expression
+
+    if start is not None:
+        start = pd.Timestamp(start)
+        condition = add(ds.field('date') >= start.strftime('%Y-%m-%d'))
+        condition = add(ds.field('observed_at') >= start)
+    if end is not None:
+        end = pd.Timestamp(end)
+        condition = add(ds.field('date') <= end.strftime('%Y-%m-%d'))
+        condition = add(ds.field('observed_at') < end)
+    if video_ids is not None:
+        condition = add(ds.field('video_id').isin(list(video_ids)))
+
+    table = dataset.to_table(columns=SCHEMA.names, filter=condition)
+    df = table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+    return df.sort_values(['observed_at', 'video_id'], kind='stable', ignore_index=True)
+
+def _period_start(observed_at, resolution):
+    """Start of the hour ('h'), day ('D') or Monday-based week ('W') each timestamp falls in."""
+    if resolution == 'W':
+        return observed_at.dt.tz_localize(None).dt.to_period('W').dt.start_time.dt.tz_localize('UTC')
+    return observed_at.dt.floor(resolution)
+
+def _target_resolution(day, now):
+    """The resolution a date partition should be kept at, or None while it is recent enough to keep raw."""
+    # Age of the newest possible snapshot in the partition
+    age = (now - (pd.Timestamp(day, tz='UTC') + pd.Timedelta(days=1))).total_seconds()
+    resolution = None
+    for min_age, tier_resolution in HISTORY_DOWNSAMPLE:
+        if age >= min_age:
+            resolution = tier_resolution
+    return resolution
+
+def compact_history(now=None, history_path=HISTORY_PATH):
+    """
+    Downsample old snapshots following HISTORY_DOWNSAMPLE: within each period only the last
+    snapshot of every video is kept. Weekly snapshots are moved to the partition of their
+    week's Monday. Partitions already compacted to their resolution are left alone, so
+    each run only reads the partitions that crossed an age threshold.
+    Must not run concurrently with another compaction (the ingestion worker holds its lock).
+    Returns a dictionary with the numbers of partitions compacted, rows read and rows kept.
+    """
+    now = pd.Timestamp(now if now is not None else datetime.now(timezone.utc))
+    stats = {'partitions': 0, 'rows_read': 0, 'rows_kept': 0}
+
+    # Group the partitions that need work by the resolution they move to
+    pending = {}
+    for directory in sorted(glob.glob(os.path.join(history_path, 'date=*'))):
+        day = os.path.basename(directory)[len('date='):]
+        resolution = _target_resolution(day, now)
+        if resolution is None:
+            continue
+        files = sorted(glob.glob(os.path.join(directory, '*.parquet')))
+        if files == [os.path.join(directory, f"compacted-{resolution}.parquet")] or not files:
+            continue
+        pending.setdefault(resolution, []).extend(files)
+
+    for resolution, files in pending.items():
+        df = ds.dataset(files, format='parquet', schema=SCHEMA).to_table().to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+        stats['rows_read'] += len(df)
+
+        # Keep the last snapshot of every video in each period
+        df['period'] = _period_start(df['observed_at'], resolution)
+        df = df.sort_values('observed_at', kind='stable')
+        df = df.drop_duplicates(subset=['video_id', 'period'], keep='last')
+
+        # Weekly periods can start in an earlier partition than the snapshot's own day
+        written = set()
+        for day, day_snapshots in df.groupby(df['period'].dt.strftime('%Y-%m-%d')):
+            directory = _partition_dir(day, history_path)
+            os.makedirs(directory, exist_ok=True)
+            target = os.path.join(directory, f"compacted-{resolution}.parquet")
+            day_snapshots = day_snapshots.assign(carried=False)
+            if os.path.exists(target) and target not in files:
+                # A later day of an already compacted week: merge with what is there
+                compacted = pq.read_table(target).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+                compacted['period'] = _period_start(compacted['observed_at'], resolution)
+                day_snapshots = pd.concat([compacted.assign(carried=True), day_snapshots], ignore_index=True)
+                day_snapshots = day_snapshots.sort_values('observed_at', kind='stable')
+                day_snapshots = day_snapshots.drop_duplicates(subset=['video_id', 'period'], keep='last')
+            _write_file(day_snapshots, target)
+            written.add(target)
+            # Snapshots carried over from an earlier compaction were counted by it
+            stats['rows_kept'] += int((~day_snapshots['carried']).sum())
+
+        # Only remove the inputs once every compacted file is in place
+        for path in files:
+            if path not in written:
+                os.remove(path)
+        for directory in {os.path.dirname(path) for path in files}:
+            if not os.listdir(directory):
+                os.rmdir(directory)
+        stats['partitions'] += len({os.path.dirname(path) for path in files})
+
+    if stats['partitions']:
+        print(f"Compacted {stats['partitions']} history partitions: {stats['rows_read']} snapshots down to {stats['rows_kept']}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain or inspect the stats history log")
+    parser.add_argument('command', choices=['compact', 'show'])
+    parser.add_argument('--path', default=HISTORY_PATH, help="Directory of the history log")
+    parser.add_argument('--video', action='append', help="Only show snapshots of this video (repeatable)")
+    parser.add_argument('--days', type=int, default=7, help="Show snapshots of the last DAYS days")
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        compact_history(history_path=args.path)
+    else:
+        start = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=args.days)
+        history = load_history(args.video, start=start, history_path=args.path)
+        print(history.to_string(index=False) if not history.empty else "No snapshots")
@@ -0,0 +1,319 @@
+import argparse
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from utils import sqlite_store
+from utils.atomic_file import atomic_write
+from utils.file_lock import FileLock
+from config.settings import STORE_PATH, CSV_FILE_PATH, LEGACY_STORE_PATHS
+
+# Declared schema of the video store. Channel fields repeat on every row, so they are dictionary encoded.
+SCHEMA = pa.schema([
+    ('video_id', pa.string()),
+    ('channel_id', pa.dictionary(pa.int32(), pa.string())),
+    ('video_title', pa.string()),
+    ('channel_title', pa.dictionary(pa.int32(), pa.string())),
+    ('published_at', pa.timestamp('us', tz='UTC')),
+    ('description', pa.string()),
+    ('thumbnail_url', pa.string()),
+    ('views', pa.int64()),
+    ('likes', pa.int64()),
+    ('duration', pa.string()),
+    ('duration_seconds', pa.int64()),
+    ('stats_refreshed_at', pa.timestamp('us', tz='UTC')),
+])
+
+STORE_COLUMNS = SCHEMA.names
+_TIMESTAMP_COLUMNS = [field.name for field in SCHEMA if pa.types.is_timestamp(field.type)]
+_INTEGER_COLUMNS = [field.name for field in SCHEMA if pa.types.is_integer(field.type)]
+
+# Version of the stored data, recorded in the store. Raised with every migration in utils/migrations.py.
+SCHEMA_VERSION = 5
+
+def is_sqlite_store(path=STORE_PATH):
+    """The store backend follows the file extension: SQLite for .sqlite/.db, Parquet otherwise."""
+    return os.path.splitext(path)[1].lower() in ('.sqlite', '.sqlite3', '.db')
+
+def _legacy_source(path):
+    for source in LEGACY_STORE_PATHS:
+        if os.path.abspath(source) != os.path.abspath(path) and os.path.exists(source):
+            return source
+    return None
+
+def import_legacy(path=STORE_PATH):
+    """
+    Import the legacy data if the store does not exist yet. Returns whether the store exists afterwards.
+    Takes the store lock while importing, so it must not be called while holding it.
+    """
+    if os.path.exists(path):
+        return True
+    source = _legacy_source(path)
+    if source is None:
+        return False
+    with store_lock(path):
+        # Another process may have imported it while we waited
+        if not os.path.exists(path):
+            import_videos(source, path)
+    return True
+
+def store_lock(path=STORE_PATH):
+    """
+    Inter-process lock writers hold around a read-merge-write of the store.
+    Readers never take it: every write replaces the store atomically (or is one SQLite
+    transaction), so they see either the old or the new version.
+    """
+    return FileLock(f"{path}.lock")
+
+def schema_version(path=STORE_PATH):
+    """
+    The schema version recorded in the store: 0 for stores written before versioning
+    (see utils/migrations.py), None if there is no store.
+    """
+    if not os.path.exists(path):
+        return None
+    if is_sqlite_store(path):
+        return sqlite_store.schema_version(path)
+    metadata = pq.read_schema(path).metadata or {}
+    return int(metadata.get(b'schema_version', 0))
+
+def store_exists(path=STORE_PATH):
+    """Check whether there is any stored data, either in the store or in a legacy file still to be imported."""
+    return os.path.exists(path) or _legacy_source(path) is not None
+
+def normalize_timestamps(values):
+    """
+    Parse a column of timestamps to UTC in one vectorized pass.
+    The API's '2024-04-15T09:04:24Z' and the older '2024-04-15 09:04:24+00:00' are parsed by a
+    fixed-format fast path; anything else in ISO 8601 (other offsets, fractional seconds) falls
+    back to pandas for just those rows.
+
+    Returns:
+    - Tuple of (Series of datetime64[us, UTC] with the index of values, number of non-empty values that could not be parsed)
+    """
+    values = pd.Series(values, copy=False)
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return values.dt.tz_convert('UTC').astype('datetime64[us, UTC]'), 0
+
+    strings = pa.array(values.astype('string'), type=pa.string())
+    suffix = pc.utf8_slice_codeunits(strings, 19, 32)
+    fixed = pc.and_(pc.equal(pc.utf8_length(strings), pc.add(19, pc.utf8_length(suffix))),
+                    pc.is_in(suffix, value_set=pa.array(['Z', '+00:00'])))
+    core = pc.replace_substring(pc.utf8_slice_codeunits(strings, 0, 19), ' ', 'T')
+    parsed = pc.strptime(core, format='%Y-%m-%dT%H:%M:%S', unit='us', error_is_null=True)
+    # strptime rolls impossible days and seconds over (Feb 30 becomes Mar 1), so they must read back unchanged
+    for component, start in ((pc.day, 8), (pc.second, 17)):
+        read_back = pc.utf8_lpad(pc.cast(component(parsed), pa.string()), 2, '0')
+        fixed = pc.and_(fixed, pc.equal(read_back, pc.utf8_slice_codeunits(core, start, start + 2)))
+    parsed = pc.if_else(pc.fill_null(fixed, False), parsed, pa.scalar(None, parsed.type))
+
+    result = pd.Series(parsed.to_numpy(zero_copy_only=False), index=values.index).dt.tz_localize('UTC')
+    rest = result.isna() & values.notna()
+    if rest.any():
+        result[rest] = pd.to_datetime(values[rest], errors='coerce', utc=True, format='ISO8601')
+
+    present = pc.fill_null(pc.greater(pc.utf8_length(pc.utf8_trim_whitespace(strings)), 0), False)
+    return result, int((result.isna() & present.to_numpy(zero_copy_only=False)).sum())
+
+def to_store_frame(df):
+    """
+    Coerce a frame to the store schema: add missing columns, drop unknown ones and fix the types.
+    Timestamps become UTC datetimes and counters nullable integers.
+    """
+    df = df.copy()
+    for column in STORE_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+
+    for column in _TIMESTAMP_COLUMNS:
+        df[column], _ = normalize_timestamps(df[column])
+
+    for column in _INTEGER_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce').round().astype('Int64')
+
+    return df[STORE_COLUMNS]
+
+def _to_table(df):
+    table = pa.Table.from_pandas(to_store_frame(df), preserve_index=False)
+    return table.cast(SCHEMA)
+
+def day_bounds(start_date, end_date):
+    """
+    Turn an inclusive range of UTC dates, as picked in the dashboards, into the
+    start (inclusive) and end (exclusive) timestamps load_videos filters on.
+    """
+    start = pd.Timestamp(start_date).tz_localize('UTC')
+    end = pd.Timestamp(end_date).tz_localize('UTC') + pd.Timedelta(days=1)
+    return start, end
+
+def _parquet_filters(video_ids=None, channel_ids=None, channel_titles=None, start=None, end=None, min_duration_seconds=None):
+    filters = []
+    if video_ids is not None:
+        filters.append(('video_id', 'in', list(video_ids)))
+    if channel_ids is not None:
+        filters.append(('channel_id', 'in', list(channel_ids)))
+    if channel_titles is not None:
+        filters.append(('channel_title', 'in', list(channel_titles)))
+    if start is not None:
+        filters.append(('published_at', '>=', start))
+    if end is not None:
+        filters.append(('published_at', '<', end))
+    if min_duration_seconds is not None:
+        filters.append(('duration_seconds', '>=', int(min_duration_seconds)))
+    return filters or None
+
+def load_videos(path=STORE_PATH, columns=None, video_ids=None, channel_ids=None, channel_titles=None,
+                start=None, end=None, min_duration_seconds=None):
+    """
+    Load the stored videos, reading only the requested columns and rows.
+    Never takes the store lock or writes: legacy data (see LEGACY_STORE_PATHS) is only imported
+    by writers (see import_legacy), until then there is nothing to load.
+
+    Parameters:
+    - columns: Columns to read (default: all)
+    - video_ids: Only read these videos
+    - channel_ids / channel_titles: Only read videos of these channels
+    - start / end: Only read videos published in [start, end), as UTC timestamps (see day_bounds)
+    - min_duration_seconds: Only read videos at least this long
+
+    Returns:
+    - DataFrame with typed columns (UTC timestamps, nullable integers), empty if nothing matches
+    """
+    columns = [column for column in columns if column in STORE_COLUMNS] if columns else STORE_COLUMNS
+    empty = to_store_frame(pd.DataFrame())[columns]
+
+    if not os.path.exists(path):
+        return empty
+
+    # An empty selection matches nothing
+    if any(selection is not None and len(selection) == 0 for selection in (video_ids, channel_ids, channel_titles)):
+        return empty
+
+    filters = dict(video_ids=video_ids, channel_ids=channel_ids, channel_titles=channel_titles, start=start, end=end,
+                   min_duration_seconds=min_duration_seconds)
+
+    if is_sqlite_store(path):
+        df = sqlite_store.query(path, columns, **filters)
+        for column in columns:
+            if column in _TIMESTAMP_COLUMNS:
+                df[column], _ = normalize_timestamps(df[column])
+            elif column in _INTEGER_COLUMNS:
+                df[column] = df[column].astype('Int64')
+        return df
+
+    table = pq.read_table(path, columns=columns, filters=_parquet_filters(**filters))
+
+    # Dictionary columns come back as plain strings
+    plain_schema = pa.schema([
+        pa.field(field.name, field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ])
+    table = table.cast(plain_schema)
+    return table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+def summarize_frame(df, shorts_threshold=60):
+    """
+    Summarize an already loaded frame of videos with a publish date.
+
+    Returns:
+    - Dictionary with videos, shorts (duration <= shorts_threshold) and regular counts,
+      the sorted channel_titles, and first_published_at / last_published_at (None if empty)
+    """
+    return {
+        'videos': len(df),
+        'shorts': int((df['duration_seconds'] <= shorts_threshold).sum()),
+        'regular': int((df['duration_seconds'] > shorts_threshold).sum()),
+        'channel_titles': sorted(df['channel_title'].dropna().unique()),
+        'first_published_at': df['published_at'].min() if not df.empty else None,
+        'last_published_at': df['published_at'].max() if not df.empty else None,
+    }
+
+def upsert_videos(df, path=STORE_PATH):
+    """
+    Write a batch into the SQLite store: new videos are inserted, known ones get
+    their views, likes and refresh time updated. Cost grows with the batch, not the store.
+    Returns the number of videos written.
+    """
+    created = not os.path.exists(path)
+    written = sqlite_store.upsert(path, to_store_frame(df), STORE_COLUMNS, _TIMESTAMP_COLUMNS)
+    if created:
+        sqlite_store.set_schema_version(path, SCHEMA_VERSION)
+    return written
+
+def save_videos(df, path=STORE_PATH, version=None):
+    """
+    Write the full video table to the store, replacing the previous version in one step.
+    A crash mid-write leaves the previous version in place. Callers merging with the
+    stored data should hold store_lock.
+    See save_chunks for version.
+    """
+    return save_chunks([df], path, version)
+
+def save_chunks(chunks, path=STORE_PATH, version=None):
+    """
+    Write the full video table from an iterable of frames, replacing the previous version in one step.
+    Only one frame is held in memory at a time.
+
+    Parameters:
+    - chunks: Iterable of DataFrames, coerced to the store schema
+    - version: Schema version to record (default: keep the store's, SCHEMA_VERSION for a new store)
+
+    Returns:
+    - Number of rows written
+    """
+    if version is None:
+        version = schema_version(path)
+        version = SCHEMA_VERSION if version is None else version
+
+    if is_sqlite_store(path):
+        frames = (to_store_frame(df) for df in chunks)
+        return sqlite_store.replace_all(path, frames, STORE_COLUMNS, _TIMESTAMP_COLUMNS, version)
+
+    schema = SCHEMA.with_metadata({b'schema_version': str(version).encode()})
+    written = 0
+    def write(f):
+        nonlocal written
+        with pq.ParquetWriter(f, schema, compression='zstd') as writer:
+            for df in chunks:
+                writer.write_table(_to_table(df).replace_schema_metadata(schema.metadata))
+                written += len(df)
+    atomic_write(path, write)
+    return written
+
+def import_videos(source_path=CSV_FILE_PATH, path=STORE_PATH):
+    """
+    One-time import of a CSV or Parquet file into the store, streamed in chunks through
+    the schema migrations (see utils/migrations.py).
+    Returns the number of imported videos.
+    """
+    # Imported here, the migrations build on this module
+    from utils.migrations import convert
+
+    print(f"Importing {source_path} into {path}")
+    imported = convert(source_path, path)
+    print(f"Imported {imported} videos")
+    return imported
+
+def export_csv(csv_path=CSV_FILE_PATH, path=STORE_PATH):
+    """
+    Export the store as CSV.
+    Returns the number of exported videos.
+    """
+    df = load_videos(path)
+    df.to_csv(csv_path, index=False)
+    print(f"Exported {len(df)} videos to {csv_path}")
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import or export the video store")
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('--file', default=CSV_FILE_PATH, help="CSV (or Parquet, for import) file to import from or export to")
+    parser.add_argument('--store', default=STORE_PATH, help="Path of the store (.sqlite or .parquet)")
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        import_videos(args.file, args.store)
+    else:
+        export_csv(args.file, args.store)
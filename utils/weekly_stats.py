@@ -0,0 +1,217 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.atomic_file import atomic_write
+from utils.store import load_videos
+from config.settings import STORE_PATH, SHORTS_THRESHOLD
+
+# Weekly aggregates of the video store, one row per (channel_title, iso_year, iso_week, is_short).
+# is_short is missing for videos of unknown length. Counts and sums add up, so ingests update
+# only the weeks they touch; the means are derived from them.
+KEY_COLUMNS = ['channel_title', 'iso_year', 'iso_week', 'is_short']
+SUM_COLUMNS = ['videos', 'views_count', 'views_sum', 'likes_count', 'likes_sum']
+# Store columns the aggregates are computed from
+VIDEO_COLUMNS = ['video_id', 'channel_title', 'published_at', 'duration_seconds', 'views', 'likes']
+
+def weekly_stats_path(store_path=STORE_PATH):
+    """
+    The aggregates are kept next to the store they summarize, e.g. data/videos.sqlite.weekly.parquet.
+    Named after the whole store path, so stores differing only in their extension (a new store and
+    the legacy file it was imported from) never share them.
+    """
+    return f"{store_path}.weekly.parquet"
+
+def weekly_stats_pending_path(store_path=STORE_PATH):
+    """Marker left while a store write has not reached the aggregates yet (see begin_weekly_update)."""
+    return f"{store_path}.weekly.pending"
+
+def week_labels(iso_year, iso_week):
+    """Display labels such as '2025-W01' for ISO years and weeks."""
+    return iso_year.astype(str) + "-W" + iso_week.astype(str).str.zfill(2)
+
+def week_starts(iso_year, iso_week):
+    """The Monday (UTC midnight) each ISO week starts on."""
+    return pd.to_datetime(week_labels(iso_year, iso_week) + "-1", format='%G-W%V-%u').dt.tz_localize('UTC')
+
+def _with_means(cells):
+    cells = cells.copy()
+    cells['views_mean'] = cells['views_sum'] / cells['views_count'].where(cells['views_count'] > 0)
+    cells['likes_mean'] = cells['likes_sum'] / cells['likes_count'].where(cells['likes_count'] > 0)
+    return cells
+
+def aggregate(videos, shorts_threshold=SHORTS_THRESHOLD):
+    """
+    Aggregate video rows into weekly cells with the count, sum and mean of views and likes.
+    Videos without a publish date are left out.
+    """
+    videos = videos.dropna(subset=['published_at'])
+    iso = videos['published_at'].dt.isocalendar()
+    frame = pd.DataFrame({
+        'channel_title': videos['channel_title'].astype(object),
+        'iso_year': iso['year'].astype('int32'),
+        'iso_week': iso['week'].astype('int32'),
+        'is_short': (videos['duration_seconds'] <= shorts_threshold).astype('boolean'),
+        'videos': 1,
+        'views_count': videos['views'].notna().astype('int64'),
+        'views_sum': videos['views'].fillna(0).astype('int64'),
+        'likes_count': videos['likes'].notna().astype('int64'),
+        'likes_sum': videos['likes'].fillna(0).astype('int64'),
+    })
+    cells = frame.groupby(KEY_COLUMNS, dropna=False, sort=False)[SUM_COLUMNS].sum().reset_index()
+    return _with_means(cells)
+
+def _save(cells, store_path):
+    table = pa.Table.from_pandas(cells, preserve_index=False)
+    atomic_write(weekly_stats_path(store_path), lambda f: pq.write_table(table, f, compression='zstd'))
+    # The aggregates match the store again
+    if os.path.exists(weekly_stats_pending_path(store_path)):
+        os.remove(weekly_stats_pending_path(store_path))
+
+def weekly_stats_current(store_path=STORE_PATH):
+    """Whether the aggregates are built and not marked out of date by a store write."""
+    return os.path.exists(weekly_stats_path(store_path)) and not os.path.exists(weekly_stats_pending_path(store_path))
+
+def begin_weekly_update(store_path=STORE_PATH):
+    """
+    Mark the aggregates as out of date before writing the store. Saving them (update_weekly_stats
+    or a rebuild) clears the mark, so a write that fails in between leaves it behind: readers
+    then aggregate the store themselves until the next write or migration rebuilds them.
+    Aggregates marked by an earlier failed write are rebuilt first. Callers must hold the store lock.
+    """
+    if os.path.exists(weekly_stats_pending_path(store_path)):
+        print("The last store write did not update the weekly aggregates, rebuilding them")
+        rebuild_weekly_stats(store_path)
+    atomic_write(weekly_stats_pending_path(store_path), lambda f: f.write(b''))
+
+def rebuild_weekly_stats(store_path=STORE_PATH):
+    """
+    Recompute the aggregates from the whole store. Callers must hold the store lock.
+    Returns the aggregates.
+    """
+    cells = aggregate(load_videos(store_path, columns=VIDEO_COLUMNS))
+    _save(cells, store_path)
+    print(f"Rebuilt {len(cells)} weekly aggregates of {store_path}")
+    return cells
+
+def update_weekly_stats(before, after, store_path=STORE_PATH):
+    """
+    Apply an ingest to the aggregates: the cells of the written videos as they were stored
+    before (before) are subtracted and their cells as stored now (after) are added, so only
+    the weeks the ingest touched change. Callers must hold the store lock.
+    """
+    if not os.path.exists(weekly_stats_path(store_path)):
+        return rebuild_weekly_stats(store_path)
+
+    cells = pq.read_table(weekly_stats_path(store_path)).to_pandas()
+    removed = aggregate(before)
+    removed[SUM_COLUMNS] = -removed[SUM_COLUMNS]
+    changes = pd.concat([cells, removed, aggregate(after)], ignore_index=True)
+
+    cells = changes.groupby(KEY_COLUMNS, dropna=False, sort=False)[SUM_COLUMNS].sum().reset_index()
+    cells = _with_means(cells[cells['videos'] > 0])
+    _save(cells, store_path)
+    return cells
+
+def ensure_weekly_stats(store_path=STORE_PATH):
+    """
+    Build the aggregates if the store has none yet, or rebuild them if a store write failed
+    before updating them (see begin_weekly_update). Callers must hold the store lock.
+    Returns whether they were (re)built.
+    """
+    if not os.path.exists(store_path) or weekly_stats_current(store_path):
+        return False
+    rebuild_weekly_stats(store_path)
+    return True
+
+def read_weekly_stats(store_path=STORE_PATH):
+    """
+    Read the aggregates. Readers never take the store lock or write: until the aggregates are
+    built (by migrations and ingests, see ensure_weekly_stats), or while a store write has them
+    marked out of date, the store is aggregated in memory instead.
+    Returns an empty frame if there is no store.
+    """
+    if weekly_stats_current(store_path):
+        return pq.read_table(weekly_stats_path(store_path)).to_pandas()
+    return aggregate(load_videos(store_path, columns=VIDEO_COLUMNS))
+
+def weekly_views(cells, videos, channel_titles=None, start=None, end=None, is_short=None):
+    """
+    Average views per channel and ISO week, read from the aggregates. Weeks cut by start or end
+    are aggregated from videos instead, so the result is the same as grouping the filtered videos.
+
+    Parameters:
+    - cells: The aggregates (see read_weekly_stats)
+    - videos: The videos the page selected, only rows of weeks cut by start or end are used
+    - channel_titles: Only these channels
+    - start / end: Only videos published in [start, end), as UTC timestamps (see store.day_bounds)
+    - is_short: True for shorts, False for regular videos, None for all videos (also those of unknown length)
+
+    Returns:
+    - DataFrame with channel_title, iso_year, iso_week, year_week, year_week_num (for sorting),
+      videos and avg_views, ordered by channel and week
+    """
+    cells = cells[cells['channel_title'].isin(channel_titles)] if channel_titles is not None else cells
+    cell_starts = week_starts(cells['iso_year'], cells['iso_week'])
+    whole = pd.Series(True, index=cells.index)
+    if start is not None:
+        whole &= cell_starts >= start
+    if end is not None:
+        whole &= cell_starts + pd.Timedelta(days=7) <= end
+
+    # Videos in the weeks at the edges of the range
+    published_at = videos['published_at']
+    video_starts = (published_at.dt.floor('D') - pd.to_timedelta(published_at.dt.weekday, unit='D'))
+    cut = pd.Series(False, index=videos.index)
+    if start is not None:
+        cut |= video_starts < start
+    if end is not None:
+        cut |= video_starts + pd.Timedelta(days=7) > end
+
+    cells = pd.concat([cells[whole], aggregate(videos[cut])], ignore_index=True)
+    if is_short is not None:
+        cells = cells[cells['is_short'].eq(is_short).fillna(False)]
+
+    weekly = cells.groupby(['channel_title', 'iso_year', 'iso_week'], sort=True)[SUM_COLUMNS].sum().reset_index()
+    weekly['year_week'] = week_labels(weekly['iso_year'], weekly['iso_week'])
+    weekly['year_week_num'] = weekly['iso_year'] * 100 + weekly['iso_week']
+    weekly['avg_views'] = weekly['views_sum'] / weekly['views_count'].where(weekly['views_count'] > 0)
+    return weekly[['channel_title', 'iso_year', 'iso_week', 'year_week', 'year_week_num', 'videos', 'avg_views']]
+
+def dense_weekly(weekly, channels, fill_value=0):
+    """
+    Expand per-channel weekly values to the full channel × week panel, so every channel has a row
+    for every ISO week from the first to the last week in weekly. Weeks are consecutive Mondays, so
+    years with 53 ISO weeks and weeks spanning New Year are handled.
+
+    Parameters:
+    - weekly: Rows with channel_title and year_week_num (see weekly_views) and any value columns
+    - channels: Channels of the panel, in the order of its rows; rows of other channels are left out
+    - fill_value: Value of the weeks a channel has no row for
+
+    Returns:
+    - DataFrame with channel_title, iso_year, iso_week, year_week, year_week_num and the value
+      columns, ordered by channel (as given) and week
+    """
+    label_columns = ['iso_year', 'iso_week', 'year_week', 'year_week_num']
+    value_columns = [column for column in weekly.columns if column not in ['channel_title'] + label_columns]
+    channels = list(channels)
+    if weekly.empty or not channels:
+        return weekly.iloc[:0].reindex(columns=['channel_title'] + label_columns + value_columns)
+
+    week_nums = weekly['year_week_num']
+    starts = week_starts(week_nums // 100, week_nums % 100)
+    iso = pd.date_range(starts.min(), starts.max(), freq='7D').isocalendar()
+    weeks = pd.DataFrame({'iso_year': iso['year'].to_numpy('int32'), 'iso_week': iso['week'].to_numpy('int32')})
+    weeks['year_week'] = week_labels(weeks['iso_year'], weeks['iso_week'])
+    weeks['year_week_num'] = weeks['iso_year'] * 100 + weeks['iso_week']
+
+    panel_index = pd.MultiIndex.from_product([channels, weeks['year_week_num']], names=['channel_title', 'year_week_num'])
+    keys = pd.MultiIndex.from_arrays([weekly['channel_title'], week_nums])
+    values = weekly[value_columns].set_axis(keys).reindex(panel_index, fill_value=fill_value)
+
+    panel = pd.DataFrame({'channel_title': np.repeat(channels, len(weeks))})
+    for column in label_columns:
+        panel[column] = np.tile(weeks[column].to_numpy(), len(channels))
+    return pd.concat([panel, values.reset_index(drop=True)], axis=1)